@@ -0,0 +1,132 @@
+"""
+Answer Cache
+In-memory cache of generated answers for repeated and near-duplicate questions
+"""
+
+import math
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+def normalize_question(question: str) -> str:
+    """Case-fold, collapse whitespace and drop trailing punctuation"""
+    normalized = re.sub(r'\s+', ' ', question.strip().lower())
+    return normalized.rstrip('?.! ')
+
+
+def _norm(vector: List[float]) -> float:
+    """Euclidean norm of a vector"""
+    return math.sqrt(sum(x * x for x in vector))
+
+
+class AnswerCache:
+    """LRU + TTL cache keyed by (collection, index version, normalized question)"""
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 3600,
+                 similarity_threshold: Optional[float] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[str, str, str], Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, collection: str, index_version: str, question: str,
+            embed_question: Optional[Callable[[], List[float]]] = None) -> Optional[Dict]:
+        """Return a cached entry for the question, or None
+
+        embed_question is only called when there is no exact match and
+        near-duplicate matching is enabled.
+        """
+        key = (collection, index_version, normalize_question(question))
+
+        with self._lock:
+            self._expire(time.time())
+
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return dict(entry, match='exact', similarity=1.0)
+
+        # Fall back to the closest earlier question on the same index
+        if embed_question is not None and self.similarity_threshold is not None:
+            question_embedding = embed_question()
+            with self._lock:
+                best_key, best_score = self._most_similar(collection, index_version, question_embedding)
+                if best_key is not None and best_score >= self.similarity_threshold:
+                    self._entries.move_to_end(best_key)
+                    self.similar_hits += 1
+                    return dict(self._entries[best_key], match='similar', similarity=best_score)
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, collection: str, index_version: str, question: str, answer: str,
+            sources: List[Dict], question_embedding: Optional[List[float]] = None) -> None:
+        """Store an answer, evicting the least recently used entries over the limit"""
+        key = (collection, index_version, normalize_question(question))
+        entry = {
+            'question': question,
+            'answer': answer,
+            'sources': sources,
+            'embedding': question_embedding,
+            'embedding_norm': _norm(question_embedding) if question_embedding else None,
+            'created_at': time.time()
+        }
+
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, collection: str) -> int:
+        """Drop every entry for a collection; returns the number removed"""
+        with self._lock:
+            stale = [key for key in self._entries if key[0] == collection]
+            for key in stale:
+                del self._entries[key]
+            return len(stale)
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters for display"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'similar_hits': self.similar_hits,
+                'misses': self.misses,
+                'entries': len(self._entries)
+            }
+
+    def _expire(self, now: float) -> None:
+        """Remove entries older than the TTL"""
+        expired = [key for key, entry in self._entries.items()
+                   if now - entry['created_at'] > self.ttl_seconds]
+        for key in expired:
+            del self._entries[key]
+
+    def _most_similar(self, collection: str, index_version: str,
+                      question_embedding: List[float]) -> Tuple[Optional[Tuple], float]:
+        """Find the cached question with the highest cosine similarity"""
+        query_norm = _norm(question_embedding)
+        if query_norm == 0:
+            return None, 0.0
+
+        best_key, best_score = None, -1.0
+        for key, entry in self._entries.items():
+            if key[0] != collection or key[1] != index_version or not entry['embedding']:
+                continue
+            if not entry['embedding_norm']:
+                continue
+            dot = sum(a * b for a, b in zip(question_embedding, entry['embedding']))
+            score = dot / (query_norm * entry['embedding_norm'])
+            if score > best_score:
+                best_key, best_score = key, score
+        return best_key, best_score
@@ -7,33 +7,92 @@ import os
 import streamlit as st
 import tempfile
 import shutil
-import zipfile
-import subprocess
+import time
+import uuid
+from functools import partial
 from pathlib import Path
-from typing import List, Dict, Tuple
+from typing import TYPE_CHECKING, List, Dict, Tuple, Optional, Iterator, Callable, Union
 from dotenv import load_dotenv
 
-# LangChain imports
-from langchain_groq import ChatGroq
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
-from langchain_community.vectorstores import Chroma
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_core.documents import Document
-from langchain_core.prompts import ChatPromptTemplate
-
-# Debug imports (temporary)
-from importlib.metadata import version
+from answer_cache import AnswerCache
+from budgets import env_budget, format_budget
+from context_builder import estimate_tokens
+from collections_registry import CollectionRegistry, github_collection_name, zip_collection_name
+from clients import get_llm, get_provider_embeddings, get_groq_client, client_stats
+from embedding_cache import EmbeddingCache
+from embedding_providers import (LEGACY_EMBEDDING_SPEC, PROVIDER_GEMINI, PROVIDER_LOCAL, EmbeddingSpec,
+                                 collection_spec, embedding_spec, spec_from_metadata, spec_metadata)
+from health import HealthMonitor
+from compact_store import CompactVectorStore
+from indexer import Codebase, IndexSettings, IndexReporter, run_index, open_search_store, format_index_stats
+from manifest import manifest_path
+from jobs import JobQueue, JobStore
+from lexical_index import LexicalIndex, lexical_index_path
+from llm_dispatcher import LLMDispatcher
+from qa_engine import NO_RESULTS_ANSWER, QAEngine
+from symbols import SymbolIndex, symbol_index_path
+from sources import open_zip_codebase, resolve_remote_head, update_mirror, export_commit, zip_codebase_name
+from tracing import Tracer, tracer
+
+if TYPE_CHECKING:
+    from cached_embeddings import CachedEmbeddings
 
 # Load environment variables
 load_dotenv()
 
-# Configuration
-MAX_CODEBASE_SIZE_MB = 100
-MAX_FILES = 50
-MAX_FILE_SIZE_MB = 0.5
+
+# Configuration (budgets can be overridden via environment variables)
+MAX_CODEBASE_SIZE_MB = env_budget('MAX_CODEBASE_SIZE_MB', 100)
+MAX_FILES = env_budget('MAX_FILES', 50)
+MAX_FILE_SIZE_MB = env_budget('MAX_FILE_SIZE_MB', 0.5)
 SUPPORTED_EXTENSIONS = {'.py', '.js', '.jsx', '.ts', '.tsx', '.java', '.cpp', '.c', '.h', 
                        '.cs', '.rb', '.go', '.rs', '.php', '.md', '.txt', '.json', '.yaml', '.yml'}
 IGNORE_DIRS = {'node_modules', '.git', '__pycache__', 'venv', 'env', '.next', 'dist', 'build'}
+LLM_MODEL = "llama-3.3-70b-versatile"
+LLM_MAX_CONCURRENCY = int(os.getenv('LLM_MAX_CONCURRENCY', 4))  # Completions in flight across all sessions
+LLM_TOKENS_PER_MINUTE = env_budget('LLM_TOKENS_PER_MINUTE', 12000)  # Groq free-tier TPM for LLM_MODEL
+LLM_COMPLETION_TOKENS_ESTIMATE = 512  # Reserved per call until Groq reports the actual usage
+LLM_MAX_RETRIES = 3
+CHROMA_PERSIST_DIRECTORY = "./chroma_db"
+COLLECTION_REGISTRY_PATH = "./chroma_db/collections.json"
+REPO_MIRROR_DIR = "./repo_cache"
+RESPECT_GITIGNORE = True
+EMBEDDING_MODEL = "models/gemini-embedding-001"
+EMBEDDING_CACHE_PATH = "./embedding_cache/embeddings.sqlite"
+EMBEDDING_CACHE_MAX_ENTRIES = 50000
+EMBEDDING_BATCH_SIZE = 64
+EMBEDDING_MAX_CONCURRENCY = 4
+EMBEDDING_MAX_RETRIES = 6
+EMBEDDING_PROVIDER = os.getenv('EMBEDDING_PROVIDER', PROVIDER_GEMINI)  # Default for new indexes: 'gemini' or 'local'
+LOCAL_EMBEDDING_MODEL = os.getenv('LOCAL_EMBEDDING_MODEL', "sentence-transformers/all-MiniLM-L6-v2")  # Hub id or dir
+LOCAL_EMBEDDING_BATCH_SIZE = 32
+LOCAL_EMBEDDING_THREADS = int(os.getenv('LOCAL_EMBEDDING_THREADS', os.cpu_count() or 1))
+LOCAL_EMBEDDING_MAX_CONCURRENCY = 1  # ONNX Runtime already spreads each batch over LOCAL_EMBEDDING_THREADS
+VECTOR_STORE_BACKEND = os.getenv('VECTOR_STORE_BACKEND', 'chroma')  # 'compact' answers from an mmap snapshot
+COMPACT_STORE_DTYPE = os.getenv('COMPACT_STORE_DTYPE', 'int8')  # 'int8' (per-vector scales) or exact 'float16'
+EMBEDDING_PROVIDER_LABELS = {
+    PROVIDER_GEMINI: f"Gemini API ({EMBEDDING_MODEL})",
+    PROVIDER_LOCAL: f"Local CPU ({LOCAL_EMBEDDING_MODEL.rstrip('/').split('/')[-1]}, ONNX)"
+}
+LOADER_MAX_WORKERS = min(8, os.cpu_count() or 1)
+LOADER_USE_PROCESSES = False  # Processes parallelize splitting; threads suffice for I/O
+PROGRESS_UPDATE_INTERVAL_SECONDS = 0.2
+INDEX_MAX_WORKERS = int(os.getenv('INDEX_MAX_WORKERS', 2))
+JOBS_DB_PATH = "./jobs/jobs.sqlite"
+JOB_UPLOAD_DIR = "./jobs/uploads"
+JOB_POLL_INTERVAL_SECONDS = 2
+HEALTH_CHECK_TTL_SECONDS = 300
+ANSWER_CACHE_MAX_ENTRIES = 256
+ANSWER_CACHE_TTL_SECONDS = 3600
+ANSWER_CACHE_SIMILARITY_THRESHOLD = 0.95  # None disables near-duplicate matching
+RETRIEVAL_TOP_K = 8  # Fused chunks offered to the context builder
+RETRIEVAL_CANDIDATES = 20  # Per-ranker candidates fed into reciprocal-rank fusion
+CONTEXT_TOKEN_BUDGET = 2500  # Estimated tokens of code context per prompt
+TRACE_LOG_PATH = os.getenv('TRACE_LOG_PATH', './traces/spans.jsonl')  # JSON lines; '-' for stderr, '' to disable
+TRACE_OPENTELEMETRY = os.getenv('TRACE_OPENTELEMETRY', '').lower() in ('1', 'true', 'yes')
+LATENCY_PANEL_STAGES = ['qa.answer', 'qa.symbol_lookup', 'qa.embed_query', 'qa.search', 'qa.prompt',
+                        'llm.queue_wait', 'qa.llm_first_token', 'qa.llm_completion', 'index.job', 'index.scan', 'index.read',
+                        'index.split', 'index.embed_batch', 'index.upsert', 'index.compact']
 
 # Page configuration
 st.set_page_config(
@@ -44,6 +103,10 @@ st.set_page_config(
 )
 
 # Initialize session state
+if 'job_ids' not in st.session_state:
+    st.session_state.job_ids = []
+if 'attached_job_ids' not in st.session_state:
+    st.session_state.attached_job_ids = set()
 if 'qa_history' not in st.session_state:
     st.session_state.qa_history = []
 if 'vector_store' not in st.session_state:
@@ -51,298 +114,527 @@ if 'vector_store' not in st.session_state:
 if 'indexed' not in st.session_state:
     st.session_state.indexed = False
 if 'collection_name' not in st.session_state:
-    st.session_state.collection_name = "codebase_collection"
+    st.session_state.collection_name = None
+if 'index_version' not in st.session_state:
+    st.session_state.index_version = None
+if 'last_index_stats' not in st.session_state:
+    st.session_state.last_index_stats = None
+if 'session_id' not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex[:12]  # This browser session's turn in the LLM queue
+
+
+@st.cache_resource
+def get_answer_cache() -> AnswerCache:
+    """Process-wide answer cache shared by all sessions"""
+    return AnswerCache(
+        max_entries=ANSWER_CACHE_MAX_ENTRIES,
+        ttl_seconds=ANSWER_CACHE_TTL_SECONDS,
+        similarity_threshold=ANSWER_CACHE_SIMILARITY_THRESHOLD
+    )
 
 
-def check_service_status() -> Dict[str, bool]:
-    """Check the health status of all services"""
-    status = {
-        'llm': False,
-        'embeddings': False
-    }
-    
-    # Check LLM - Verify Groq connectivity with actual inference
-    try:
-        groq_key = os.getenv('GROQ_API_KEY')
-        if groq_key:
-            llm = ChatGroq(
-                model="llama-3.3-70b-versatile", 
-                groq_api_key=groq_key
-            )
-            # Verify with actual inference call
-            response = llm.invoke("Reply with OK")
-            if response and response.content:
-                status['llm'] = True
-    except Exception as e:
-        status['llm_error'] = str(e)
-        print(f"LLM health check failed: {str(e)}")
-    
-    # Check Embeddings - Use models/gemini-embedding-001
-    try:
-        google_key = os.getenv('GOOGLE_API_KEY')
-        if google_key:
-            embeddings = GoogleGenerativeAIEmbeddings(
-                model="models/gemini-embedding-001", 
-                google_api_key=google_key
-            )
-            status['embeddings'] = True
-    except Exception as e:
-        status['embeddings_error'] = str(e)
-        pass
+@st.cache_resource
+def get_embedding_cache() -> EmbeddingCache:
+    """Process-wide embedding cache shared by all sessions"""
+    return EmbeddingCache(EMBEDDING_CACHE_PATH, max_entries=EMBEDDING_CACHE_MAX_ENTRIES)
+
+
+@st.cache_resource(max_entries=8)
+def get_lexical_index(collection_name: str, index_version: Optional[str]) -> Optional[LexicalIndex]:
+    """BM25 index for a collection, reloaded whenever the index version changes"""
+    return LexicalIndex.load(lexical_index_path(collection_name, CHROMA_PERSIST_DIRECTORY))
+
+
+@st.cache_resource(max_entries=8)
+def get_symbol_index(collection_name: str, index_version: Optional[str]) -> Optional[SymbolIndex]:
+    """Symbol table for a collection, reloaded whenever the index version changes"""
+    return SymbolIndex.load(symbol_index_path(collection_name, CHROMA_PERSIST_DIRECTORY))
+
+
+@st.cache_resource
+def get_llm_dispatcher() -> LLMDispatcher:
+    """Process-wide LLM queue shared by all sessions"""
+    return LLMDispatcher(
+        max_concurrency=LLM_MAX_CONCURRENCY,
+        tokens_per_minute=LLM_TOKENS_PER_MINUTE,
+        completion_tokens=LLM_COMPLETION_TOKENS_ESTIMATE,
+        max_retries=LLM_MAX_RETRIES
+    )
+
+
+def probe_llm() -> None:
+    """Verify the Groq key and model without spending completion tokens"""
+    groq_key = os.getenv('GROQ_API_KEY')
+    if not groq_key:
+        raise RuntimeError("GROQ_API_KEY not set")
+    get_groq_client().models.retrieve(LLM_MODEL)
+
+
+def probe_embeddings(spec: EmbeddingSpec) -> None:
+    """Verify an embedding provider: a metadata lookup for Gemini, one local embedding for ONNX"""
+    if spec.provider == PROVIDER_LOCAL:
+        # Loads the pooled model that questions will use, so the probe is not wasted work
+        get_provider_embeddings(spec, local_batch_size=LOCAL_EMBEDDING_BATCH_SIZE,
+                                local_threads=LOCAL_EMBEDDING_THREADS).embed_query("health check")
+        return
+    google_key = os.getenv('GOOGLE_API_KEY')
+    if not google_key:
+        raise RuntimeError("GOOGLE_API_KEY not set")
+    import google.generativeai as genai  # Deferred: slow to import and only needed by the probe thread
+    genai.configure(api_key=google_key)
+    genai.get_model(spec.model)
+
+
+@st.cache_resource
+def get_health_monitor() -> HealthMonitor:
+    """Process-wide background health monitor; embedding probes are added per provider in use"""
+    monitor = HealthMonitor({'llm': probe_llm}, ttl_seconds=HEALTH_CHECK_TTL_SECONDS)
+    monitor.start()
+    return monitor
+
+
+def get_active_embedding_spec() -> EmbeddingSpec:
+    """Model of this session's collection, or the default for new indexes if none is attached"""
+    if st.session_state.collection_name:
+        entry = get_collection_registry().get(st.session_state.collection_name)
+        return spec_from_metadata(entry) or LEGACY_EMBEDDING_SPEC
+    return get_embedding_spec(EMBEDDING_PROVIDER)
+
+
+def check_service_status(spec: EmbeddingSpec) -> Dict[str, Dict]:
+    """Return the last known health of the LLM and spec's embedding provider without blocking"""
+    monitor = get_health_monitor()
+    monitor.watch(f"embeddings:{spec.cache_name}", partial(probe_embeddings, spec))
+    status = monitor.snapshot()
+    return {'llm': status.get('llm'), 'embeddings': status.get(f"embeddings:{spec.cache_name}")}
+
+
+def render_service_line(label: str, result: Dict) -> None:
+    """Show one service's cached health in the sidebar"""
+    if not result:
+        st.write(label, "🟡 Checking...")
+        return
     
-    return status
+    st.write(label, "🟢 Connected" if result['ok'] else "🔴 Disconnected")
+    checked = time.strftime('%H:%M:%S', time.localtime(result['checked_at']))
+    st.caption(f"Checked {checked} · {result['latency_ms']:.0f} ms")
+    if not result['ok'] and result['error']:
+        st.caption(f"Error: {result['error']}")
+
+
+def get_index_settings(spec: EmbeddingSpec = LEGACY_EMBEDDING_SPEC) -> IndexSettings:
+    """Indexing settings from the configuration above"""
+    local = spec.provider == PROVIDER_LOCAL
+    return IndexSettings(
+        extensions=frozenset(SUPPORTED_EXTENSIONS),
+        ignore_dirs=frozenset(IGNORE_DIRS),
+        persist_directory=CHROMA_PERSIST_DIRECTORY,
+        max_codebase_size_mb=MAX_CODEBASE_SIZE_MB,
+        max_files=MAX_FILES,
+        max_file_size_mb=MAX_FILE_SIZE_MB,
+        respect_gitignore=RESPECT_GITIGNORE,
+        embedding_batch_size=EMBEDDING_BATCH_SIZE,
+        embedding_max_concurrency=LOCAL_EMBEDDING_MAX_CONCURRENCY if local else EMBEDDING_MAX_CONCURRENCY,
+        embedding_max_retries=EMBEDDING_MAX_RETRIES,
+        loader_max_workers=LOADER_MAX_WORKERS,
+        loader_use_processes=LOADER_USE_PROCESSES,
+        progress_interval_seconds=PROGRESS_UPDATE_INTERVAL_SECONDS,
+        compact_store_dtype=COMPACT_STORE_DTYPE if VECTOR_STORE_BACKEND == 'compact' else None
+    )
 
 
-def get_file_size_mb(file_path: Path) -> float:
-    """Get file size in MB"""
-    return file_path.stat().st_size / (1024 * 1024)
+def get_embedding_spec(provider: str) -> EmbeddingSpec:
+    """Model that new indexes with a provider are embedded with"""
+    return embedding_spec(provider, LOCAL_EMBEDDING_MODEL if provider == PROVIDER_LOCAL else EMBEDDING_MODEL)
 
 
-def get_directory_size_mb(directory: Path) -> float:
-    """Get total directory size in MB"""
-    total = sum(f.stat().st_size for f in directory.rglob('*') if f.is_file())
-    return total / (1024 * 1024)
+def get_cached_embeddings(spec: EmbeddingSpec = LEGACY_EMBEDDING_SPEC) -> "CachedEmbeddings":
+    """A provider's embeddings behind the shared embedding cache"""
+    from cached_embeddings import CachedEmbeddings
+    return CachedEmbeddings(
+        get_provider_embeddings(spec, local_batch_size=LOCAL_EMBEDDING_BATCH_SIZE,
+                                local_threads=LOCAL_EMBEDDING_THREADS),
+        model_name=spec.cache_name,
+        cache=get_embedding_cache()
+    )
 
 
-def extract_zip(zip_file, extract_to: Path) -> bool:
-    """Extract zip file to directory"""
-    try:
-        with zipfile.ZipFile(zip_file, 'r') as zip_ref:
-            zip_ref.extractall(extract_to)
-        return True
-    except Exception as e:
-        st.error(f"Error extracting zip: {str(e)}")
-        return False
+@st.cache_resource
+def get_chroma_client():
+    """One Chroma client for all sessions and indexing jobs"""
+    import chromadb  # Deferred until a collection is queried or indexed
+    return chromadb.PersistentClient(path=CHROMA_PERSIST_DIRECTORY)
 
 
-def clone_github_repo(url: str, clone_to: Path) -> bool:
-    """Clone GitHub repository"""
-    try:
-        result = subprocess.run(
-            ['git', 'clone', '--depth', '1', url, str(clone_to)],
-            capture_output=True,
-            text=True,
-            timeout=300
-        )
-        if result.returncode == 0:
-            return True
-        else:
-            st.error(f"Git clone failed: {result.stderr}")
-            return False
-    except subprocess.TimeoutExpired:
-        st.error("Git clone timeout (5 minutes). Repository too large.")
-        return False
-    except Exception as e:
-        st.error(f"Error cloning repository: {str(e)}")
-        return False
+@st.cache_resource
+def get_collection_registry() -> CollectionRegistry:
+    """Catalog of indexed codebases, including ones indexed before it existed"""
+    return CollectionRegistry(COLLECTION_REGISTRY_PATH, manifest_dir=str(Path(CHROMA_PERSIST_DIRECTORY) / "manifests"))
+
+
+@st.cache_resource
+def get_tracer() -> Tracer:
+    """Process-wide tracer, configured once to export spans"""
+    if TRACE_LOG_PATH and TRACE_LOG_PATH != '-':
+        Path(TRACE_LOG_PATH).parent.mkdir(parents=True, exist_ok=True)
+    tracer.configure(log_path=TRACE_LOG_PATH, opentelemetry=TRACE_OPENTELEMETRY)
+    return tracer
+
+
+@st.cache_resource
+def get_job_queue() -> JobQueue:
+    """Process-wide indexing job queue"""
+    return JobQueue(JobStore(JOBS_DB_PATH), max_workers=INDEX_MAX_WORKERS)
+
+
+def fetch_zip(zip_path: Path, work_dir: Path, revision: Optional[str] = None) -> Codebase:
+    """Open an uploaded ZIP for indexing in place; the upload is deleted once the job ends"""
+    return open_zip_codebase(zip_path, delete_on_close=True)
+
 
+def fetch_github(url: str, work_dir: Path, revision: str) -> Path:
+    """Export a commit from the repository's local mirror into work_dir and return its root"""
+    mirror = update_mirror(url, revision, REPO_MIRROR_DIR)
+    repo_path = work_dir / "repo"
+    export_commit(mirror, revision, repo_path)
+    return repo_path
 
-def collect_code_files(directory: Path) -> List[Path]:
-    """Collect all code files from directory"""
-    files = []
-    file_count = 0
+
+def enqueue_index_job(kind: str, source: str, fetch: Callable[[Path, Optional[str]], Union[Path, Codebase]],
+                      collection_name: str, label: str, spec: EmbeddingSpec,
+                      resolve_revision: Optional[Callable[[], str]] = None) -> int:
+    """Queue a background job that fetches a codebase and indexes it with spec's embedding model
+
+    With resolve_revision, a revision that is already indexed into the
+    collection with the same model short-circuits the job before anything
+    is fetched.
+    """
+    # Resolve shared resources here; job threads have no Streamlit context
+    embeddings = get_cached_embeddings(spec)
+    settings = get_index_settings(spec)
+    answer_cache = get_answer_cache()
+    registry = get_collection_registry()
+    client = get_chroma_client()
     
-    for file_path in directory.rglob('*'):
-        # Skip if in ignored directory
-        if any(ignore_dir in file_path.parts for ignore_dir in IGNORE_DIRS):
-            continue
-        
-        # Check if file
-        if not file_path.is_file():
-            continue
-        
-        # Check extension
-        if file_path.suffix not in SUPPORTED_EXTENSIONS:
+    manifest_dir = str(Path(settings.persist_directory) / "manifests")
+    
+    def runner(reporter: IndexReporter) -> Dict:
+        """Fetch into a scratch directory, index, then clean up"""
+        revision = None
+        if resolve_revision:
+            reporter.progress(stage='resolving')
+            revision = resolve_revision()
+            entry = registry.get(collection_name)
+            if (entry and entry.get('revision') == revision and manifest_path(collection_name, manifest_dir).exists()
+                    and (spec_from_metadata(entry) or LEGACY_EMBEDDING_SPEC).matches(spec)):
+                reporter.message('success', f"Revision {revision[:12]} is already indexed; reusing the collection")
+                reporter.progress(stage='done', eta_seconds=0)
+                return {
+                    'collection_name': collection_name,
+                    'index_version': entry['index_version'],
+                    'revision': revision,
+                    'reused_revision': True,
+                    'files': 0,
+                    'total_files': entry.get('files'),
+                    'chunks': 0,
+                    'seconds': 0.0,
+                    'chunks_per_sec': 0.0
+                }
+        
+        with tracer.span('index.job', kind=kind, collection=collection_name) as span, \
+                tempfile.TemporaryDirectory() as temp_dir:
+            reporter.progress(stage='fetching')
+            codebase = fetch(Path(temp_dir), revision)
+            try:
+                result = run_index(codebase, collection_name, embeddings, settings, reporter, client=client,
+                                   embedding_spec=spec)
+            finally:
+                if isinstance(codebase, Codebase) and codebase.close:
+                    codebase.close()
+            span.update(files=result['files'], chunks=result['chunks'])
+            result['revision'] = revision
+            return result
+    
+    def on_done(result: Dict) -> None:
+        """Catalog the collection; answers generated against its previous contents are now stale"""
+        registry.record(result['collection_name'], label, kind, source, result, revision=result.get('revision'),
+                        **spec_metadata(spec))
+        if not result.get('reused_revision'):
+            answer_cache.invalidate(result['collection_name'])
+    
+    job_id = get_job_queue().submit(kind, source, collection_name, runner, on_done)
+    st.session_state.job_ids.append(job_id)
+    return job_id
+
+
+def attach_collection(collection_name: str, index_version: Optional[str], stats: Optional[Dict] = None) -> None:
+    """Point this session at an indexed collection; its vector store opens on first use"""
+    if collection_name != st.session_state.collection_name:
+        st.session_state.qa_history = []
+    st.session_state.vector_store = None
+    st.session_state.collection_name = collection_name
+    st.session_state.index_version = index_version
+    st.session_state.last_index_stats = stats
+    st.session_state.indexed = True
+
+
+def get_vector_store():
+    """This session's vector store, opened on first question so the page renders before Chroma loads"""
+    if st.session_state.vector_store is None:
+        # Questions must be embedded with the model the collection was indexed with
+        client = get_chroma_client()
+        try:
+            spec = collection_spec(client.get_collection(st.session_state.collection_name))
+        except ValueError:
+            # Cataloged but missing from Chroma; it is created empty below
+            spec = LEGACY_EMBEDDING_SPEC
+        st.session_state.vector_store = open_search_store(
+            st.session_state.collection_name, get_cached_embeddings(spec), CHROMA_PERSIST_DIRECTORY, client=client,
+            embedding_spec=spec, compact=VECTOR_STORE_BACKEND == 'compact',
+            index_version=st.session_state.index_version
+        )
+    return st.session_state.vector_store
+
+
+def attach_finished_jobs() -> None:
+    """Point this session at collections its jobs finished indexing"""
+    store = get_job_queue().store
+    for job_id in st.session_state.job_ids:
+        if job_id in st.session_state.attached_job_ids:
             continue
-        
-        # Check file size
-        if get_file_size_mb(file_path) > MAX_FILE_SIZE_MB:
-            st.warning(f"Skipping large file: {file_path.name} (>{MAX_FILE_SIZE_MB}MB)")
+        job = store.get(job_id)
+        if not job or job['status'] not in ('done', 'failed'):
             continue
         
-        files.append(file_path)
-        file_count += 1
-        
-        # Check max files limit
-        if file_count >= MAX_FILES:
-            st.warning(f"Reached maximum file limit ({MAX_FILES}). Stopping collection.")
-            break
+        st.session_state.attached_job_ids.add(job_id)
+        if job['status'] == 'done':
+            result = job['result']
+            attach_collection(result['collection_name'], result['index_version'], result)
+
+
+def attach_latest_collection() -> None:
+    """Reattach a new session (or a restarted process) to the most recently indexed codebase"""
+    if st.session_state.indexed:
+        return
+    collections = get_collection_registry().list()
+    if collections:
+        attach_collection(collections[0]['name'], collections[0].get('index_version'))
+
+
+def format_collection(entry: Dict) -> str:
+    """Picker label for a cataloged collection"""
+    label = entry.get('label') or entry['name']
+    if entry.get('files'):
+        label += f" · {entry['files']} files"
+    if entry.get('embedding_provider') == PROVIDER_LOCAL:
+        label += " · local embeddings"
+    if entry.get('indexed_at'):
+        label += f" · {time.strftime('%Y-%m-%d %H:%M', time.localtime(entry['indexed_at']))}"
+    return label
+
+
+def format_eta(seconds: Optional[float]) -> str:
+    """Human-friendly remaining time"""
+    if seconds is None:
+        return "—"
+    if seconds < 60:
+        return f"{seconds:.0f}s"
+    return f"{seconds / 60:.0f}m {seconds % 60:.0f}s"
+
+
+def render_job(job: Dict) -> None:
+    """Show one indexing job's status and progress in the sidebar"""
+    icons = {'queued': '⏳', 'running': '🔄', 'done': '✅', 'failed': '❌'}
+    st.write(f"{icons[job['status']]} Job #{job['id']} ({job['kind']}): {job['status']}")
+    st.caption(job['source'])
     
-    return files
-
-
-def load_and_split_documents(files: List[Path], base_path: Path) -> List[Document]:
-    """Load code files and split into chunks"""
-    documents = []
+    progress = job['progress']
+    if job['status'] == 'running':
+        files_total = progress.get('files_total')
+        files_processed = progress.get('files_processed', 0)
+        if files_total:
+            st.progress(min(files_processed / files_total, 1.0))
+        st.caption(f"Stage: {progress.get('stage', 'starting')} · "
+                   f"scanned {progress.get('files_scanned', 0)} files · "
+                   f"processed {files_processed}/{files_total or '?'} · "
+                   f"{progress.get('chunks_embedded', 0)} chunks embedded · "
+                   f"ETA {format_eta(progress.get('eta_seconds'))}")
+    elif job['status'] == 'done' and job['result']:
+        st.caption(format_index_stats(job['result']))
+    elif job['status'] == 'failed':
+        st.caption(f"Error: {job['error']}")
     
-    # Text splitter for code
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=500,
-        chunk_overlap=100,
-        length_function=len,
-        separators=["\n\n", "\n", " ", ""]
+    if job['messages']:
+        with st.expander("Log"):
+            for message in job['messages']:
+                st.caption(f"{message['level'].upper()}: {message['text']}")
+
+
+def get_qa_engine() -> QAEngine:
+    """RAG engine over this session's collection"""
+    return QAEngine(
+        get_vector_store(),
+        get_lexical_index(st.session_state.collection_name, st.session_state.index_version),
+        get_symbol_index(st.session_state.collection_name, st.session_state.index_version),
+        llm=get_llm(LLM_MODEL, temperature=0.3),
+        top_k=RETRIEVAL_TOP_K,
+        candidates=RETRIEVAL_CANDIDATES,
+        token_budget=CONTEXT_TOKEN_BUDGET,
+        dispatcher=get_llm_dispatcher()
     )
+
+
+def build_prompt(question: str, question_embedding: Optional[List[float]] = None,
+                 metrics: Optional[Dict] = None) -> Tuple[Optional[str], List[Dict]]:
+    """Retrieve relevant chunks and build a token-budgeted LLM prompt"""
+    engine = get_qa_engine()
+    docs = engine.retrieve(question, question_embedding)
     
-    progress_bar = st.progress(0)
-    status_text = st.empty()
+    if not docs:
+        return None, []
     
-    for idx, file_path in enumerate(files):
-        try:
-            # Read file content
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-            
-            # Create relative path for metadata
-            relative_path = file_path.relative_to(base_path)
-            
-            # Split content into chunks
-            chunks = text_splitter.split_text(content)
-            
-            # Create documents with metadata
-            for chunk_idx, chunk in enumerate(chunks):
-                doc = Document(
-                    page_content=chunk,
-                    metadata={
-                        'source': str(relative_path),
-                        'file_type': file_path.suffix,
-                        'chunk_index': chunk_idx
-                    }
-                )
-                documents.append(doc)
-            
-            # Update progress
-            progress = (idx + 1) / len(files)
-            progress_bar.progress(progress)
-            status_text.text(f"Processing: {relative_path} ({idx + 1}/{len(files)})")
-        
-        except Exception as e:
-            st.warning(f"Error processing {file_path.name}: {str(e)}")
+    full_prompt, sources, blocks = engine.build_prompt(question, docs)
     
-    progress_bar.empty()
-    status_text.empty()
+    if metrics is not None:
+        metrics['context_tokens'] = sum(block.tokens for block in blocks)
+        metrics['prompt_tokens'] = estimate_tokens(full_prompt)
     
-    return documents
+    return full_prompt, sources
 
 
-def index_codebase(source_path: Path) -> bool:
-    """Index the codebase into Chroma"""
-    try:
-        # Check directory size
-        dir_size = get_directory_size_mb(source_path)
-        if dir_size > MAX_CODEBASE_SIZE_MB:
-            st.error(f"Codebase too large: {dir_size:.2f}MB (max: {MAX_CODEBASE_SIZE_MB}MB)")
-            return False
-        
-        st.info(f"Codebase size: {dir_size:.2f}MB")
-        
-        # Collect files
-        with st.spinner("Collecting code files..."):
-            files = collect_code_files(source_path)
-        
-        if not files:
-            st.error("No supported code files found!")
-            return False
-        
-        st.success(f"Found {len(files)} code files")
-        
-        # Load and split documents
-        with st.spinner("Processing and chunking code..."):
-            documents = load_and_split_documents(files, source_path)
-        
-        if not documents:
-            st.error("No documents created!")
-            return False
-        
-        st.success(f"Created {len(documents)} document chunks")
-        
-        # Create embeddings and vector store
-        with st.spinner("Creating embeddings and indexing to Chroma..."):
-            # Use models/gemini-embedding-001
-            embeddings = GoogleGenerativeAIEmbeddings(
-                model="models/gemini-embedding-001",
-                google_api_key=os.getenv('GOOGLE_API_KEY')
-            )
-            
-            # Create Chroma vector store with persistence
-            persist_directory = "./chroma_db"
-            vector_store = Chroma.from_documents(
-                documents=documents,
-                embedding=embeddings,
-                persist_directory=persist_directory,
-                collection_name=st.session_state.collection_name
-            )
-            
-            st.session_state.vector_store = vector_store
-            st.session_state.indexed = True
-        
-        st.success("✅ Codebase indexed successfully!")
-        return True
-    
-    except Exception as e:
-        st.error(f"Error during indexing: {str(e)}")
-        return False
+def lookup_symbol_answer(question: str) -> Optional[Tuple[str, List[Dict]]]:
+    """Answer "where is X defined" / "what calls X" straight from the symbol table"""
+    return get_qa_engine().lookup(question)
 
 
-def answer_question(question: str) -> Tuple[str, List[Dict]]:
-    """Answer question using RAG pipeline"""
-    if not st.session_state.vector_store:
-        return "Please index a codebase first.", []
+def lookup_cached_answer(question: str) -> Tuple[Optional[Dict], Optional[List[float]]]:
+    """Check the answer cache; also returns the question embedding if one was computed"""
+    computed = []
     
-    try:
-        # Retrieve relevant documents
-        docs = st.session_state.vector_store.similarity_search(question, k=5)
-        
-        if not docs:
-            return "No relevant code found for your question.", []
-        
-        # Prepare context from documents
-        context_parts = []
-        sources = []
-        
-        for idx, doc in enumerate(docs):
-            source_info = {
-                'file_path': doc.metadata.get('source', 'Unknown'),
-                'chunk_index': doc.metadata.get('chunk_index', 0),
-                'content': doc.page_content
-            }
-            sources.append(source_info)
-            context_parts.append(
-                f"[File: {source_info['file_path']}]\n{doc.page_content}\n"
-            )
-        
-        context = "\n---\n".join(context_parts)
-        
-        # Create prompt - combining system and user messages
-        full_prompt = f"""You are a helpful code assistant. Answer the user's question based on the provided code snippets.
-Be specific and reference the file names when relevant. If the code doesn't contain enough information, say so.
+    def embed_question() -> List[float]:
+        # Near-duplicate lookup needs the question embedding, which retrieval reuses
+        with tracer.span('qa.embed_query'):
+            computed.append(get_vector_store().embeddings.embed_query(question))
+        return computed[0]
+    
+    cached = get_answer_cache().get(
+        st.session_state.collection_name,
+        st.session_state.index_version or "",
+        question,
+        embed_question
+    )
+    return cached, computed[0] if computed else None
 
-Question: {question}
 
-Relevant Code:
-{context}
+def store_cached_answer(question: str, answer: str, sources: List[Dict],
+                        question_embedding: Optional[List[float]] = None) -> None:
+    """Remember an answer for this collection and index version"""
+    get_answer_cache().put(
+        st.session_state.collection_name,
+        st.session_state.index_version or "",
+        question, answer, sources, question_embedding
+    )
 
-Please provide a clear and concise answer based on the code above."""
-        
-        # Get LLM response
-        llm = ChatGroq(
-            model="llama-3.3-70b-versatile",
-            groq_api_key=os.getenv('GROQ_API_KEY'),
-            temperature=0.3
-        )
-        
-        response = llm.invoke(full_prompt)
-        
-        answer = response.content
-        
-        return answer, sources
+
+def stream_answer(full_prompt: str, metrics: Dict) -> Iterator[str]:
+    """Yield answer tokens as they arrive, recording timings into metrics"""
+    llm = get_llm(LLM_MODEL, temperature=0.3)
+    started = time.perf_counter()
+    tokens = 0
     
+    try:
+        # Identical prompts from other sessions share one completion; time to first token includes queueing
+        for chunk in get_llm_dispatcher().stream(llm, full_prompt, st.session_state.session_id, metrics):
+            # The final chunk carries Groq's exact token usage
+            if getattr(chunk, 'usage_metadata', None):
+                metrics['prompt_tokens'] = chunk.usage_metadata['input_tokens']
+            if not chunk.content:
+                continue
+            if 'ttft_ms' not in metrics:
+                metrics['ttft_ms'] = (time.perf_counter() - started) * 1000
+                tracer.record('qa.llm_first_token', metrics['ttft_ms'] / 1000, model=LLM_MODEL)
+            # Groq streams roughly one token per chunk
+            tokens += 1
+            yield chunk.content
     except Exception as e:
-        return f"Error generating answer: {str(e)}", []
+        metrics['error'] = str(e)
+        yield f"\n\nError generating answer: {str(e)}"
+    
+    total_seconds = time.perf_counter() - started
+    metrics['total_ms'] = total_seconds * 1000
+    metrics['tokens'] = tokens
+    tracer.record('qa.llm_completion', total_seconds, model=LLM_MODEL, tokens=tokens, error=metrics.get('error'))
+    
+    # Throughput over the generation phase, excluding time to first token
+    generation_seconds = total_seconds - metrics.get('ttft_ms', 0) / 1000
+    metrics['tokens_per_sec'] = tokens / generation_seconds if generation_seconds > 0 else 0.0
+
+
+def render_latency_panel() -> None:
+    """Recent p50/p95 per pipeline stage, from the process-wide tracer"""
+    st.subheader("⏱️ Latency")
+    summary = get_tracer().summary()
+    stages = [stage for stage in LATENCY_PANEL_STAGES if stage in summary]
+    if not stages:
+        st.caption("No timings yet")
+        return
+    
+    for stage in stages:
+        stats = summary[stage]
+        st.caption(f"`{stage}` p50 {stats['p50_ms']:.0f} ms · p95 {stats['p95_ms']:.0f} ms (n={stats['count']})")
+
+
+def render_sources(sources: List[Dict]) -> None:
+    """Show retrieved chunks as proof below an answer"""
+    if not sources:
+        return
+    
+    with st.expander(f"📁 View {len(sources)} source(s)"):
+        for idx, source in enumerate(sources):
+            if source.get('line'):
+                st.markdown(f"**File:** `{source['file_path']}` (line {source['line']})")
+            elif source.get('start_line'):
+                st.markdown(f"**File:** `{source['file_path']}` (lines {source['start_line']}–{source['end_line']})")
+            else:
+                st.markdown(f"**File:** `{source['file_path']}`")
+            st.code(source['content'], language='python')
+            if idx < len(sources) - 1:
+                st.markdown("---")
+
+
+def render_answer_metrics(metrics: Dict) -> None:
+    """Show streaming latency for an answer"""
+    if metrics.get('symbol_lookup'):
+        st.caption(f"⚡ Answered from the symbol index · {metrics['total_ms']:.0f} ms")
+        return
+    
+    if metrics.get('cache'):
+        match = "similar question" if metrics['cache'] == 'similar' else "same question"
+        st.caption(f"⚡ Cached answer ({match}) · {metrics['total_ms']:.0f} ms")
+        return
+    
+    if 'ttft_ms' not in metrics:
+        return
+    
+    line = (f"⏱️ First token {metrics['ttft_ms']:.0f} ms · "
+            f"{metrics['tokens']} tokens in {metrics['total_ms'] / 1000:.1f}s "
+            f"({metrics['tokens_per_sec']:.0f} tok/s)")
+    if 'prompt_tokens' in metrics:
+        line += f" · {metrics['prompt_tokens']} prompt tokens"
+    if metrics.get('queue_ms', 0) >= 1:
+        line += f" · queued {metrics['queue_ms']:.0f} ms"
+    if metrics.get('coalesced'):
+        line += " · shared with an identical question in flight"
+    st.caption(line)
 
 
 def main():
     """Main application"""
     
+    get_tracer()
+    attach_finished_jobs()
+    attach_latest_collection()
+    
     # Sidebar - Status and Info
     with st.sidebar:
         st.title("🔍 Codebase Q&A")
@@ -350,46 +642,114 @@ def main():
         
         # Service Status
         st.subheader("Service Status")
-        status = check_service_status()
+        active_spec = get_active_embedding_spec()
+        status = check_service_status(active_spec)
         
         # LLM Status
-        st.write("🤖 LLM (Groq):", "🟢 Connected" if status['llm'] else "🔴 Disconnected")
-        if not status['llm'] and 'llm_error' in status:
-            st.caption(f"Error: {status['llm_error']}")
+        render_service_line("🤖 LLM (Groq):", status.get('llm'))
         
         # Embeddings Status
-        st.write("📊 Embeddings (Gemini):", "🟢 Connected" if status['embeddings'] else "🔴 Disconnected")
-        if not status['embeddings'] and 'embeddings_error' in status:
-            st.caption(f"Error: {status['embeddings_error']}")
+        provider_label = "Local ONNX" if active_spec.provider == PROVIDER_LOCAL else "Gemini"
+        render_service_line(f"📊 Embeddings ({provider_label}):", status.get('embeddings'))
+        
+        if st.button("🔄 Recheck services"):
+            get_health_monitor().refresh()
         
         # Vector DB Status
-        st.write("💾 Vector DB:", "🟢 Chroma (Local)" if st.session_state.indexed else "⚪ Not Indexed")
+        if not st.session_state.indexed:
+            st.write("💾 Vector DB:", "⚪ Not Indexed")
+        elif isinstance(st.session_state.vector_store, CompactVectorStore):
+            st.write("💾 Vector DB:", f"🟢 Compact ({st.session_state.vector_store.header['dtype']}, mmap)")
+        elif st.session_state.vector_store is None:
+            st.write("💾 Vector DB:", "🟢 Ready (opens on first question)")
+        else:
+            st.write("💾 Vector DB:", "🟢 Chroma (Local)")
         
         st.markdown("---")
         
         # Indexing Status
         st.subheader("Indexing Status")
+        collections = get_collection_registry().list()
+        if collections:
+            names = [entry['name'] for entry in collections]
+            current = names.index(st.session_state.collection_name) if st.session_state.collection_name in names else 0
+            picked = st.selectbox("Codebase", range(len(collections)), index=current,
+                                  format_func=lambda idx: format_collection(collections[idx]))
+            if names[picked] != st.session_state.collection_name:
+                attach_collection(names[picked], collections[picked].get('index_version'))
+        
         if st.session_state.indexed:
             st.success("✅ Codebase Indexed")
             st.info(f"Collection: {st.session_state.collection_name}")
-            st.caption("Stored in: ./chroma_db")
+            st.caption(f"Stored in: {CHROMA_PERSIST_DIRECTORY}")
+            if st.session_state.last_index_stats:
+                st.caption(format_index_stats(st.session_state.last_index_stats))
         else:
             st.warning("⏳ No codebase indexed")
         
+        recent_jobs = get_job_queue().store.recent(limit=5)
+        jobs_active = any(job['status'] in ('queued', 'running') for job in recent_jobs)
+        for job in recent_jobs:
+            render_job(job)
+        auto_refresh = st.checkbox("Auto-refresh job progress", value=True) if jobs_active else False
+        
         st.markdown("---")
         
-        # Debug Info (temporary debug code)
-        st.subheader("🐛 Debug Info")
-        st.caption(f"Groq SDK: {version('groq')}")
-        st.caption(f"LangChain Groq: {version('langchain-groq')}")
+        # Embedding Cache
+        st.subheader("Embedding Cache")
+        cache_stats = get_embedding_cache().stats()
+        st.write(f"- Hits: {cache_stats['hits']}")
+        st.write(f"- Misses: {cache_stats['misses']}")
+        st.caption(f"{cache_stats['entries']} cached vectors, "
+                   f"{cache_stats['hit_rate']:.0%} hit rate, {cache_stats['evictions']} evicted")
+        
+        st.markdown("---")
+        
+        # Answer Cache
+        st.subheader("Answer Cache")
+        answer_stats = get_answer_cache().stats()
+        st.write(f"- Hits: {answer_stats['hits']} exact, {answer_stats['similar_hits']} similar")
+        st.write(f"- Misses: {answer_stats['misses']}")
+        st.caption(f"{answer_stats['entries']} cached answers")
+        
+        st.markdown("---")
+        
+        # Client Pool
+        st.subheader("Client Pool")
+        pool_stats = client_stats()
+        st.write(f"- Clients: {pool_stats['pooled_clients']} pooled, {pool_stats['clients_reused']} reuses")
+        st.write(f"- HTTP: {pool_stats['http_requests']} requests, "
+                 f"{pool_stats['http_connections_opened']} new connections")
+        st.caption(f"{pool_stats['http_connections_reused']} requests served on kept-alive connections")
+        
+        st.markdown("---")
+        
+        # LLM Queue
+        st.subheader("LLM Queue")
+        queue_stats = get_llm_dispatcher().stats()
+        st.write(f"- Running: {queue_stats['running']}/{queue_stats['max_concurrency']}")
+        st.write(f"- Queued: {queue_stats['queued']} from {queue_stats['queued_sessions']} session(s)"
+                 + (f", oldest {queue_stats['oldest_wait_ms'] / 1000:.1f}s" if queue_stats['queued'] else ""))
+        st.caption(f"Wait p50 {queue_stats['wait_p50_ms']:.0f} ms · p95 {queue_stats['wait_p95_ms']:.0f} ms · "
+                   f"{queue_stats['coalesced']} of {queue_stats['requests']} requests shared an in-flight answer")
+        if queue_stats['tokens_available'] is not None:
+            st.caption(f"{queue_stats['tokens_available']:.0f} of {format_budget(LLM_TOKENS_PER_MINUTE)} "
+                       f"tokens/min available")
+        if queue_stats['paused_ms'] > 0:
+            st.caption(f"Paused {queue_stats['paused_ms'] / 1000:.1f}s after a rate limit "
+                       f"({queue_stats['rate_limits']} so far)")
+        
+        st.markdown("---")
+        
+        render_latency_panel()
         
         st.markdown("---")
         
         # Info
         st.subheader("ℹ️ Limits")
-        st.write(f"- Max codebase: {MAX_CODEBASE_SIZE_MB}MB")
-        st.write(f"- Max files: {MAX_FILES}")
-        st.write(f"- Max file size: {MAX_FILE_SIZE_MB}MB")
+        st.write(f"- Max codebase: {format_budget(MAX_CODEBASE_SIZE_MB, 'MB')}")
+        st.write(f"- Max files: {format_budget(MAX_FILES)}")
+        st.write(f"- Max file size: {format_budget(MAX_FILE_SIZE_MB, 'MB')}")
     
     # Main content
     st.title("🔍 Codebase Q&A with Proof")
@@ -398,10 +758,12 @@ def main():
     Get answers with file references and actual code snippets as proof.
     """)
     
-    # Check API keys
+    # Check API keys; local-only setups embed without Google
     if not os.getenv('GOOGLE_API_KEY'):
-        st.error("⚠️ GOOGLE_API_KEY not found in environment variables!")
-        st.stop()
+        if EMBEDDING_PROVIDER != PROVIDER_LOCAL:
+            st.error("⚠️ GOOGLE_API_KEY not found in environment variables!")
+            st.stop()
+        st.info("GOOGLE_API_KEY is not set; only local embeddings are available.")
     
     if not os.getenv('GROQ_API_KEY'):
         st.error("⚠️ GROQ_API_KEY not found in environment variables!")
@@ -414,6 +776,12 @@ def main():
     with tab1:
         st.header("Upload Codebase")
         
+        providers = list(EMBEDDING_PROVIDER_LABELS)
+        provider = st.radio("Embedding model", providers, format_func=EMBEDDING_PROVIDER_LABELS.get, horizontal=True,
+                            index=providers.index(EMBEDDING_PROVIDER) if EMBEDDING_PROVIDER in providers else 0,
+                            help="Recorded per codebase. Re-indexing with a different model re-embeds every file.")
+        spec = get_embedding_spec(provider)
+        
         col1, col2 = st.columns(2)
         
         with col1:
@@ -422,22 +790,18 @@ def main():
             
             if uploaded_file:
                 if st.button("Index from ZIP", type="primary"):
-                    with tempfile.TemporaryDirectory() as temp_dir:
-                        temp_path = Path(temp_dir)
-                        extract_path = temp_path / "extracted"
-                        extract_path.mkdir()
-                        
-                        # Extract
-                        if extract_zip(uploaded_file, extract_path):
-                            # Find the root directory (in case zip contains a single root folder)
-                            dirs = list(extract_path.iterdir())
-                            if len(dirs) == 1 and dirs[0].is_dir():
-                                source_path = dirs[0]
-                            else:
-                                source_path = extract_path
-                            
-                            # Index
-                            index_codebase(source_path)
+                    # Persist the upload; the session's file buffer is gone once the job runs
+                    upload_dir = Path(JOB_UPLOAD_DIR)
+                    upload_dir.mkdir(parents=True, exist_ok=True)
+                    zip_path = upload_dir / f"{uuid.uuid4().hex}.zip"
+                    content = uploaded_file.getvalue()
+                    zip_path.write_bytes(content)
+                    
+                    # Named by the archive's root folder, so an edited re-upload re-indexes incrementally
+                    collection_name = zip_collection_name(zip_codebase_name(zip_path, uploaded_file.name))
+                    job_id = enqueue_index_job('zip', uploaded_file.name, partial(fetch_zip, zip_path),
+                                               collection_name, uploaded_file.name, spec)
+                    st.success(f"Queued indexing job #{job_id}. Progress is shown in the sidebar.")
         
         with col2:
             st.subheader("Option 2: GitHub URL")
@@ -446,14 +810,10 @@ def main():
             
             if github_url:
                 if st.button("Index from GitHub", type="primary"):
-                    with tempfile.TemporaryDirectory() as temp_dir:
-                        temp_path = Path(temp_dir)
-                        clone_path = temp_path / "repo"
-                        
-                        # Clone
-                        if clone_github_repo(github_url, clone_path):
-                            # Index
-                            index_codebase(clone_path)
+                    job_id = enqueue_index_job('github', github_url, partial(fetch_github, github_url),
+                                               github_collection_name(github_url), github_url, spec,
+                                               resolve_revision=partial(resolve_remote_head, github_url))
+                    st.success(f"Queued indexing job #{job_id}. Progress is shown in the sidebar.")
     
     with tab2:
         st.header("Ask Questions")
@@ -468,14 +828,8 @@ def main():
                 
                 with st.chat_message("assistant"):
                     st.write(qa['answer'])
-                    
-                    if qa['sources']:
-                        with st.expander(f"📁 View {len(qa['sources'])} source(s)"):
-                            for idx, source in enumerate(qa['sources']):
-                                st.markdown(f"**File:** `{source['file_path']}`")
-                                st.code(source['content'], language='python')
-                                if idx < len(qa['sources']) - 1:
-                                    st.markdown("---")
+                    render_answer_metrics(qa.get('metrics', {}))
+                    render_sources(qa['sources'])
             
             # Chat input
             question = st.chat_input("Ask a question about your codebase...")
@@ -485,26 +839,61 @@ def main():
                 with st.chat_message("user"):
                     st.write(question)
                 
-                # Get answer
-                with st.chat_message("assistant"):
-                    with st.spinner("Thinking..."):
-                        answer, sources = answer_question(question)
+                # Get answer, streaming tokens as they arrive
+                with st.chat_message("assistant"), \
+                        tracer.span('qa.answer', collection=st.session_state.collection_name) as answer_span:
+                    metrics = {}
+                    answer_placeholder = st.empty()
+                    
+                    started = time.perf_counter()
+                    cached, question_embedding = None, None
                     
-                    st.write(answer)
+                    try:
+                        with st.spinner("Searching code..."):
+                            symbol_answer = lookup_symbol_answer(question)
+                            if not symbol_answer:
+                                cached, question_embedding = lookup_cached_answer(question)
+                            
+                            if symbol_answer:
+                                full_prompt = None
+                                answer, sources = symbol_answer
+                                metrics['symbol_lookup'] = True
+                                answer_span['path'] = 'symbol'
+                                metrics['total_ms'] = (time.perf_counter() - started) * 1000
+                            elif cached:
+                                full_prompt, sources = None, cached['sources']
+                                answer = cached['answer']
+                                metrics['cache'] = cached['match']
+                                answer_span['path'] = 'cache'
+                                metrics['total_ms'] = (time.perf_counter() - started) * 1000
+                            else:
+                                answer_span['path'] = 'rag'
+                                full_prompt, sources = build_prompt(question, question_embedding, metrics)
+                                answer = None if full_prompt else NO_RESULTS_ANSWER
+                    except Exception as e:
+                        full_prompt, sources = None, []
+                        answer = f"Error generating answer: {str(e)}"
                     
-                    if sources:
-                        with st.expander(f"📁 View {len(sources)} source(s)"):
-                            for idx, source in enumerate(sources):
-                                st.markdown(f"**File:** `{source['file_path']}`")
-                                st.code(source['content'], language='python')
-                                if idx < len(sources) - 1:
-                                    st.markdown("---")
+                    # Sources are known before generation starts
+                    render_sources(sources)
+                    
+                    if full_prompt:
+                        with answer_placeholder.container():
+                            answer = st.write_stream(stream_answer(full_prompt, metrics))
+                            render_answer_metrics(metrics)
+                        if 'error' not in metrics:
+                            store_cached_answer(question, answer, sources, question_embedding)
+                    else:
+                        with answer_placeholder.container():
+                            st.write(answer)
+                            render_answer_metrics(metrics)
                 
                 # Save to history
                 st.session_state.qa_history.append({
                     'question': question,
                     'answer': answer,
-                    'sources': sources
+                    'sources': sources,
+                    'metrics': metrics
                 })
                 
                 # Keep only last 10
@@ -512,6 +901,11 @@ def main():
                     st.session_state.qa_history = st.session_state.qa_history[-10:]
                 
                 st.rerun()
+    
+    # Poll running jobs by rerunning once the page has rendered
+    if auto_refresh:
+        time.sleep(JOB_POLL_INTERVAL_SECONDS)
+        st.rerun()
 
 
 if __name__ == "__main__":
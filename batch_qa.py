@@ -0,0 +1,260 @@
+"""
+Batch Q&A
+Command-line and HTTP front ends that stream JSONL answers for batches of questions
+
+Usage:
+  python batch_qa.py ask questions.txt [--collection NAME] [--output answers.jsonl]
+  python batch_qa.py serve [--host 127.0.0.1] [--port 8502]
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+import chromadb
+from dotenv import load_dotenv
+
+from budgets import env_budget
+from clients import get_llm, get_provider_embeddings
+from collections_registry import CollectionRegistry
+from embedding_providers import collection_spec
+from llm_dispatcher import LLMDispatcher
+from qa_engine import Answer, QAEngine, QAEngineError
+from tracing import percentile
+
+load_dotenv()
+
+# Same storage and models as app.py; overridable for other deployments
+CHROMA_PERSIST_DIRECTORY = os.getenv('CHROMA_PERSIST_DIRECTORY', "./chroma_db")
+COLLECTION_REGISTRY_PATH = os.path.join(CHROMA_PERSIST_DIRECTORY, "collections.json")
+LLM_MODEL = os.getenv('LLM_MODEL', "llama-3.3-70b-versatile")
+BATCH_RETRIEVAL_WORKERS = int(os.getenv('BATCH_RETRIEVAL_WORKERS', 8))
+BATCH_LLM_WORKERS = int(os.getenv('BATCH_LLM_WORKERS', 4))
+LLM_MAX_CONCURRENCY = int(os.getenv('LLM_MAX_CONCURRENCY', 4))  # Across all requests to the server
+LLM_TOKENS_PER_MINUTE = env_budget('LLM_TOKENS_PER_MINUTE', 12000)  # 0 or 'none' for no token budget
+VECTOR_STORE_BACKEND = os.getenv('VECTOR_STORE_BACKEND', 'chroma')  # 'compact' searches mmap snapshots
+MAX_BATCH_QUESTIONS = 1000
+
+
+class EngineProvider:
+    """Opens one engine per collection and index version, shared by all requests"""
+
+    def __init__(self, persist_directory: str = CHROMA_PERSIST_DIRECTORY,
+                 dispatcher: Optional[LLMDispatcher] = None):
+        self.persist_directory = persist_directory
+        self.dispatcher = dispatcher
+        self.registry = CollectionRegistry(COLLECTION_REGISTRY_PATH,
+                                           manifest_dir=os.path.join(persist_directory, "manifests"))
+        self._client = chromadb.PersistentClient(path=persist_directory)
+        self._engines: Dict[Tuple[str, str], QAEngine] = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, collection_name: Optional[str]) -> Dict:
+        """Registry entry for a collection, or for the most recently indexed one"""
+        # Collections indexed by the app since startup are only in the file
+        self.registry.refresh()
+        if collection_name:
+            entry = self.registry.get(collection_name)
+            if entry is None:
+                raise QAEngineError(f"Unknown collection: {collection_name}")
+            return dict(entry, name=collection_name)
+        entries = self.registry.list()
+        if not entries:
+            raise QAEngineError("No indexed collections; index a codebase in the app first")
+        return entries[0]
+
+    def engine(self, collection_name: Optional[str] = None) -> Tuple[str, QAEngine]:
+        """Engine for a collection, reopened when it has been re-indexed"""
+        entry = self.resolve(collection_name)
+        key = (entry['name'], entry.get('index_version') or "")
+        with self._lock:
+            engine = self._engines.get(key)
+            if engine is None:
+                # Drop engines for older versions of the same collection
+                for stale in [k for k in self._engines if k[0] == key[0]]:
+                    del self._engines[stale]
+                # Questions are embedded with whichever model indexed the collection
+                try:
+                    spec = collection_spec(self._client.get_collection(entry['name']))
+                except ValueError:
+                    raise QAEngineError(f"Collection {entry['name']} is missing from {self.persist_directory}")
+                engine = QAEngine.open(entry['name'], get_provider_embeddings(spec), self.persist_directory,
+                                       llm=get_llm(LLM_MODEL, temperature=0.3), client=self._client,
+                                       embedding_spec=spec, compact=VECTOR_STORE_BACKEND == 'compact',
+                                       index_version=entry.get('index_version'), dispatcher=self.dispatcher)
+                self._engines[key] = engine
+        return entry['name'], engine
+
+
+def answer_to_json(answer: Answer, collection_name: str) -> str:
+    """One JSONL line"""
+    return json.dumps(dict(answer._asdict(), collection=collection_name), ensure_ascii=False)
+
+
+def read_questions(path: str) -> List[str]:
+    """Questions from a text file (one per line, # comments) or JSONL with a "question" field; '-' is stdin"""
+    stream = sys.stdin if path == '-' else open(path, 'r', encoding='utf-8')
+    try:
+        questions = []
+        for line in stream:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            if line.startswith('{'):
+                line = json.loads(line)['question']
+            questions.append(line)
+        return questions
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+def summarize(answers: List[Answer], seconds: float) -> str:
+    """One-line batch summary with latency percentiles"""
+    totals = [answer.timings['total_ms'] for answer in answers if not answer.error]
+    errors = sum(1 for answer in answers if answer.error)
+    line = f"Answered {len(answers)} questions in {seconds:.1f}s ({errors} errors)"
+    if totals:
+        line += f", p50 {percentile(totals, 0.5):.0f} ms, p95 {percentile(totals, 0.95):.0f} ms"
+    return line
+
+
+def run_batch(args: argparse.Namespace) -> int:
+    """ask subcommand: answer a question file and write JSONL as answers complete"""
+    questions = read_questions(args.questions)
+    provider = EngineProvider()
+    try:
+        collection_name, engine = provider.engine(args.collection)
+    except QAEngineError as e:
+        print(f"Error: {str(e)}", file=sys.stderr)
+        return 1
+
+    output = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    started = time.perf_counter()
+    answers = []
+    try:
+        for answer in engine.answer_batch(questions, retrieval_workers=args.retrieval_workers,
+                                          llm_workers=args.llm_workers):
+            answers.append(answer)
+            output.write(answer_to_json(answer, collection_name) + "\n")
+            output.flush()
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    print(summarize(answers, time.perf_counter() - started), file=sys.stderr)
+    return 1 if any(answer.error for answer in answers) else 0
+
+
+class BatchRequestHandler(BaseHTTPRequestHandler):
+    """POST /v1/answers streams JSONL answers; GET /v1/collections lists what can be queried"""
+
+    protocol_version = 'HTTP/1.1'
+    provider: Optional[EngineProvider] = None
+
+    def _send_json(self, status: int, body: Dict) -> None:
+        """Plain JSON response"""
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _write_chunk(self, text: str) -> None:
+        """One chunk of a chunked transfer-encoded body"""
+        data = text.encode('utf-8')
+        self.wfile.write(f"{len(data):x}\r\n".encode('ascii') + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_GET(self) -> None:
+        """Health and collection listing"""
+        if self.path == '/health':
+            self._send_json(200, {'ok': True})
+        elif self.path == '/v1/collections':
+            self.provider.registry.refresh()
+            self._send_json(200, {'collections': self.provider.registry.list()})
+        else:
+            self._send_json(404, {'error': f"Not found: {self.path}"})
+
+    def do_POST(self) -> None:
+        """Body: {"questions": [...], "collection": optional name}"""
+        if self.path != '/v1/answers':
+            self._send_json(404, {'error': f"Not found: {self.path}"})
+            return
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+            questions = body.get('questions')
+            if not isinstance(questions, list) or not all(isinstance(q, str) and q.strip() for q in questions):
+                raise ValueError("questions must be a list of non-empty strings")
+            if len(questions) > MAX_BATCH_QUESTIONS:
+                raise ValueError(f"At most {MAX_BATCH_QUESTIONS} questions per request")
+        except (ValueError, AttributeError) as e:
+            self._send_json(400, {'error': str(e)})
+            return
+
+        try:
+            collection_name, engine = self.provider.engine(body.get('collection'))
+        except QAEngineError as e:
+            self._send_json(404, {'error': str(e)})
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        try:
+            # Requests from one client share a queue, so each client gets its turn at the LLM
+            for answer in engine.answer_batch(questions, retrieval_workers=BATCH_RETRIEVAL_WORKERS,
+                                              llm_workers=BATCH_LLM_WORKERS, session=self.client_address[0]):
+                self._write_chunk(answer_to_json(answer, collection_name) + "\n")
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # Client went away; remaining answers are abandoned
+            self.close_connection = True
+
+
+def serve(args: argparse.Namespace) -> int:
+    """serve subcommand: run the HTTP endpoint until interrupted"""
+    dispatcher = LLMDispatcher(max_concurrency=LLM_MAX_CONCURRENCY, tokens_per_minute=LLM_TOKENS_PER_MINUTE)
+    BatchRequestHandler.provider = EngineProvider(dispatcher=dispatcher)
+    server = ThreadingHTTPServer((args.host, args.port), BatchRequestHandler)
+    print(f"Serving batch Q&A on http://{args.host}:{args.port}/v1/answers", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Parse arguments and dispatch"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    ask = commands.add_parser('ask', help="Answer a file of questions")
+    ask.add_argument('questions', help="Text file (one question per line), JSONL, or - for stdin")
+    ask.add_argument('--collection', help="Collection name (default: most recently indexed)")
+    ask.add_argument('--output', help="JSONL output file (default: stdout)")
+    ask.add_argument('--retrieval-workers', type=int, default=BATCH_RETRIEVAL_WORKERS)
+    ask.add_argument('--llm-workers', type=int, default=BATCH_LLM_WORKERS)
+    ask.set_defaults(handler=run_batch)
+
+    server = commands.add_parser('serve', help="Run the HTTP endpoint")
+    server.add_argument('--host', default='127.0.0.1')
+    server.add_argument('--port', type=int, default=8502)
+    server.set_defaults(handler=serve)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
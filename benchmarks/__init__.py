@@ -0,0 +1,4 @@
+"""
+Benchmarks
+Offline performance checks; run from the repository root with python -m benchmarks.<name>
+"""
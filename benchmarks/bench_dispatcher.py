@@ -0,0 +1,174 @@
+"""
+Dispatcher Benchmark
+Many sessions asking overlapping questions at once: direct LLM calls against the shared LLM dispatcher
+
+Usage: python -m benchmarks.bench_dispatcher [--sessions 16] [--questions 4] [--shared 0.5]
+       [--provider-limit 4] [--max-concurrency 4] [--json]
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from typing import Callable, Dict, List
+
+from benchmarks.fakes import FakeChatModel, FaultInjector
+from embedding_pipeline import is_rate_limit_error
+from llm_dispatcher import LLMDispatcher
+from tracing import percentile
+
+
+def make_workload(args: argparse.Namespace) -> List[List[str]]:
+    """Prompts per session; a shared fraction comes from a few popular questions, as after a repo is shared"""
+    rng = random.Random(args.seed)
+    workload = []
+    for session in range(args.sessions):
+        prompts = []
+        for idx in range(args.questions):
+            if rng.random() < args.shared:
+                prompts.append(f"Popular question {rng.randrange(args.popular_questions)} about the shared repo")
+            else:
+                prompts.append(f"Session {session} question {idx} about the shared repo")
+        workload.append(prompts)
+    return workload
+
+
+def call_directly(llm: FakeChatModel, args: argparse.Namespace) -> Callable[[str, str], None]:
+    """Each session streams on its own, retrying 429s with backoff as QAEngine.generate does"""
+    def call(prompt: str, session: str) -> None:
+        attempt = 0
+        while True:
+            try:
+                for _ in llm.stream(prompt):
+                    pass
+                return
+            except Exception as e:
+                attempt += 1
+                if attempt > args.max_retries or not is_rate_limit_error(e):
+                    raise
+                time.sleep(args.retry_delay * (2 ** (attempt - 1)))
+    return call
+
+
+def call_dispatched(llm: FakeChatModel, dispatcher: LLMDispatcher) -> Callable[[str, str], None]:
+    """Every session goes through one dispatcher"""
+    def call(prompt: str, session: str) -> None:
+        for _ in dispatcher.stream(llm, prompt, session):
+            pass
+    return call
+
+
+def run_sessions(workload: List[List[str]], call: Callable[[str, str], None], think_ms: float,
+                 seed: int) -> List[Dict]:
+    """Start every session at once; each asks its questions in turn with a short random pause"""
+    results: List[Dict] = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(len(workload))
+
+    def session(number: int, prompts: List[str]) -> None:
+        rng = random.Random(seed + number)
+        barrier.wait()
+        for prompt in prompts:
+            time.sleep(rng.uniform(0, think_ms) / 1000)
+            started = time.perf_counter()
+            try:
+                call(prompt, f"session-{number}")
+                error = None
+            except Exception as e:
+                error = str(e)
+            with lock:
+                results.append({'ms': (time.perf_counter() - started) * 1000, 'error': error})
+
+    threads = [threading.Thread(target=session, args=(number, prompts)) for number, prompts in enumerate(workload)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def summarize(results: List[Dict], llm: FakeChatModel, seconds: float) -> Dict:
+    """Latency percentiles over successful calls, plus provider-side counts"""
+    latencies = [result['ms'] for result in results if not result['error']]
+    summary = {
+        'requests': len(results),
+        'errors': len(results) - len(latencies),
+        'seconds': seconds,
+        'llm_calls': llm.faults.calls,
+        'provider_429s': llm.over_limit,
+        'peak_provider_concurrency': llm.peak_active
+    }
+    for fraction in (0.5, 0.95, 0.99):
+        summary[f"p{int(fraction * 100)}_ms"] = percentile(latencies, fraction) if latencies else 0.0
+    summary['max_ms'] = max(latencies) if latencies else 0.0
+    return summary
+
+
+def run(args: argparse.Namespace) -> Dict:
+    """The same workload, first with direct calls, then through a dispatcher"""
+    workload = make_workload(args)
+
+    def make_llm() -> FakeChatModel:
+        return FakeChatModel(FaultInjector(), first_token_ms=args.first_token_ms, token_ms=args.token_ms,
+                             answer_tokens=args.answer_tokens, concurrency_limit=args.provider_limit)
+
+    report = {'sessions': args.sessions, 'questions': args.sessions * args.questions, 'modes': {}}
+
+    llm = make_llm()
+    started = time.perf_counter()
+    results = run_sessions(workload, call_directly(llm, args), args.think_ms, args.seed)
+    report['modes']['direct'] = summarize(results, llm, time.perf_counter() - started)
+
+    llm = make_llm()
+    dispatcher = LLMDispatcher(max_concurrency=args.max_concurrency, tokens_per_minute=args.tokens_per_minute,
+                               max_retries=args.max_retries, retry_delay=args.retry_delay)
+    started = time.perf_counter()
+    results = run_sessions(workload, call_dispatched(llm, dispatcher), args.think_ms, args.seed)
+    summary = summarize(results, llm, time.perf_counter() - started)
+    stats = dispatcher.stats()
+    summary.update(coalesced=stats['coalesced'], wait_p50_ms=stats['wait_p50_ms'],
+                   wait_p95_ms=stats['wait_p95_ms'])
+    report['modes']['dispatcher'] = summary
+    return report
+
+
+def main():
+    """Run the benchmark and print a table (or JSON)"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument('--sessions', type=int, default=16)
+    parser.add_argument('--questions', type=int, default=4, help="Questions per session")
+    parser.add_argument('--shared', type=float, default=0.5, help="Fraction of questions drawn from popular ones")
+    parser.add_argument('--popular-questions', type=int, default=3)
+    parser.add_argument('--think-ms', type=float, default=200.0, help="Maximum pause before each question")
+    parser.add_argument('--provider-limit', type=int, default=4, help="Concurrent calls before the fake LLM 429s")
+    parser.add_argument('--max-concurrency', type=int, default=4, help="Dispatcher concurrency")
+    parser.add_argument('--tokens-per-minute', type=float, default=None, help="Dispatcher token budget")
+    parser.add_argument('--first-token-ms', type=float, default=300.0)
+    parser.add_argument('--token-ms', type=float, default=5.0)
+    parser.add_argument('--answer-tokens', type=int, default=64)
+    parser.add_argument('--max-retries', type=int, default=3)
+    parser.add_argument('--retry-delay', type=float, default=0.5, help="Seconds before the first retry")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', action='store_true', help="Print the results as JSON")
+    args = parser.parse_args()
+
+    report = run(args)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{report['sessions']} sessions, {report['questions']} questions")
+    print(f"{'mode':<11} {'calls':>6} {'429s':>5} {'errors':>6} {'peak':>5} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'p99 ms':>8} {'max ms':>8} {'wall s':>7}")
+    for name, stats in report['modes'].items():
+        print(f"{name:<11} {stats['llm_calls']:6d} {stats['provider_429s']:5d} {stats['errors']:6d} "
+              f"{stats['peak_provider_concurrency']:5d} {stats['p50_ms']:8.0f} {stats['p95_ms']:8.0f} "
+              f"{stats['p99_ms']:8.0f} {stats['max_ms']:8.0f} {stats['seconds']:7.2f}")
+    dispatched = report['modes']['dispatcher']
+    print(f"Dispatcher: {dispatched['coalesced']} requests joined an in-flight completion; "
+          f"queue wait p50 {dispatched['wait_p50_ms']:.0f} ms, p95 {dispatched['wait_p95_ms']:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
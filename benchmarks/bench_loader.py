@@ -0,0 +1,80 @@
+"""
+Loader Benchmark
+Compares serial vs parallel file reading and chunking on a synthetic tree
+
+Usage: python -m benchmarks.bench_loader [--files 3000] [--workers 8]
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from loader import iter_loaded_files
+
+
+def generate_tree(root: Path, file_count: int, seed: int = 0) -> List[Path]:
+    """Write file_count synthetic Python modules spread over nested packages"""
+    rng = random.Random(seed)
+    files = []
+    for idx in range(file_count):
+        package = root / f"pkg_{idx % 50}" / f"sub_{idx % 7}"
+        package.mkdir(parents=True, exist_ok=True)
+        lines = []
+        for func_idx in range(rng.randint(5, 40)):
+            lines.append(f"def function_{idx}_{func_idx}(value):")
+            lines.append(f"    \"\"\"Synthetic function {func_idx} in module {idx}\"\"\"")
+            for stmt_idx in range(rng.randint(2, 12)):
+                lines.append(f"    value = value * {stmt_idx + 1} + {rng.randint(0, 1000)}")
+            lines.append("    return value\n")
+        file_path = package / f"module_{idx}.py"
+        file_path.write_text("\n".join(lines), encoding='utf-8')
+        files.append(file_path)
+    return files
+
+
+def run(files: List[Path], base_path: Path, workers: int, use_processes: bool) -> Dict[str, float]:
+    """Consume the loader fully and measure throughput"""
+    started = time.perf_counter()
+    chunks = 0
+    for loaded in iter_loaded_files(files, base_path, max_workers=workers, use_processes=use_processes):
+        chunks += len(loaded.documents)
+    elapsed = time.perf_counter() - started
+    return {
+        'seconds': elapsed,
+        'chunks': chunks,
+        'files_per_sec': len(files) / elapsed,
+        'chunks_per_sec': chunks / elapsed
+    }
+
+
+def main():
+    """Run serial, threaded and multi-process loaders over the same tree"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument('--files', type=int, default=3000)
+    parser.add_argument('--workers', type=int, default=min(8, os.cpu_count() or 1))
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = Path(temp_dir)
+        files = generate_tree(root, args.files)
+        print(f"Generated {len(files)} files ({sum(f.stat().st_size for f in files) / (1024 * 1024):.1f}MB)")
+
+        modes = [
+            ('serial', 1, False),
+            (f'threads x{args.workers}', args.workers, False),
+            (f'processes x{args.workers}', args.workers, True)
+        ]
+        baseline = None
+        for label, workers, use_processes in modes:
+            result = run(files, root, workers, use_processes)
+            baseline = baseline or result['seconds']
+            print(f"{label:<16} {result['seconds']:7.2f}s  {result['files_per_sec']:8.0f} files/s  "
+                  f"{result['chunks_per_sec']:9.0f} chunks/s  {baseline / result['seconds']:5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
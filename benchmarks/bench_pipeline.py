@@ -0,0 +1,214 @@
+"""
+Pipeline Benchmark
+Indexes a synthetic repo and answers questions end to end against fake embedding and LLM providers
+
+Usage: python -m benchmarks.bench_pipeline [--files 500] [--questions 50] [--embed-latency-ms 20]
+       [--llm-first-token-ms 200] [--llm-token-ms 5] [--rate-limit-rate 0.02] [--startup-runs 1] [--json]
+"""
+
+import argparse
+import json
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from benchmarks import bench_startup
+from benchmarks.bench_loader import generate_tree
+from benchmarks.fakes import FakeChatModel, FakeEmbeddings, FaultInjector
+from indexer import IndexSettings, run_index
+from memory import PeakRssMonitor
+from qa_engine import QAEngine
+from tracing import percentile, tracer
+
+COLLECTION_NAME = "bench-pipeline"
+
+# Mirrors the retrieval settings in app.py
+RETRIEVAL_TOP_K = 8
+RETRIEVAL_CANDIDATES = 20
+CONTEXT_TOKEN_BUDGET = 2500
+
+
+def make_questions(file_count: int, count: int, seed: int = 0) -> List[str]:
+    """Questions about functions generate_tree is guaranteed to write; every fourth is a pure lookup"""
+    rng = random.Random(seed)
+    questions = []
+    for idx in range(count):
+        name = f"function_{rng.randrange(file_count)}_{rng.randrange(5)}"
+        if idx % 4 == 3:
+            questions.append(f"Where is {name} defined?")
+        else:
+            questions.append(f"What does {name} compute from its value argument?")
+    return questions
+
+
+def answer(question: str, engine: QAEngine, embeddings: FakeEmbeddings, llm: FakeChatModel) -> Dict:
+    """One question through the same stages as the app: symbol lookup, else retrieve, pack and stream"""
+    result = {'path': 'rag', 'ttft_ms': None, 'error': None}
+    started = time.perf_counter()
+    with tracer.span('qa.answer') as span:
+        try:
+            if engine.lookup(question):
+                result['path'] = 'symbol'
+            else:
+                with tracer.span('qa.embed_query'):
+                    question_embedding = embeddings.embed_query(question)
+                docs = engine.retrieve(question, question_embedding)
+                prompt, _, _ = engine.build_prompt(question, docs)
+
+                generation_started = time.perf_counter()
+                for chunk in llm.stream(prompt):
+                    if chunk.content and result['ttft_ms'] is None:
+                        result['ttft_ms'] = (time.perf_counter() - generation_started) * 1000
+                        tracer.record('qa.llm_first_token', result['ttft_ms'] / 1000)
+                tracer.record('qa.llm_completion', time.perf_counter() - generation_started)
+        except Exception as e:
+            result['error'] = str(e)
+        span['path'] = result['path']
+    result['total_ms'] = (time.perf_counter() - started) * 1000
+    return result
+
+
+def latency_summary(values: List[float]) -> Dict[str, float]:
+    """p50/p95/p99 of a list of milliseconds"""
+    if not values:
+        return {}
+    return {f"p{int(fraction * 100)}_ms": percentile(values, fraction) for fraction in (0.5, 0.95, 0.99)}
+
+
+def run(args: argparse.Namespace) -> Dict:
+    """Generate, index cold, re-index warm, then answer questions one by one and as a batch"""
+    embed_faults = FaultInjector(args.embed_latency_ms, args.jitter_ms, args.rate_limit_rate, seed=args.seed)
+    llm_faults = FaultInjector(0.0, args.jitter_ms, args.rate_limit_rate, seed=args.seed + 1)
+    embeddings = FakeEmbeddings(dimensions=args.dimensions, faults=embed_faults)
+    llm = FakeChatModel(llm_faults, first_token_ms=args.llm_first_token_ms, token_ms=args.llm_token_ms,
+                        answer_tokens=args.answer_tokens)
+    tracer.reset()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        source = Path(temp_dir) / "repo"
+        files = generate_tree(source, args.files, seed=args.seed)
+        settings = IndexSettings(
+            extensions=frozenset({'.py'}),
+            ignore_dirs=frozenset(),
+            persist_directory=str(Path(temp_dir) / "chroma_db"),
+            max_codebase_size_mb=None,
+            max_files=None,
+            max_file_size_mb=None,
+            embedding_batch_size=args.batch_size,
+            embedding_max_concurrency=args.embed_concurrency,
+            loader_max_workers=args.workers
+        )
+
+        cold = run_index(source, COLLECTION_NAME, embeddings, settings)
+        warm_started = time.perf_counter()
+        run_index(source, COLLECTION_NAME, embeddings, settings)
+        warm_seconds = time.perf_counter() - warm_started
+
+        engine = QAEngine.open(COLLECTION_NAME, embeddings, settings.persist_directory, llm=llm,
+                               top_k=RETRIEVAL_TOP_K, candidates=RETRIEVAL_CANDIDATES,
+                               token_budget=CONTEXT_TOKEN_BUDGET)
+        questions = make_questions(args.files, args.questions, seed=args.seed)
+
+        results = []
+        with PeakRssMonitor() as rss:
+            for question in questions:
+                results.append(answer(question, engine, embeddings, llm))
+
+        # The same questions again through the batch path (one embedding call, bounded LLM pool)
+        batch_started = time.perf_counter()
+        batch = list(engine.answer_batch(questions, llm_workers=args.llm_workers))
+        batch_seconds = time.perf_counter() - batch_started
+
+    completed = [result for result in results if not result['error']]
+    return {
+        'index': {
+            'files': len(files),
+            'chunks': cold['chunks'],
+            'seconds': cold['seconds'],
+            'files_per_sec': len(files) / cold['seconds'] if cold['seconds'] > 0 else 0.0,
+            'chunks_per_sec': cold['chunks_per_sec'],
+            'peak_rss_mb': cold['peak_rss_mb'],
+            'warm_reindex_seconds': warm_seconds
+        },
+        'questions': {
+            'count': len(results),
+            'errors': len(results) - len(completed),
+            'peak_rss_mb': rss.peak_mb,
+            'total': latency_summary([result['total_ms'] for result in completed]),
+            'rag': latency_summary([result['total_ms'] for result in completed if result['path'] == 'rag']),
+            'symbol': latency_summary([result['total_ms'] for result in completed if result['path'] == 'symbol']),
+            'ttft': latency_summary([result['ttft_ms'] for result in completed if result['ttft_ms'] is not None])
+        },
+        'batch': {
+            'seconds': batch_seconds,
+            'questions_per_sec': len(batch) / batch_seconds if batch_seconds > 0 else 0.0,
+            'errors': sum(1 for result in batch if result.error),
+            'total': latency_summary([result.timings['total_ms'] for result in batch if not result.error])
+        },
+        'rate_limits': {'embeddings': embed_faults.rate_limits, 'llm': llm_faults.rate_limits},
+        'stages': tracer.summary(),
+        'startup': (bench_startup.summarize([bench_startup.render_once(bench_startup.APP_PATH)
+                                             for _ in range(args.startup_runs)], top=10)
+                    if args.startup_runs > 0 else None)
+    }
+
+
+def format_latencies(label: str, summary: Dict[str, float]) -> str:
+    """One report line of percentiles"""
+    if not summary:
+        return f"{label:<22} -"
+    return f"{label:<22} " + "  ".join(f"{key[:-3]} {value:8.1f}ms" for key, value in summary.items())
+
+
+def main():
+    """Run the benchmark and print a report (or JSON for tracking regressions)"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument('--files', type=int, default=500)
+    parser.add_argument('--questions', type=int, default=50)
+    parser.add_argument('--workers', type=int, default=1, help="Loader workers")
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--embed-concurrency', type=int, default=4)
+    parser.add_argument('--dimensions', type=int, default=256)
+    parser.add_argument('--embed-latency-ms', type=float, default=20.0, help="Per embedding call")
+    parser.add_argument('--llm-first-token-ms', type=float, default=200.0)
+    parser.add_argument('--llm-token-ms', type=float, default=5.0)
+    parser.add_argument('--answer-tokens', type=int, default=64)
+    parser.add_argument('--llm-workers', type=int, default=4, help="LLM pool size for the batch run")
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help="Uniform extra latency per call")
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help="Fraction of calls answered with a 429")
+    parser.add_argument('--startup-runs', type=int, default=1,
+                        help="Fresh-process renders of app.py to profile imports; 0 to skip")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', action='store_true', help="Print the results as JSON")
+    args = parser.parse_args()
+
+    report = run(args)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    index = report['index']
+    questions = report['questions']
+    print(f"Indexed {index['files']} files / {index['chunks']} chunks in {index['seconds']:.2f}s: "
+          f"{index['files_per_sec']:.0f} files/s, {index['chunks_per_sec']:.0f} chunks/s, "
+          f"peak RSS {index['peak_rss_mb']:.0f}MB; unchanged re-index {index['warm_reindex_seconds']:.2f}s")
+    print(f"Answered {questions['count']} questions ({questions['errors']} errors), "
+          f"peak RSS {questions['peak_rss_mb']:.0f}MB")
+    for key in ('total', 'rag', 'symbol', 'ttft'):
+        print(format_latencies(f"  {key}", questions[key]))
+    batch = report['batch']
+    print(f"Batch of {questions['count']}: {batch['seconds']:.2f}s, {batch['questions_per_sec']:.1f} questions/s "
+          f"({batch['errors']} errors)")
+    print(format_latencies("  batch total", batch['total']))
+    print(f"429s injected: {report['rate_limits']['embeddings']} embeddings, {report['rate_limits']['llm']} LLM")
+    print("Stages:")
+    for stage, stats in report['stages'].items():
+        print(f"  {stage:<20} n={stats['count']:<6} p50 {stats['p50_ms']:8.2f}ms  p95 {stats['p95_ms']:8.2f}ms")
+    if report['startup']:
+        print("\n".join(bench_startup.format_report(report['startup'])))
+
+
+if __name__ == "__main__":
+    main()
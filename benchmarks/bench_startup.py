@@ -0,0 +1,135 @@
+"""
+Startup Benchmark
+Profiles imports (python -X importtime) and wall time for the first render of the Streamlit app
+
+Usage: python -m benchmarks.bench_startup [--runs 3] [--top 15] [--json]
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, List
+
+from tracing import percentile
+
+APP_PATH = Path(__file__).resolve().parent.parent / "app.py"
+RENDER_MARKER = "--- first render ---"
+
+# Libraries the landing page should not wait for; each is loaded on first use instead
+HEAVY_MODULES = ('chromadb', 'langchain_community', 'langchain_groq', 'langchain_google_genai',
+                 'google.generativeai', 'langchain_core.embeddings', 'langsmith', 'onnxruntime', 'tokenizers')
+
+# Run in a fresh interpreter under -X importtime. Streamlit and the test harness are imported before the
+# marker, so everything after it was imported by app.py itself. Prints one JSON line on stdout.
+RENDER_SCRIPT = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+print({marker!r}, file=sys.stderr, flush=True)
+started = time.perf_counter()
+app = AppTest.from_file({app!r}, default_timeout=120).run()
+render_ms = (time.perf_counter() - started) * 1000
+print(json.dumps({{'render_ms': render_ms, 'errors': [str(error.value) for error in app.exception],
+                  'loaded': [name for name in {heavy!r} if name in sys.modules]}}))
+"""
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)\s*$")
+
+
+def parse_importtime(stderr: str) -> Dict[str, List[Dict]]:
+    """Split -X importtime output into the harness section and the app's own imports"""
+    sections = {'harness': [], 'app': []}
+    section = sections['harness']
+    for line in stderr.splitlines():
+        if line.strip() == RENDER_MARKER:
+            section = sections['app']
+            continue
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            section.append({
+                'module': match.group(4),
+                'self_ms': int(match.group(1)) / 1000,
+                'cumulative_ms': int(match.group(2)) / 1000,
+                'depth': (len(match.group(3)) - 1) // 2
+            })
+    return sections
+
+
+def render_once(app_path: Path) -> Dict:
+    """Render the app once in a fresh process, with dummy keys so it gets past the key check"""
+    env = dict(os.environ, GROQ_API_KEY=os.getenv('GROQ_API_KEY', 'startup-bench'),
+               GOOGLE_API_KEY=os.getenv('GOOGLE_API_KEY', 'startup-bench'), TRACE_LOG_PATH='',
+               PYTHONPATH=os.pathsep.join(filter(None, [str(app_path.parent), os.getenv('PYTHONPATH')])))
+    script = RENDER_SCRIPT.format(marker=RENDER_MARKER, app=str(app_path), heavy=HEAVY_MODULES)
+    # A scratch working directory keeps the app's relative data paths (./chroma_db, caches) out of the repo
+    with tempfile.TemporaryDirectory() as temp_dir:
+        output = subprocess.run([sys.executable, '-X', 'importtime', '-c', script], cwd=temp_dir, env=env,
+                                capture_output=True, text=True, check=True)
+    result = json.loads(output.stdout.strip().splitlines()[-1])
+    result.update(parse_importtime(output.stderr))
+    return result
+
+
+def summarize(runs: List[Dict], top: int) -> Dict:
+    """Median timings across runs, and the slowest top-level imports of the last run"""
+    def total(section: str) -> List[float]:
+        return [sum(entry['self_ms'] for entry in run[section]) for run in runs]
+
+    last = runs[-1]
+    app_imports = sorted((entry for entry in last['app'] if entry['depth'] == 0),
+                         key=lambda entry: entry['cumulative_ms'], reverse=True)
+    return {
+        'runs': len(runs),
+        'render_ms': percentile([run['render_ms'] for run in runs], 0.5),
+        'harness_import_ms': percentile(total('harness'), 0.5),
+        'app_import_ms': percentile(total('app'), 0.5),
+        'modules_imported_by_app': len(last['app']),
+        'top_imports': [{'module': entry['module'], 'cumulative_ms': entry['cumulative_ms']}
+                        for entry in app_imports[:top]],
+        'heavy_loaded': last['loaded'],
+        'errors': last['errors']
+    }
+
+
+def run(args: argparse.Namespace) -> Dict:
+    """Render the app args.runs times, each in a fresh interpreter"""
+    return summarize([render_once(Path(args.app)) for _ in range(args.runs)], args.top)
+
+
+def format_report(report: Dict) -> List[str]:
+    """Report lines, shared with the pipeline benchmark"""
+    lines = [f"First render {report['render_ms']:.0f}ms (median of {report['runs']}); "
+             f"app imports {report['app_import_ms']:.0f}ms over {report['modules_imported_by_app']} modules, "
+             f"on top of {report['harness_import_ms']:.0f}ms for Streamlit"]
+    # Background health probes start during the first render, so their SDKs may show up here too
+    lines.append("  heavy modules loaded: " + (", ".join(report['heavy_loaded']) or "none"))
+    if report['errors']:
+        lines.append("  render errors: " + "; ".join(report['errors']))
+    lines.append("  slowest imports by app.py:")
+    for entry in report['top_imports']:
+        lines.append(f"    {entry['module']:<44} {entry['cumulative_ms']:8.1f}ms")
+    return lines
+
+
+def main():
+    """Run the benchmark and print a report (or JSON)"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--top', type=int, default=15, help="Top-level imports to list")
+    parser.add_argument('--app', default=str(APP_PATH))
+    parser.add_argument('--json', action='store_true', help="Print the results as JSON")
+    args = parser.parse_args()
+
+    report = run(args)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print("\n".join(format_report(report)))
+
+
+if __name__ == "__main__":
+    main()
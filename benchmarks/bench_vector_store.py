@@ -0,0 +1,177 @@
+"""
+Vector Store Benchmark
+Compares recall, query latency, restart time and disk size of Chroma against the compact float16/int8 store
+
+Usage: python -m benchmarks.bench_vector_store [--vectors 20000] [--dimensions 768] [--queries 200] [--k 10] [--json]
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import chromadb
+import numpy as np
+
+from compact_store import COMPACT_DTYPES, CompactVectorStore, export_compact_store
+from memory import PeakRssMonitor
+from tracing import percentile
+
+COLLECTION_NAME = "bench-vectors"
+INSERT_BATCH_SIZE = 1000
+
+# Run in a fresh interpreter (chromadb caches clients per path in-process); prints ms to open and query once
+CHROMA_RESTART = """
+import time, chromadb
+started = time.perf_counter()
+collection = chromadb.PersistentClient(path={path!r}).get_collection({name!r})
+collection.query(query_embeddings=[[1.0] * {dimensions}], n_results={k})
+print((time.perf_counter() - started) * 1000)
+"""
+COMPACT_RESTART = """
+import time
+from compact_store import CompactVectorStore
+started = time.perf_counter()
+store = CompactVectorStore.open({path!r}, embeddings=None)
+store.similarity_search_by_vector([1.0] * {dimensions}, k={k})
+print((time.perf_counter() - started) * 1000)
+"""
+
+
+def make_vectors(count: int, dimensions: int, clusters: int, rng: np.random.Generator) -> np.ndarray:
+    """Unit vectors around cluster centres, closer to real embeddings than uniform noise"""
+    centres = rng.standard_normal((clusters, dimensions)).astype(np.float32)
+    vectors = centres[rng.integers(0, clusters, count)] + 0.6 * rng.standard_normal((count, dimensions))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def make_queries(vectors: np.ndarray, count: int, rng: np.random.Generator) -> np.ndarray:
+    """Perturbed stored vectors, as questions land near but not on chunks"""
+    queries = vectors[rng.integers(0, len(vectors), count)] + 0.3 * rng.standard_normal((count, vectors.shape[1]))
+    return (queries / np.linalg.norm(queries, axis=1, keepdims=True)).astype(np.float32)
+
+
+def exact_top_k(vectors: np.ndarray, queries: np.ndarray, k: int) -> List[set]:
+    """Ground truth: float32 brute force"""
+    scores = queries @ vectors.T
+    return [set(np.argpartition(-row, k)[:k].tolist()) for row in scores]
+
+
+def measure(search, queries: np.ndarray, truth: List[set], k: int) -> Dict[str, float]:
+    """recall@k and per-query latency of a search function returning row numbers"""
+    latencies = []
+    hits = 0
+    for query, expected in zip(queries, truth):
+        started = time.perf_counter()
+        rows = search(query, k)
+        latencies.append((time.perf_counter() - started) * 1000)
+        hits += len(expected & set(rows))
+    return {
+        'recall': hits / (len(truth) * k),
+        'p50_ms': percentile(latencies, 0.5),
+        'p95_ms': percentile(latencies, 0.95)
+    }
+
+
+def restart_ms(script: str) -> float:
+    """Milliseconds a fresh process needs to open a store and answer one query"""
+    output = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True)
+    return float(output.stdout.strip().splitlines()[-1])
+
+
+def directory_mb(path: Path) -> float:
+    """Size of everything under path"""
+    return sum(item.stat().st_size for item in path.rglob('*') if item.is_file()) / (1024 * 1024)
+
+
+def run(args: argparse.Namespace) -> Dict:
+    """Load vectors into Chroma, export compact snapshots, then query all of them
+
+    Restart time is measured in a fresh process: open the store and answer one query.
+    """
+    rng = np.random.default_rng(args.seed)
+    vectors = make_vectors(args.vectors, args.dimensions, args.clusters, rng)
+    queries = make_queries(vectors, args.queries, rng)
+    truth = exact_top_k(vectors, queries, args.k)
+    # Each stored row carries a chunk-sized document, as in a real collection
+    documents = [f"def function_{idx}(value):\n" + "    value = value * 3 + 7\n" * 20 for idx in range(args.vectors)]
+
+    report = {'vectors': args.vectors, 'dimensions': args.dimensions, 'k': args.k, 'stores': {}}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        chroma_dir = Path(temp_dir) / "chroma"
+        client = chromadb.PersistentClient(path=str(chroma_dir))
+        collection = client.create_collection(COLLECTION_NAME)
+        started = time.perf_counter()
+        for start in range(0, args.vectors, INSERT_BATCH_SIZE):
+            end = min(start + INSERT_BATCH_SIZE, args.vectors)
+            collection.add(ids=[str(idx) for idx in range(start, end)], embeddings=vectors[start:end].tolist(),
+                           documents=documents[start:end],
+                           metadatas=[{'source': f"file_{idx}.py", 'chunk_index': 0} for idx in range(start, end)])
+        insert_seconds = time.perf_counter() - started
+
+        def chroma_search(query: np.ndarray, k: int) -> List[int]:
+            """Chroma query, as similarity_search_by_vector issues it"""
+            result = collection.query(query_embeddings=[query.tolist()], n_results=k,
+                                      include=['documents', 'metadatas', 'distances'])
+            return [int(doc_id) for doc_id in result['ids'][0]]
+
+        chroma = measure(chroma_search, queries, truth, args.k)
+        chroma.update(build_seconds=insert_seconds, disk_mb=directory_mb(chroma_dir),
+                      restart_ms=restart_ms(CHROMA_RESTART.format(path=str(chroma_dir), name=COLLECTION_NAME,
+                                                                  dimensions=args.dimensions, k=args.k)))
+        report['stores']['chroma'] = chroma
+
+        for dtype in COMPACT_DTYPES:
+            directory = Path(temp_dir) / f"compact-{dtype}"
+            started = time.perf_counter()
+            export_compact_store(collection, directory, dtype)
+            export_seconds = time.perf_counter() - started
+
+            store = CompactVectorStore.open(directory, embeddings=None)
+
+            def compact_search(query: np.ndarray, k: int) -> List[int]:
+                """Top-k rows plus decoding the returned documents, like similarity_search_by_vector"""
+                rows, _ = store.search(query, k)
+                return [int(store._document(row).metadata['source'][5:-3]) for row in rows]
+
+            with PeakRssMonitor() as rss:
+                stats = measure(compact_search, queries, truth, args.k)
+            stats.update(build_seconds=export_seconds, disk_mb=directory_mb(directory),
+                         restart_ms=restart_ms(COMPACT_RESTART.format(path=str(directory), dimensions=args.dimensions,
+                                                                      k=args.k)),
+                         vector_mb=(directory / "vectors.npy").stat().st_size / (1024 * 1024),
+                         peak_rss_mb=rss.peak_mb)
+            report['stores'][f"compact-{dtype}"] = stats
+    return report
+
+
+def main():
+    """Run the benchmark and print a table (or JSON)"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument('--vectors', type=int, default=20000)
+    parser.add_argument('--dimensions', type=int, default=768)
+    parser.add_argument('--clusters', type=int, default=200)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', action='store_true', help="Print the results as JSON")
+    args = parser.parse_args()
+
+    report = run(args)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{report['vectors']} vectors x {report['dimensions']} dims, recall@{report['k']} against exact float32")
+    print(f"{'store':<16} {'recall':>7} {'p50 ms':>8} {'p95 ms':>8} {'restart ms':>11} {'build s':>8} {'disk MB':>8}")
+    for name, stats in report['stores'].items():
+        print(f"{name:<16} {stats['recall']:7.3f} {stats['p50_ms']:8.2f} {stats['p95_ms']:8.2f} "
+              f"{stats['restart_ms']:11.1f} {stats['build_seconds']:8.2f} {stats['disk_mb']:8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Fake Providers
+Deterministic offline stand-ins for Gemini embeddings and Groq chat, with injectable latency and 429s
+"""
+
+import hashlib
+import math
+import random
+import threading
+import time
+from typing import Dict, Iterator, List, Optional
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.messages import AIMessageChunk
+
+
+class FakeRateLimitError(Exception):
+    """Mimics a provider's HTTP 429; is_rate_limit_error recognizes the message"""
+
+    def __init__(self, provider: str):
+        super().__init__(f"429 Too Many Requests from fake {provider}: rate limit exceeded")
+
+
+class FaultInjector:
+    """Seeded latency and rate-limit decisions shared by the fake providers"""
+
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0, rate_limit_rate: float = 0.0,
+                 seed: int = 0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rate_limit_rate = rate_limit_rate
+        self.calls = 0
+        self.rate_limits = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def call(self, provider: str, extra_ms: float = 0.0) -> None:
+        """Sleep for one call's latency, then maybe raise a 429"""
+        with self._lock:
+            self.calls += 1
+            delay_ms = self.latency_ms + extra_ms + self._rng.uniform(0, self.jitter_ms)
+            limited = self._rng.random() < self.rate_limit_rate
+            if limited:
+                self.rate_limits += 1
+        if delay_ms > 0:
+            time.sleep(delay_ms / 1000)
+        if limited:
+            raise FakeRateLimitError(provider)
+
+
+class FakeEmbeddings(Embeddings):
+    """Hash-seeded unit vectors, so identical texts always embed identically"""
+
+    def __init__(self, dimensions: int = 256, faults: Optional[FaultInjector] = None, per_text_ms: float = 0.0):
+        self.dimensions = dimensions
+        self.faults = faults or FaultInjector()
+        self.per_text_ms = per_text_ms
+
+    def _vector(self, text: str) -> List[float]:
+        """Deterministic pseudo-random unit vector for text"""
+        rng = random.Random(hashlib.sha256(text.encode('utf-8')).digest())
+        vector = [rng.gauss(0, 1) for _ in range(self.dimensions)]
+        norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+        return [value / norm for value in vector]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """One provider call per batch"""
+        self.faults.call('embeddings', extra_ms=self.per_text_ms * len(texts))
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        """One provider call per query"""
+        self.faults.call('embeddings')
+        return self._vector(text)
+
+
+class FakeChatModel:
+    """The slice of ChatGroq the app uses: stream() and invoke() over a prompt string
+
+    With concurrency_limit, a call that would exceed that many in flight
+    gets a 429, like a provider enforcing a per-key limit.
+    """
+
+    def __init__(self, faults: Optional[FaultInjector] = None, first_token_ms: float = 0.0, token_ms: float = 0.0,
+                 answer_tokens: int = 64, concurrency_limit: Optional[int] = None):
+        self.faults = faults or FaultInjector()
+        self.first_token_ms = first_token_ms
+        self.token_ms = token_ms
+        self.answer_tokens = answer_tokens
+        self.concurrency_limit = concurrency_limit
+        self.active = 0
+        self.peak_active = 0
+        self.over_limit = 0
+        self._lock = threading.Lock()
+
+    def _enter(self) -> None:
+        """Count a call in flight, rejecting it past the concurrency limit"""
+        with self._lock:
+            if self.concurrency_limit is not None and self.active >= self.concurrency_limit:
+                self.over_limit += 1
+                raise FakeRateLimitError('llm')
+            self.active += 1
+            self.peak_active = max(self.peak_active, self.active)
+
+    def _exit(self) -> None:
+        """Count a call finished"""
+        with self._lock:
+            self.active -= 1
+
+    def _tokens(self, prompt: str) -> List[str]:
+        """A deterministic answer built from words of the prompt"""
+        words = prompt.split() or ['answer']
+        rng = random.Random(hashlib.sha256(prompt.encode('utf-8')).digest())
+        return [rng.choice(words) + " " for _ in range(self.answer_tokens)]
+
+    def _usage(self, prompt: str) -> Dict[str, int]:
+        """Token usage in the shape langchain reports it"""
+        input_tokens = len(prompt) // 4
+        return {'input_tokens': input_tokens, 'output_tokens': self.answer_tokens,
+                'total_tokens': input_tokens + self.answer_tokens}
+
+    def stream(self, prompt: str) -> Iterator[AIMessageChunk]:
+        """Yield one chunk per token; the final empty chunk carries usage, as Groq's does"""
+        self._enter()
+        try:
+            self.faults.call('llm', extra_ms=self.first_token_ms)
+            for idx, token in enumerate(self._tokens(prompt)):
+                if idx and self.token_ms:
+                    time.sleep(self.token_ms / 1000)
+                yield AIMessageChunk(content=token)
+            yield AIMessageChunk(content="", usage_metadata=self._usage(prompt))
+        finally:
+            self._exit()
+
+    def invoke(self, prompt: str) -> AIMessageChunk:
+        """Whole answer after the full generation time"""
+        self._enter()
+        try:
+            self.faults.call('llm', extra_ms=self.first_token_ms + self.token_ms * max(self.answer_tokens - 1, 0))
+        finally:
+            self._exit()
+        return AIMessageChunk(content="".join(self._tokens(prompt)), usage_metadata=self._usage(prompt))
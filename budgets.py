@@ -0,0 +1,24 @@
+"""
+Budgets
+Limits read from environment variables, where 0 or 'none' means unlimited
+"""
+
+import os
+from typing import Optional
+
+
+def env_budget(name: str, default: Optional[float]) -> Optional[float]:
+    """Read a budget from the environment; 0 or 'none' means unlimited"""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    if value.strip().lower() in ('', '0', 'none', 'unlimited'):
+        return None
+    return float(value)
+
+
+def format_budget(value: Optional[float], unit: str = "") -> str:
+    """Display a budget, which may be unlimited"""
+    if value is None:
+        return "unlimited"
+    return f"{value:g}{unit}"
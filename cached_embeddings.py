@@ -0,0 +1,51 @@
+"""
+Cached Embeddings
+Embeddings wrapper that serves repeated chunks from the persistent embedding cache
+"""
+
+import threading
+from typing import Dict, List
+
+from langchain_core.embeddings import Embeddings
+
+from embedding_cache import EmbeddingCache, embedding_cache_key
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that only calls the underlying model on cache misses"""
+
+    def __init__(self, underlying: Embeddings, model_name: str, cache: EmbeddingCache):
+        self.underlying = underlying
+        self.model_name = model_name
+        self.cache = cache
+        # Per-wrapper counters, so concurrent indexing runs report their own reuse
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts, reusing cached vectors where available"""
+        keys = [embedding_cache_key(self.model_name, text) for text in texts]
+        cached = self.cache.get_many(keys)
+
+        # Embed each missing text once, even if it appears several times
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+
+        with self._lock:
+            self.hits += sum(1 for key in keys if key in cached)
+            self.misses += sum(1 for key in keys if key not in cached)
+
+        if missing:
+            vectors = self.underlying.embed_documents(list(missing.values()))
+            fresh = dict(zip(missing.keys(), vectors))
+            self.cache.put_many(fresh)
+            cached.update(fresh)
+
+        return [cached[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        """Queries are not cached; they are rarely repeated verbatim"""
+        return self.underlying.embed_query(text)
@@ -0,0 +1,226 @@
+"""
+Syntax-Aware Chunker
+Splits source files on definition boundaries and records each chunk's line range
+"""
+
+import ast
+import re
+from typing import List, NamedTuple, Optional
+
+CHUNKER_VERSION = 1
+MAX_CHUNK_CHARS = 1500
+MIN_CHUNK_CHARS = 300
+
+BRACE_EXTENSIONS = frozenset({'.js', '.jsx', '.ts', '.tsx', '.java', '.cpp', '.c', '.h', '.cs', '.go', '.rs',
+                              '.php', '.json'})
+# Strings and comments are blanked before counting braces
+BRACE_NOISE_PATTERN = re.compile(r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'|`[^`]*`|//.*$|/\*.*?\*/|#.*$')
+
+
+class Chunk(NamedTuple):
+    """A run of whole lines; start_line and end_line are 1-based and inclusive"""
+    text: str
+    start_line: int
+    end_line: int
+
+
+class _Segment(NamedTuple):
+    """Half-open 0-based line range [start, end)"""
+    start: int
+    end: int
+
+
+def _size(lines: List[str], segment: _Segment) -> int:
+    """Characters in a segment, counting newlines"""
+    return sum(len(line) + 1 for line in lines[segment.start:segment.end])
+
+
+def _pack_lines(lines: List[str], segment: _Segment, max_chars: int) -> List[_Segment]:
+    """Split an oversized segment into runs of whole lines, preferring blank-line breaks"""
+    pieces = []
+    start = segment.start
+    size = 0
+    last_blank = None
+    for idx in range(segment.start, segment.end):
+        line_size = len(lines[idx]) + 1
+        while size + line_size > max_chars and idx > start:
+            cut = last_blank + 1 if last_blank is not None and last_blank + 1 > start else idx
+            pieces.append(_Segment(start, cut))
+            start = cut
+            size = _size(lines, _Segment(start, idx))
+            last_blank = None
+        size += line_size
+        if not lines[idx].strip():
+            last_blank = idx
+    if start < segment.end:
+        pieces.append(_Segment(start, segment.end))
+    return pieces
+
+
+def _with_gaps(boundaries: List[_Segment], start: int, end: int) -> List[_Segment]:
+    """Extend segments so they tile [start, end): gaps (comments, blank lines) join the next segment"""
+    tiled = []
+    cursor = start
+    for segment in boundaries:
+        if segment.end <= cursor:
+            continue
+        tiled.append(_Segment(cursor, segment.end))
+        cursor = segment.end
+    if cursor < end:
+        if tiled:
+            tiled[-1] = _Segment(tiled[-1].start, end)
+        else:
+            tiled.append(_Segment(cursor, end))
+    return tiled
+
+
+def _python_segments(lines: List[str], body: List[ast.stmt], start: int, end: int,
+                     max_chars: int) -> List[_Segment]:
+    """One segment per definition; runs of other statements stay together; large classes recurse"""
+    boundaries = []
+    loose_start = loose_end = None
+    for node in body:
+        node_start = min([node.lineno] + [d.lineno for d in getattr(node, 'decorator_list', [])]) - 1
+        node_end = node.end_lineno
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            if loose_start is not None:
+                boundaries.append(_Segment(loose_start, loose_end))
+                loose_start = None
+            segment = _Segment(node_start, node_end)
+            if isinstance(node, ast.ClassDef) and _size(lines, segment) > max_chars and node.body:
+                # Class header stays with its first member; each method becomes its own segment
+                boundaries.extend(_python_segments(lines, node.body, node_start, node_end, max_chars))
+            else:
+                boundaries.append(segment)
+        else:
+            if loose_start is None:
+                loose_start = node_start
+            loose_end = node_end
+    if loose_start is not None:
+        boundaries.append(_Segment(loose_start, loose_end))
+    return _with_gaps(boundaries, start, end)
+
+
+def _brace_segments(lines: List[str], start: int, end: int, level: int, max_chars: int,
+                    max_level: int = 2) -> List[_Segment]:
+    """Boundaries where brace depth returns to level, or at blank lines at that level"""
+    segments = []
+    depth = 0
+    seg_start = start
+    opened = False
+    for idx in range(start, end):
+        line = lines[idx]
+        if not line.strip():
+            if depth == level and not opened and idx > seg_start:
+                segments.append(_Segment(seg_start, idx))
+                seg_start = idx
+            continue
+
+        code = BRACE_NOISE_PATTERN.sub('', line)
+        for char in code:
+            if char in '{([':
+                depth += 1
+                if depth > level:
+                    opened = True
+            elif char in '})]':
+                depth = max(0, depth - 1)
+
+        if opened and depth <= level:
+            segments.append(_Segment(seg_start, idx + 1))
+            seg_start = idx + 1
+            opened = False
+    if seg_start < end:
+        segments.append(_Segment(seg_start, end))
+
+    result = []
+    for segment in segments:
+        # A large class/namespace body is split again one level deeper
+        if _size(lines, segment) > max_chars and level < max_level and segment.end - segment.start > 2:
+            inner = _brace_segments(lines, segment.start, segment.end, level + 1, max_chars, max_level)
+            if len(inner) > 1:
+                result.extend(inner)
+                continue
+        result.append(segment)
+    return result
+
+
+def _indent_segments(lines: List[str], start: int, end: int) -> List[_Segment]:
+    """Boundaries before unindented lines that follow a blank line (or a markdown heading)"""
+    segments = []
+    seg_start = start
+    previous_blank = False
+    for idx in range(start, end):
+        line = lines[idx]
+        starts_block = line[:1] not in ('', ' ', '\t') and (previous_blank or line.startswith('#'))
+        if starts_block and idx > seg_start:
+            segments.append(_Segment(seg_start, idx))
+            seg_start = idx
+        previous_blank = not line.strip()
+    if seg_start < end:
+        segments.append(_Segment(seg_start, end))
+    return segments
+
+
+def _merge_small(lines: List[str], segments: List[_Segment], min_chars: int, max_chars: int) -> List[_Segment]:
+    """Combine neighbours while the running chunk is under min_chars and the result fits"""
+    merged: List[_Segment] = []
+    for segment in segments:
+        if merged:
+            previous = merged[-1]
+            combined = _Segment(previous.start, segment.end)
+            small = _size(lines, previous) < min_chars or _size(lines, segment) < min_chars
+            if small and _size(lines, combined) <= max_chars:
+                merged[-1] = combined
+                continue
+        merged.append(segment)
+    return merged
+
+
+def chunk_code(content: str, file_type: str, max_chars: int = MAX_CHUNK_CHARS,
+               min_chars: int = MIN_CHUNK_CHARS) -> List[Chunk]:
+    """Split a file into chunks on definition boundaries, keyed off its extension"""
+    lines = content.splitlines()
+    if not lines:
+        return []
+
+    segments: Optional[List[_Segment]] = None
+    if file_type == '.py':
+        try:
+            tree = ast.parse(content)
+            segments = _python_segments(lines, tree.body, 0, len(lines), max_chars)
+        except (SyntaxError, ValueError):
+            segments = None
+    elif file_type in BRACE_EXTENSIONS:
+        segments = _brace_segments(lines, 0, len(lines), 0, max_chars)
+
+    if not segments:
+        segments = _indent_segments(lines, 0, len(lines))
+
+    sized = []
+    for segment in segments:
+        if _size(lines, segment) > max_chars:
+            sized.extend(_pack_lines(lines, segment, max_chars))
+        else:
+            sized.append(segment)
+
+    chunks = []
+    for segment in _merge_small(lines, sized, min_chars, max_chars):
+        # Trim blank lines so the line range covers only text
+        first, last = segment.start, segment.end - 1
+        while first <= last and not lines[first].strip():
+            first += 1
+        while last >= first and not lines[last].strip():
+            last -= 1
+        if first > last:
+            continue
+        text = "\n".join(lines[first:last + 1])
+        chunks.extend(_split_long_text(text, first + 1, last + 1, max_chars))
+    return chunks
+
+
+def _split_long_text(text: str, start_line: int, end_line: int, max_chars: int) -> List[Chunk]:
+    """Hard-split a chunk that is still too long (e.g. one minified line)"""
+    if len(text) <= max_chars:
+        return [Chunk(text, start_line, end_line)]
+    return [Chunk(text[offset:offset + max_chars], start_line, end_line)
+            for offset in range(0, len(text), max_chars)]
@@ -0,0 +1,146 @@
+"""
+Client Registry
+Process-wide pooled LLM and embedding clients shared across sessions and reruns
+
+Provider SDKs take seconds to import, so each factory imports its own on
+first use; importing this module stays cheap.
+"""
+
+import os
+import threading
+from typing import TYPE_CHECKING, Callable, Dict, Hashable, Optional
+
+from embedding_providers import PROVIDER_LOCAL, EmbeddingSpec
+
+if TYPE_CHECKING:
+    import httpx
+    from groq import Groq
+    from langchain_core.embeddings import Embeddings
+    from langchain_groq import ChatGroq
+    from langchain_google_genai import GoogleGenerativeAIEmbeddings
+    from local_embeddings import LocalOnnxEmbeddings
+
+HTTP_POOL_MAX_CONNECTIONS = 20
+HTTP_POOL_KEEPALIVE_SECONDS = 120
+
+_lock = threading.Lock()
+_clients: Dict[Hashable, object] = {}
+_http_client = None
+_stats = {
+    'clients_created': 0,
+    'clients_reused': 0,
+    'http_requests': 0,
+    'http_connections_opened': 0
+}
+
+
+def _trace_connections(event_name: str, info: Dict) -> None:
+    """httpcore trace hook: count fresh TCP connections"""
+    if event_name == "connection.connect_tcp.complete":
+        with _lock:
+            _stats['http_connections_opened'] += 1
+
+
+def _on_request(request: "httpx.Request") -> None:
+    """httpx event hook: count requests and attach the connection tracer"""
+    request.extensions['trace'] = _trace_connections
+    with _lock:
+        _stats['http_requests'] += 1
+
+
+def get_http_client() -> "httpx.Client":
+    """Shared keep-alive HTTP connection pool"""
+    global _http_client
+    import httpx
+    with _lock:
+        if _http_client is None:
+            _http_client = httpx.Client(
+                limits=httpx.Limits(
+                    max_connections=HTTP_POOL_MAX_CONNECTIONS,
+                    max_keepalive_connections=HTTP_POOL_MAX_CONNECTIONS,
+                    keepalive_expiry=HTTP_POOL_KEEPALIVE_SECONDS
+                ),
+                timeout=httpx.Timeout(60.0, connect=10.0),
+                event_hooks={'request': [_on_request]}
+            )
+        return _http_client
+
+
+def _get_or_create(key: Hashable, factory: Callable[[], object]) -> object:
+    """Return the registered client for key, creating it on first use"""
+    with _lock:
+        client = _clients.get(key)
+        if client is not None:
+            _stats['clients_reused'] += 1
+            return client
+
+    # Build outside the lock; a concurrent duplicate is simply discarded
+    client = factory()
+    with _lock:
+        if key in _clients:
+            _stats['clients_reused'] += 1
+            return _clients[key]
+        _clients[key] = client
+        _stats['clients_created'] += 1
+        return client
+
+
+def get_llm(model: str, temperature: float = 0.7) -> "ChatGroq":
+    """Pooled ChatGroq client for a model and temperature"""
+    from langchain_groq import ChatGroq
+    api_key = os.getenv('GROQ_API_KEY')
+    return _get_or_create(
+        ('llm', model, temperature, api_key),
+        lambda: ChatGroq(
+            model=model,
+            groq_api_key=api_key,
+            temperature=temperature,
+            http_client=get_http_client()
+        )
+    )
+
+
+def get_groq_client() -> "Groq":
+    """Pooled raw Groq SDK client (used for metadata calls)"""
+    from groq import Groq
+    api_key = os.getenv('GROQ_API_KEY')
+    return _get_or_create(
+        ('groq', api_key),
+        lambda: Groq(api_key=api_key, http_client=get_http_client())
+    )
+
+
+def get_embeddings(model: str) -> "GoogleGenerativeAIEmbeddings":
+    """Pooled Gemini embeddings client; its gRPC channel is reused"""
+    from langchain_google_genai import GoogleGenerativeAIEmbeddings
+    api_key = os.getenv('GOOGLE_API_KEY')
+    return _get_or_create(
+        ('embeddings', model, api_key),
+        lambda: GoogleGenerativeAIEmbeddings(model=model, google_api_key=api_key)
+    )
+
+
+def get_local_embeddings(model: str, batch_size: int = 32, threads: Optional[int] = None) -> "LocalOnnxEmbeddings":
+    """Pooled local ONNX embedder; the model is loaded once per process"""
+    from local_embeddings import LocalOnnxEmbeddings
+    return _get_or_create(
+        ('local_embeddings', model, batch_size, threads),
+        lambda: LocalOnnxEmbeddings(model, batch_size=batch_size, threads=threads)
+    )
+
+
+def get_provider_embeddings(spec: EmbeddingSpec, local_batch_size: int = 32,
+                            local_threads: Optional[int] = None) -> "Embeddings":
+    """Pooled embeddings client for a collection's provider and model"""
+    if spec.provider == PROVIDER_LOCAL:
+        return get_local_embeddings(spec.model, batch_size=local_batch_size, threads=local_threads)
+    return get_embeddings(spec.model)
+
+
+def client_stats() -> Dict[str, int]:
+    """Registry and connection-pool counters"""
+    with _lock:
+        stats = dict(_stats)
+    stats['pooled_clients'] = len(_clients)
+    stats['http_connections_reused'] = max(stats['http_requests'] - stats['http_connections_opened'], 0)
+    return stats
@@ -0,0 +1,134 @@
+"""
+Collection Registry
+Names per-codebase Chroma collections and records what each one holds
+"""
+
+import hashlib
+import json
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from manifest import load_manifest, manifest_version
+
+MAX_COLLECTION_NAME_LENGTH = 63  # Chroma allows 3-63 characters
+
+
+def _slug(text: str, max_length: int) -> str:
+    """Lowercase alphanumerics and dashes, safe for Chroma collection names"""
+    return re.sub(r'[^a-z0-9]+', '-', text.lower()).strip('-')[:max_length].strip('-')
+
+
+def normalize_repo_url(url: str) -> str:
+    """Canonical form of a git URL so trivially different spellings share a collection"""
+    url = url.strip().rstrip('/')
+    if url.endswith('.git'):
+        url = url[:-4]
+    # GitHub paths are case-insensitive; local and file:// paths are not
+    if url.lower().startswith(('http://', 'https://')):
+        url = url.lower()
+    return url
+
+
+def github_collection_name(url: str) -> str:
+    """Collection for a repository, keyed by its normalized URL"""
+    normalized = normalize_repo_url(url)
+    digest = hashlib.sha256(normalized.encode('utf-8')).hexdigest()[:10]
+    tail = "-".join(normalized.split('/')[-2:])
+    return f"gh-{_slug(tail, MAX_COLLECTION_NAME_LENGTH - 14) or 'repo'}-{digest}"
+
+
+def zip_collection_name(codebase_name: str) -> str:
+    """Collection for an uploaded archive, keyed by its codebase name so edited re-uploads update it"""
+    digest = hashlib.sha256(codebase_name.encode('utf-8')).hexdigest()[:10]
+    return f"zip-{_slug(codebase_name, MAX_COLLECTION_NAME_LENGTH - 15) or 'upload'}-{digest}"
+
+
+class CollectionRegistry:
+    """JSON catalog of indexed collections, shared by sessions and job threads"""
+
+    def __init__(self, path: str, manifest_dir: Optional[str] = None):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._entries = self._load()
+        if manifest_dir:
+            self._discover(manifest_dir)
+
+    def _load(self) -> Dict[str, Dict]:
+        """Read the catalog, tolerating a missing or corrupt file"""
+        if not self.path.exists():
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f).get('collections', {})
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable collection registry {self.path}: {str(e)}")
+            return {}
+
+    def refresh(self) -> None:
+        """Re-read the catalog to see collections recorded by other processes"""
+        entries = self._load()
+        with self._lock:
+            self._entries = entries
+
+    def _save(self) -> None:
+        """Atomically write the catalog; caller holds the lock"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.json.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': 1, 'collections': self._entries}, f, indent=1, sort_keys=True)
+        tmp_path.replace(self.path)
+
+    def _discover(self, manifest_dir: str) -> None:
+        """Register collections indexed before the registry existed, using their manifests"""
+        found = False
+        for manifest_file in Path(manifest_dir).glob('*.json'):
+            name = manifest_file.stem
+            if name in self._entries:
+                continue
+            files = load_manifest(name, manifest_dir)
+            if not files:
+                continue
+            self._entries[name] = {
+                'label': name,
+                'kind': 'unknown',
+                'source': name,
+                'index_version': manifest_version(files),
+                'indexed_at': manifest_file.stat().st_mtime,
+                'files': len(files)
+            }
+            found = True
+        if found:
+            with self._lock:
+                self._save()
+
+    def record(self, collection_name: str, label: str, kind: str, source: str, result: Dict,
+               **extra) -> None:
+        """Add or refresh a collection after a successful index"""
+        with self._lock:
+            entry = self._entries.get(collection_name, {})
+            entry.update(
+                label=label,
+                kind=kind,
+                source=source,
+                index_version=result['index_version'],
+                indexed_at=time.time(),
+                files=result.get('total_files', entry.get('files')),
+                **extra
+            )
+            self._entries[collection_name] = entry
+            self._save()
+
+    def get(self, collection_name: str) -> Optional[Dict]:
+        """One catalog entry"""
+        with self._lock:
+            entry = self._entries.get(collection_name)
+            return dict(entry) if entry else None
+
+    def list(self) -> List[Dict]:
+        """All collections, most recently indexed first"""
+        with self._lock:
+            entries = [dict(entry, name=name) for name, entry in self._entries.items()]
+        return sorted(entries, key=lambda entry: entry.get('indexed_at', 0), reverse=True)
@@ -0,0 +1,236 @@
+"""
+Compact Vector Store
+Read-only, memory-mapped snapshot of a collection (float16 or int8 vectors) for in-process top-k search
+"""
+
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+from embedding_providers import EmbeddingModelMismatch, EmbeddingSpec, spec_from_metadata, spec_metadata
+
+if TYPE_CHECKING:
+    from langchain_core.embeddings import Embeddings
+
+COMPACT_FORMAT_VERSION = 1
+COMPACT_DTYPES = ('float16', 'int8')
+EXPORT_PAGE_SIZE = 1000  # Rows read from Chroma per page while exporting
+SEARCH_BLOCK_ROWS = 8192  # Rows scored per matrix-vector product; bounds the float32 working set
+
+
+def compact_store_path(collection_name: str, persist_directory: str) -> Path:
+    """Location of a collection's compact snapshot"""
+    return Path(persist_directory) / "compact" / collection_name
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    """Unit-length rows, so dot products rank like Chroma's L2 distance on normalized embeddings"""
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.clip(norms, 1e-12, None)
+
+
+def _iter_collection(collection, include: List[str]) -> Iterator[Dict]:
+    """Pages of a Chroma collection"""
+    total = collection.count()
+    for offset in range(0, total, EXPORT_PAGE_SIZE):
+        yield collection.get(include=include, limit=EXPORT_PAGE_SIZE, offset=offset)
+
+
+def export_compact_store(collection, directory: Path, dtype: str = 'float16',
+                         header: Optional[Dict] = None) -> Dict:
+    """Write a snapshot of a Chroma collection to directory and return its header
+
+    Vectors are normalized, then stored as float16, or as int8 with one
+    float32 scale per row. Documents, metadata and ids go to a JSON-lines
+    blob with row offsets, so a search decodes only the rows it returns.
+    The snapshot replaces any previous one in a single rename.
+    """
+    if dtype not in COMPACT_DTYPES:
+        raise ValueError(f"Unsupported compact store dtype: {dtype}")
+    count = collection.count()
+    if count == 0:
+        raise ValueError(f"Collection {collection.name} is empty")
+
+    directory = Path(directory)
+    directory.parent.mkdir(parents=True, exist_ok=True)
+    tmp_dir = directory.with_name(f"{directory.name}.tmp-{uuid.uuid4().hex[:8]}")
+    tmp_dir.mkdir()
+    try:
+        vectors = scales = None
+        offsets = np.zeros(count + 1, dtype=np.int64)
+        row = 0
+        with open(tmp_dir / "records.jsonl", 'wb') as records, open(tmp_dir / "ids.json", 'w', encoding='utf-8') as ids:
+            ids.write('[')
+            for page in _iter_collection(collection, ['embeddings', 'documents', 'metadatas']):
+                page_vectors = _normalize(np.asarray(page['embeddings'], dtype=np.float32))
+                if vectors is None:
+                    dimensions = page_vectors.shape[1]
+                    vectors = np.lib.format.open_memmap(tmp_dir / "vectors.npy", mode='w+',
+                                                        dtype=np.dtype(dtype), shape=(count, dimensions))
+                    if dtype == 'int8':
+                        scales = np.lib.format.open_memmap(tmp_dir / "scales.npy", mode='w+',
+                                                           dtype=np.float32, shape=(count,))
+                end = row + len(page_vectors)
+                if dtype == 'int8':
+                    # Symmetric per-row quantization: the largest component maps to 127
+                    page_scales = np.clip(np.abs(page_vectors).max(axis=1), 1e-12, None) / 127.0
+                    vectors[row:end] = np.round(page_vectors / page_scales[:, None]).astype(np.int8)
+                    scales[row:end] = page_scales
+                else:
+                    vectors[row:end] = page_vectors.astype(np.float16)
+
+                for doc_id, text, metadata in zip(page['ids'], page['documents'], page['metadatas']):
+                    line = json.dumps([text, metadata or {}], ensure_ascii=False).encode('utf-8') + b"\n"
+                    records.write(line)
+                    ids.write(('' if row == 0 else ',') + json.dumps(doc_id))
+                    offsets[row + 1] = offsets[row] + len(line)
+                    row += 1
+            ids.write(']')
+
+        if row != count:
+            raise RuntimeError(f"Collection {collection.name} changed while exporting ({row} of {count} rows)")
+        vectors.flush()
+        del vectors
+        if scales is not None:
+            scales.flush()
+            del scales
+        np.save(tmp_dir / "offsets.npy", offsets)
+
+        header = dict(header or {}, format=COMPACT_FORMAT_VERSION, count=count, dimensions=int(dimensions),
+                      dtype=dtype, exported_at=time.time())
+        with open(tmp_dir / "index.json", 'w', encoding='utf-8') as f:
+            json.dump(header, f, indent=1, sort_keys=True)
+
+        # Swap in the new snapshot; readers of the old one keep their mappings
+        old_dir = directory.with_name(f"{directory.name}.old-{uuid.uuid4().hex[:8]}")
+        if directory.exists():
+            os.replace(directory, old_dir)
+        os.replace(tmp_dir, directory)
+        shutil.rmtree(old_dir, ignore_errors=True)
+        return header
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+
+def read_compact_header(directory: Path) -> Optional[Dict]:
+    """A snapshot's header, or None if there is no readable snapshot"""
+    try:
+        with open(Path(directory) / "index.json", 'r', encoding='utf-8') as f:
+            header = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return header if header.get('format') == COMPACT_FORMAT_VERSION else None
+
+
+class CompactVectorStore:
+    """The slice of the Chroma vector store interface retrieval uses, over a memory-mapped snapshot
+
+    Opening maps the files without reading them, so startup cost does not
+    grow with the collection. Search is exact: blocked matrix-vector
+    products over all rows, then argpartition for the top k.
+    """
+
+    def __init__(self, directory: Path, embeddings: "Embeddings", header: Dict):
+        self.directory = Path(directory)
+        self.embeddings = embeddings
+        self.header = header
+        self.vectors = np.load(self.directory / "vectors.npy", mmap_mode='r')
+        self.scales = (np.load(self.directory / "scales.npy", mmap_mode='r')
+                       if header['dtype'] == 'int8' else None)
+        self.offsets = np.load(self.directory / "offsets.npy", mmap_mode='r')
+        self._records = np.memmap(self.directory / "records.jsonl", dtype=np.uint8, mode='r')
+        self._rows_by_id: Optional[Dict[str, int]] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def open(cls, directory: Path, embeddings: "Embeddings", embedding_spec: Optional[EmbeddingSpec] = None,
+             index_version: Optional[str] = None) -> Optional["CompactVectorStore"]:
+        """Map a snapshot; None if it is missing or was exported from another index version
+
+        Raises EmbeddingModelMismatch if the snapshot holds another model's vectors.
+        """
+        header = read_compact_header(directory)
+        if header is None or (index_version and header.get('index_version') != index_version):
+            return None
+        stored = spec_from_metadata(header)
+        if embedding_spec is not None and stored is not None and not stored.matches(embedding_spec):
+            raise EmbeddingModelMismatch(f"Compact store {directory} was embedded with {stored.describe()}, "
+                                         f"not {embedding_spec.describe()}")
+        return cls(directory, embeddings, header)
+
+    def __len__(self) -> int:
+        return int(self.header['count'])
+
+    def _document(self, row: int) -> Document:
+        """Decode one row's text and metadata"""
+        line = self._records[int(self.offsets[row]):int(self.offsets[row + 1])].tobytes()
+        text, metadata = json.loads(line)
+        return Document(page_content=text, metadata=metadata)
+
+    def search(self, embedding: List[float], k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Rows and cosine similarities of the k nearest vectors, best first"""
+        count = len(self)
+        k = min(k, count)
+        if k <= 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        query = _normalize(np.asarray(embedding, dtype=np.float32))
+        if query.shape[0] != self.vectors.shape[1]:
+            raise ValueError(f"Query has {query.shape[0]} dimensions; the store has {self.vectors.shape[1]}")
+
+        scores = np.empty(count, dtype=np.float32)
+        for start in range(0, count, SEARCH_BLOCK_ROWS):
+            end = min(start + SEARCH_BLOCK_ROWS, count)
+            scores[start:end] = self.vectors[start:end].astype(np.float32) @ query
+            if self.scales is not None:
+                scores[start:end] *= self.scales[start:end]
+
+        top = np.argpartition(-scores, k - 1)[:k] if k < count else np.arange(count)
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return top, scores[top]
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, **kwargs) -> List[Document]:
+        """Documents nearest to an embedding"""
+        rows, _ = self.search(embedding, k)
+        return [self._document(row) for row in rows]
+
+    def similarity_search_by_vector_with_score(self, embedding: List[float],
+                                               k: int = 4) -> List[Tuple[Document, float]]:
+        """Documents nearest to an embedding, with cosine distance (lower is closer)"""
+        rows, scores = self.search(embedding, k)
+        return [(self._document(row), float(1.0 - score)) for row, score in zip(rows, scores)]
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs) -> List[Document]:
+        """Documents nearest to a query, embedded with the store's model"""
+        return self.similarity_search_by_vector(self.embeddings.embed_query(query), k)
+
+    def get(self, ids: Optional[List[str]] = None, include: Optional[List[str]] = None) -> Dict:
+        """Documents and metadata by id, in Chroma's result shape; unknown ids are skipped"""
+        with self._lock:
+            if self._rows_by_id is None:
+                with open(self.directory / "ids.json", 'r', encoding='utf-8') as f:
+                    self._rows_by_id = {doc_id: row for row, doc_id in enumerate(json.load(f))}
+        rows = [(doc_id, self._rows_by_id[doc_id]) for doc_id in (ids or []) if doc_id in self._rows_by_id]
+        documents = [self._document(row) for _, row in rows]
+        return {
+            'ids': [doc_id for doc_id, _ in rows],
+            'documents': [doc.page_content for doc in documents],
+            'metadatas': [doc.metadata for doc in documents]
+        }
+
+
+def export_collection_snapshot(collection, collection_name: str, persist_directory: str, dtype: str,
+                               index_version: str, embedding_spec: Optional[EmbeddingSpec] = None) -> Dict:
+    """Export a collection's compact snapshot, tagged with its index version and model"""
+    header = {'collection': collection_name, 'index_version': index_version}
+    if embedding_spec is not None:
+        header.update(spec_metadata(embedding_spec))
+    return export_compact_store(collection, compact_store_path(collection_name, persist_directory), dtype, header)
@@ -0,0 +1,192 @@
+"""
+Context Builder
+Merges, deduplicates and packs retrieved chunks into a token-budgeted prompt context
+"""
+
+import math
+import re
+from typing import Dict, List, NamedTuple, Optional, Set
+
+from langchain_core.documents import Document
+
+CHARS_PER_TOKEN = 4  # Conservative for code with Llama-family tokenizers
+DUPLICATE_SIMILARITY = 0.9
+MIN_TRUNCATED_TOKENS = 150
+
+SHINGLE_PATTERN = re.compile(r'\w+')
+
+PROMPT_TEMPLATE = """You are a helpful code assistant. Answer the user's question based on the provided code snippets.
+Be specific and reference the file names when relevant. If the code doesn't contain enough information, say so.
+
+Question: {question}
+
+Relevant Code:
+{context}
+
+Please provide a clear and concise answer based on the code above."""
+
+
+class ContextBlock(NamedTuple):
+    """Contiguous text from one file built from one or more retrieved chunks"""
+    source: str
+    chunk_indexes: List[int]
+    start_line: Optional[int]
+    end_line: Optional[int]
+    text: str
+    rank: int
+    tokens: int
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count without a tokenizer dependency"""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _join_overlapping(first: str, second: str, max_overlap: int = 400, min_overlap: int = 20) -> str:
+    """Concatenate two chunks without line metadata, dropping text the second repeats from the first"""
+    for size in range(min(len(first), len(second), max_overlap), min_overlap - 1, -1):
+        if first.endswith(second[:size]):
+            return first + second[size:]
+    return first + "\n" + second
+
+
+def _shingles(text: str) -> Set[str]:
+    """Word trigrams used for near-duplicate detection"""
+    words = SHINGLE_PATTERN.findall(text.lower())
+    if len(words) < 3:
+        return set(words)
+    return {" ".join(words[idx:idx + 3]) for idx in range(len(words) - 2)}
+
+
+def _similarity(first: Set[str], second: Set[str]) -> float:
+    """Jaccard similarity of two shingle sets"""
+    if not first or not second:
+        return 0.0
+    return len(first & second) / len(first | second)
+
+
+def merge_adjacent(docs: List[Document]) -> List[ContextBlock]:
+    """Merge retrieved chunks that are consecutive in the same file, keeping the best rank"""
+    by_source: Dict[str, List] = {}
+    for rank, doc in enumerate(docs):
+        source = doc.metadata.get('source', 'Unknown')
+        by_source.setdefault(source, []).append((doc.metadata.get('chunk_index', 0), rank, doc))
+
+    blocks = []
+    for source, entries in by_source.items():
+        entries.sort(key=lambda entry: entry[0])
+        run = []
+        for entry in entries:
+            if run and entry[0] > run[-1][0] + 1:
+                blocks.append(_make_block(source, run))
+                run = []
+            if not run or entry[0] != run[-1][0]:
+                run.append(entry)
+        if run:
+            blocks.append(_make_block(source, run))
+
+    return sorted(blocks, key=lambda block: block.rank)
+
+
+def _make_block(source: str, run: List) -> ContextBlock:
+    """Build one block from a run of consecutive chunks"""
+    start_lines = [doc.metadata.get('start_line') for _, _, doc in run]
+    end_lines = [doc.metadata.get('end_line') for _, _, doc in run]
+    has_lines = all(start_lines) and all(end_lines)
+
+    text = run[0][2].page_content
+    for idx in range(1, len(run)):
+        content = run[idx][2].page_content
+        if has_lines:
+            # Line ranges say how many lines the next chunk repeats or how many blank lines sit between
+            gap = start_lines[idx] - end_lines[idx - 1] - 1
+            if (start_lines[idx], end_lines[idx]) == (start_lines[idx - 1], end_lines[idx - 1]):
+                # Pieces of one hard-split chunk share its line range and continue each other's text
+                text += content
+            elif gap >= 0:
+                text += "\n" * (gap + 1) + content
+            elif content.splitlines()[-gap:]:
+                text += "\n" + "\n".join(content.splitlines()[-gap:])
+        else:
+            text = _join_overlapping(text, content)
+    return ContextBlock(
+        source=source,
+        chunk_indexes=[chunk_index for chunk_index, _, _ in run],
+        start_line=start_lines[0] if has_lines else None,
+        end_line=max(end_lines) if has_lines else None,
+        text=text,
+        rank=min(rank for _, rank, _ in run),
+        tokens=estimate_tokens(text)
+    )
+
+
+def drop_near_duplicates(blocks: List[ContextBlock], threshold: float = DUPLICATE_SIMILARITY) -> List[ContextBlock]:
+    """Keep the better-ranked of any two blocks whose text is nearly identical"""
+    kept = []
+    kept_shingles = []
+    for block in blocks:
+        shingles = _shingles(block.text)
+        if any(_similarity(shingles, other) >= threshold for other in kept_shingles):
+            continue
+        kept.append(block)
+        kept_shingles.append(shingles)
+    return kept
+
+
+def _truncate(block: ContextBlock, max_tokens: int) -> ContextBlock:
+    """Keep the leading whole lines of a block that fit in max_tokens"""
+    kept_lines = []
+    used = 0
+    for line in block.text.splitlines():
+        cost = estimate_tokens(line + "\n")
+        if used + cost > max_tokens:
+            break
+        kept_lines.append(line)
+        used += cost
+    end_line = block.start_line + len(kept_lines) - 1 if block.start_line else None
+    text = "\n".join(kept_lines)
+    return block._replace(text=text, end_line=end_line, tokens=estimate_tokens(text))
+
+
+def pack_context(docs: List[Document], token_budget: int) -> List[ContextBlock]:
+    """Merge adjacent chunks, drop near-duplicates and fill the budget in rank order"""
+    packed = []
+    remaining = token_budget
+    for block in drop_near_duplicates(merge_adjacent(docs)):
+        if block.tokens <= remaining:
+            packed.append(block)
+            remaining -= block.tokens
+        elif remaining >= MIN_TRUNCATED_TOKENS:
+            # Take the head of a large block rather than skipping it
+            truncated = _truncate(block, remaining)
+            if truncated.text:
+                packed.append(truncated)
+                remaining -= truncated.tokens
+    return packed
+
+
+def format_location(block: ContextBlock) -> str:
+    """File path with line range, when known"""
+    if block.start_line:
+        return f"{block.source} (lines {block.start_line}-{block.end_line})"
+    return block.source
+
+
+def render_prompt(question: str, blocks: List[ContextBlock]) -> str:
+    """The LLM prompt for a question over packed context blocks"""
+    context = "\n---\n".join(f"[File: {format_location(block)}]\n{block.text}\n" for block in blocks)
+    return PROMPT_TEMPLATE.format(question=question, context=context)
+
+
+def block_sources(blocks: List[ContextBlock]) -> List[Dict]:
+    """Source entries shown as proof below an answer"""
+    return [
+        {
+            'file_path': block.source,
+            'chunk_index': block.chunk_indexes[0],
+            'start_line': block.start_line,
+            'end_line': block.end_line,
+            'content': block.text
+        }
+        for block in blocks
+    ]
@@ -0,0 +1,181 @@
+"""
+Embedding Pipeline
+Streaming, batched, concurrent embedding with rate-limit-aware backoff and incremental upserts
+"""
+
+import contextvars
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, Iterator, List, Optional, Set
+
+from langchain_core.documents import Document
+
+from tracing import tracer
+
+if TYPE_CHECKING:
+    from langchain_core.embeddings import Embeddings
+
+
+class EmbeddingPipelineError(Exception):
+    """Raised when a batch still fails after all retries"""
+
+    def __init__(self, message: str, completed_batches: int):
+        super().__init__(message)
+        self.completed_batches = completed_batches
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """Heuristic for provider throttling (HTTP 429 / gRPC RESOURCE_EXHAUSTED)"""
+    text = f"{type(error).__name__} {error}".lower()
+    return any(marker in text for marker in ('429', 'resourceexhausted', 'resource_exhausted',
+                                             'rate limit', 'ratelimit', 'quota'))
+
+
+class AdaptiveConcurrency:
+    """Concurrency gate that halves on rate limits and recovers on success"""
+
+    def __init__(self, max_concurrency: int, base_delay: float = 1.0, max_delay: float = 60.0):
+        self.max_concurrency = max(1, max_concurrency)
+        self.limit = self.max_concurrency
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.delay = base_delay
+        self.rate_limits = 0
+        self._active = 0
+        self._successes = 0
+        self._paused_until = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self) -> None:
+        """Wait for a free slot and for any backoff pause to end"""
+        with self._cond:
+            while True:
+                pause = self._paused_until - time.monotonic()
+                if pause <= 0 and self._active < self.limit:
+                    self._active += 1
+                    return
+                self._cond.wait(timeout=pause if pause > 0 else None)
+
+    def release(self) -> None:
+        """Free a slot"""
+        with self._cond:
+            self._active -= 1
+            self._cond.notify_all()
+
+    def on_success(self) -> None:
+        """Grow back towards the configured concurrency after sustained success"""
+        with self._cond:
+            self._successes += 1
+            if self._successes >= self.limit and self.limit < self.max_concurrency:
+                self.limit += 1
+                self._successes = 0
+            self.delay = self.base_delay
+            self._cond.notify_all()
+
+    def on_rate_limit(self) -> None:
+        """Halve concurrency and pause everyone with exponential backoff"""
+        with self._cond:
+            self.rate_limits += 1
+            self.limit = max(1, self.limit // 2)
+            self._successes = 0
+            self._paused_until = max(self._paused_until, time.monotonic() + self.delay)
+            self.delay = min(self.delay * 2, self.max_delay)
+
+
+def _embed_batch(embeddings: "Embeddings", texts: List[str], gate: AdaptiveConcurrency,
+                 max_retries: int) -> List[List[float]]:
+    """Embed one batch, retrying rate-limited and transient failures"""
+    attempt = 0
+    while True:
+        gate.acquire()
+        try:
+            with tracer.span('index.embed_batch', texts=len(texts), attempt=attempt + 1):
+                vectors = embeddings.embed_documents(texts)
+            gate.on_success()
+            return vectors
+        except Exception as e:
+            attempt += 1
+            if attempt > max_retries:
+                raise
+            if is_rate_limit_error(e):
+                gate.on_rate_limit()
+            else:
+                time.sleep(min(gate.base_delay * (2 ** (attempt - 1)), gate.max_delay))
+        finally:
+            gate.release()
+
+
+def iter_batches(documents: Iterable[Document], batch_size: int) -> Iterator[List[Document]]:
+    """Group a document stream into lists of at most batch_size"""
+    batch = []
+    for doc in documents:
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def embed_and_upsert(collection, documents: Iterable[Document], id_for: Callable[[Document], str],
+                     embeddings: "Embeddings", batch_size: int = 64, max_concurrency: int = 4,
+                     max_retries: int = 6,
+                     progress_callback: Optional[Callable[[int], None]] = None) -> Dict[str, int]:
+    """Embed a document stream in concurrent batches and upsert each batch as soon as it is ready
+
+    Documents are pulled lazily and at most two batches per worker are in
+    flight, so memory stays flat regardless of codebase size. Writes happen
+    on the calling thread. Upserts are idempotent, and with a cached
+    embeddings wrapper a re-run after failure only pays for the batches
+    that never completed, even when the caller rebuilds an emptied collection.
+    """
+    gate = AdaptiveConcurrency(max_concurrency)
+    max_in_flight = gate.max_concurrency * 2
+    in_flight: Dict[Future, List[Document]] = {}
+    stats = {'batches': 0, 'chunks': 0}
+
+    def upsert_done(done: Set[Future]) -> None:
+        """Write finished batches to the collection"""
+        for future in done:
+            batch = in_flight.pop(future)
+            vectors = future.result()
+            with tracer.span('index.upsert', chunks=len(batch)):
+                collection.upsert(
+                    ids=[id_for(doc) for doc in batch],
+                    embeddings=vectors,
+                    documents=[doc.page_content for doc in batch],
+                    metadatas=[doc.metadata for doc in batch]
+                )
+            stats['batches'] += 1
+            stats['chunks'] += len(batch)
+            if progress_callback:
+                progress_callback(stats['chunks'])
+
+    with ThreadPoolExecutor(max_workers=gate.max_concurrency) as executor:
+        try:
+            for batch in iter_batches(documents, batch_size):
+                # Run in a copy of the caller's context so batch spans join the caller's trace
+                future = executor.submit(contextvars.copy_context().run, _embed_batch, embeddings,
+                                         [doc.page_content for doc in batch], gate, max_retries)
+                in_flight[future] = batch
+
+                # Backpressure: stop pulling documents until a batch lands
+                if len(in_flight) >= max_in_flight:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    upsert_done(done)
+
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                upsert_done(done)
+        except Exception as e:
+            for pending in in_flight:
+                pending.cancel()
+            raise EmbeddingPipelineError(
+                f"Embedding stopped after {stats['batches']} batches: {str(e)}",
+                stats['batches']
+            ) from e
+
+    stats['rate_limits'] = gate.rate_limits
+    stats['final_concurrency'] = gate.limit
+    return stats
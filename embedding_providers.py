@@ -0,0 +1,90 @@
+"""
+Embedding Providers
+Which embedding backend (Gemini API or a local ONNX model) each collection uses, and mismatch checks
+"""
+
+from typing import Dict, NamedTuple, Optional
+
+PROVIDER_GEMINI = 'gemini'
+PROVIDER_LOCAL = 'local'
+
+# Output sizes of the models we ship defaults for
+KNOWN_DIMENSIONS = {
+    'models/gemini-embedding-001': 3072,
+    'sentence-transformers/all-MiniLM-L6-v2': 384
+}
+
+
+class EmbeddingModelMismatch(Exception):
+    """Raised when a collection is opened with a different embedding model than it was indexed with"""
+
+
+class EmbeddingSpec(NamedTuple):
+    """Which provider and model embed a collection; dimensions of None means unknown"""
+    provider: str
+    model: str
+    dimensions: Optional[int] = None
+
+    @property
+    def cache_name(self) -> str:
+        """Embedding cache namespace; Gemini keeps the bare model name used before providers existed"""
+        return self.model if self.provider == PROVIDER_GEMINI else f"{self.provider}:{self.model}"
+
+    def describe(self) -> str:
+        """Human-readable form for messages"""
+        dimensions = f", {self.dimensions} dims" if self.dimensions else ""
+        return f"{self.provider}:{self.model}{dimensions}"
+
+    def matches(self, other: "EmbeddingSpec") -> bool:
+        """Same model, and the same dimensions where both are known"""
+        if (self.provider, self.model) != (other.provider, other.model):
+            return False
+        return not (self.dimensions and other.dimensions and self.dimensions != other.dimensions)
+
+
+# Collections indexed before models were recorded all used the Gemini default
+LEGACY_EMBEDDING_SPEC = EmbeddingSpec(PROVIDER_GEMINI, 'models/gemini-embedding-001', 3072)
+
+
+def embedding_spec(provider: str, model: str) -> EmbeddingSpec:
+    """Spec for a provider and model, with its dimensions if they are known"""
+    if provider not in (PROVIDER_GEMINI, PROVIDER_LOCAL):
+        raise ValueError(f"Unknown embedding provider: {provider}")
+    return EmbeddingSpec(provider, model, KNOWN_DIMENSIONS.get(model))
+
+
+def spec_metadata(spec: EmbeddingSpec) -> Dict:
+    """Keys recorded in Chroma collection metadata and registry entries"""
+    metadata = {'embedding_provider': spec.provider, 'embedding_model': spec.model}
+    if spec.dimensions:
+        metadata['embedding_dimensions'] = spec.dimensions
+    return metadata
+
+
+def spec_from_metadata(metadata: Optional[Dict]) -> Optional[EmbeddingSpec]:
+    """Read back spec_metadata; None if the keys are absent"""
+    if not metadata or not metadata.get('embedding_model'):
+        return None
+    return EmbeddingSpec(metadata.get('embedding_provider', PROVIDER_GEMINI), metadata['embedding_model'],
+                         metadata.get('embedding_dimensions'))
+
+
+def collection_spec(collection) -> EmbeddingSpec:
+    """The model a Chroma collection was indexed with"""
+    return spec_from_metadata(collection.metadata) or LEGACY_EMBEDDING_SPEC
+
+
+def check_collection_spec(collection, spec: EmbeddingSpec,
+                          legacy: Optional[EmbeddingSpec] = LEGACY_EMBEDDING_SPEC) -> None:
+    """Record spec on an unmarked collection, or raise if the collection holds another model's vectors
+
+    Unmarked non-empty collections are assumed to hold legacy vectors.
+    """
+    stored = spec_from_metadata(collection.metadata)
+    if stored is None and collection.count() > 0 and legacy is not None:
+        stored = legacy
+    if stored is not None and not stored.matches(spec):
+        raise EmbeddingModelMismatch(f"Collection {collection.name} was embedded with {stored.describe()}, "
+                                     f"not {spec.describe()}")
+    if spec_from_metadata(collection.metadata) != spec:
+        collection.modify(metadata=dict(collection.metadata or {}, **spec_metadata(spec)))
@@ -0,0 +1,70 @@
+"""
+Service Health Monitor
+Runs service probes in a background thread and caches the results
+"""
+
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+
+class HealthMonitor:
+    """Periodically runs named probes off the request path"""
+
+    def __init__(self, probes: Dict[str, Callable[[], None]], ttl_seconds: float = 300):
+        self.probes = probes
+        self.ttl_seconds = ttl_seconds
+        self._results: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start the background probe loop (idempotent)"""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="health-monitor", daemon=True)
+            self._thread.start()
+
+    def watch(self, name: str, probe: Callable[[], None]) -> None:
+        """Add a probe if it is not already running; it is checked straight away"""
+        with self._lock:
+            if name in self.probes:
+                return
+            self.probes = dict(self.probes, **{name: probe})
+        self._wake.set()
+
+    def refresh(self) -> None:
+        """Ask the probe loop to re-run now instead of waiting for the TTL"""
+        self._wake.set()
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Latest result per probe; never blocks on network calls"""
+        with self._lock:
+            return {name: dict(result) for name, result in self._results.items()}
+
+    def _run(self) -> None:
+        """Probe loop: run every probe, then sleep until the TTL or a refresh"""
+        while True:
+            # watch() replaces the dict rather than mutating it, so this loop sees a stable copy
+            for name, probe in self.probes.items():
+                self._check(name, probe)
+            self._wake.wait(self.ttl_seconds)
+            self._wake.clear()
+
+    def _check(self, name: str, probe: Callable[[], None]) -> None:
+        """Run one probe; a probe signals failure by raising"""
+        started = time.perf_counter()
+        result = {'ok': False, 'error': None}
+        try:
+            probe()
+            result['ok'] = True
+        except Exception as e:
+            result['error'] = str(e)
+            print(f"{name} health check failed: {str(e)}")
+        result['latency_ms'] = (time.perf_counter() - started) * 1000
+        result['checked_at'] = time.time()
+
+        with self._lock:
+            self._results[name] = result
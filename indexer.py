@@ -0,0 +1,355 @@
+"""
+Indexer
+UI-independent indexing pipeline: scan, diff, split, embed and upsert into Chroma and the side indexes
+"""
+
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict, FrozenSet, Iterator, List, NamedTuple, Optional, Union
+
+from langchain_core.documents import Document
+
+from chunker import CHUNKER_VERSION
+from compact_store import CompactVectorStore, compact_store_path, export_collection_snapshot, read_compact_header
+from embedding_pipeline import embed_and_upsert
+from embedding_providers import EmbeddingModelMismatch, EmbeddingSpec, check_collection_spec, spec_from_metadata
+from lexical_index import LexicalIndex, lexical_index_path
+from loader import LoadedFile, iter_loaded_files, read_text_file
+from manifest import (load_manifest, save_manifest, delete_manifest, scan_files, diff_manifest, chunk_id,
+                      manifest_version, file_content_hash)
+from memory import PeakRssMonitor
+from scanner import scan_codebase, ScanResult
+from symbols import SymbolIndex, symbol_index_path
+from tracing import tracer
+
+if TYPE_CHECKING:
+    from langchain_community.vectorstores import Chroma
+    from langchain_core.embeddings import Embeddings
+
+
+class IndexingError(Exception):
+    """Raised when a codebase cannot be indexed (too large, no files, ...)"""
+
+
+class IndexSettings(NamedTuple):
+    """Knobs for one indexing run; budgets of None mean unlimited"""
+    extensions: FrozenSet[str]
+    ignore_dirs: FrozenSet[str]
+    persist_directory: str = "./chroma_db"
+    max_codebase_size_mb: Optional[float] = 100
+    max_files: Optional[float] = 50
+    max_file_size_mb: Optional[float] = 0.5
+    respect_gitignore: bool = True
+    embedding_batch_size: int = 64
+    embedding_max_concurrency: int = 4
+    embedding_max_retries: int = 6
+    loader_max_workers: int = 1
+    loader_use_processes: bool = False
+    progress_interval_seconds: float = 0.2
+    compact_store_dtype: Optional[str] = None  # 'float16' or 'int8' also exports a compact snapshot
+
+
+class IndexReporter:
+    """Receives messages and progress from an indexing run; the default discards them"""
+
+    def message(self, level: str, text: str) -> None:
+        """level is one of 'info', 'success', 'warning', 'error'"""
+
+    def progress(self, **fields) -> None:
+        """Stage and counters: files_scanned, files_total, files_processed, chunks_embedded, eta_seconds"""
+
+
+class Codebase(NamedTuple):
+    """Where files to index come from: a directory on disk or an archive read in place
+
+    scan takes scan_codebase's keyword arguments; files are paths under root
+    that content_hash and read_text understand, whether or not they exist.
+    """
+    root: Path
+    scan: Callable[..., ScanResult]
+    content_hash: Callable[[Path], str] = file_content_hash
+    read_text: Callable[[Path], str] = read_text_file
+    allow_processes: bool = True
+    close: Optional[Callable[[], None]] = None
+
+
+def directory_codebase(root: Path) -> Codebase:
+    """A codebase of files on disk"""
+    return Codebase(root=root, scan=lambda **options: scan_codebase(root, **options))
+
+
+def bytes_to_mb(size_bytes: int) -> float:
+    """Convert a byte count to MB"""
+    return size_bytes / (1024 * 1024)
+
+
+def open_vector_store(collection_name: str, embeddings: "Embeddings", persist_directory: str,
+                      client=None, embedding_spec: Optional[EmbeddingSpec] = None) -> "Chroma":
+    """Open (or create) a persistent Chroma collection, on a shared client if one is given
+
+    With embedding_spec, the collection must hold (or is marked as holding)
+    that model's vectors; EmbeddingModelMismatch is raised otherwise.
+    """
+    from langchain_community.vectorstores import Chroma  # Pulls in chromadb; deferred until a store is needed
+    if client is not None:
+        vector_store = Chroma(collection_name=collection_name, embedding_function=embeddings, client=client)
+    else:
+        vector_store = Chroma(
+            collection_name=collection_name,
+            embedding_function=embeddings,
+            persist_directory=persist_directory
+        )
+    if embedding_spec is not None:
+        check_collection_spec(vector_store._collection, embedding_spec)
+    return vector_store
+
+
+def open_search_store(collection_name: str, embeddings: "Embeddings", persist_directory: str, client=None,
+                      embedding_spec: Optional[EmbeddingSpec] = None, compact: bool = False,
+                      index_version: Optional[str] = None) -> Union["Chroma", CompactVectorStore]:
+    """Store to answer from: the compact snapshot if asked for and current, otherwise Chroma"""
+    if compact:
+        store = CompactVectorStore.open(compact_store_path(collection_name, persist_directory), embeddings,
+                                        embedding_spec, index_version)
+        if store is not None:
+            return store
+        print(f"No current compact snapshot of {collection_name}; searching Chroma")
+    return open_vector_store(collection_name, embeddings, persist_directory, client, embedding_spec)
+
+
+def collect_code_files(codebase: Codebase, settings: IndexSettings, reporter: IndexReporter) -> ScanResult:
+    """Collect all code files and the codebase size in a single pass"""
+    result = codebase.scan(
+        extensions=settings.extensions,
+        ignore_dirs=settings.ignore_dirs,
+        max_file_size_bytes=int(settings.max_file_size_mb * 1024 * 1024) if settings.max_file_size_mb else None,
+        max_files=int(settings.max_files) if settings.max_files else None,
+        max_total_bytes=int(settings.max_codebase_size_mb * 1024 * 1024) if settings.max_codebase_size_mb else None,
+        respect_gitignore=settings.respect_gitignore
+    )
+
+    for file_path in result.skipped_large:
+        reporter.message('warning', f"Skipping large file: {file_path.name} (>{settings.max_file_size_mb}MB)")
+
+    if result.truncated:
+        reporter.message('warning', f"Reached maximum file limit ({settings.max_files:g}). Stopping collection.")
+
+    return result
+
+
+def load_and_split_documents(files: List[Path], base_path: Path, settings: IndexSettings,
+                             reporter: IndexReporter,
+                             on_file: Optional[Callable[[LoadedFile], None]] = None,
+                             reader: Callable[[Path], str] = read_text_file) -> Iterator[Document]:
+    """Load code files and split into chunks, yielding documents in file order"""
+    started = time.monotonic()
+    last_update = 0.0
+
+    for idx, loaded in enumerate(iter_loaded_files(files, base_path,
+                                                   max_workers=settings.loader_max_workers,
+                                                   use_processes=settings.loader_use_processes,
+                                                   reader=reader)):
+        if loaded.error:
+            reporter.message('warning', f"Error processing {loaded.file_path.name}: {loaded.error}")
+        # Workers may be processes, so they time themselves and the spans are recorded here
+        relative_path = str(loaded.file_path.relative_to(base_path))
+        tracer.record('index.read', loaded.read_seconds, file=relative_path)
+        if not loaded.error:
+            tracer.record('index.split', loaded.split_seconds, file=relative_path, chunks=len(loaded.documents))
+
+        if on_file:
+            on_file(loaded)
+        yield from loaded.documents
+
+        # Throttle progress updates
+        now = time.monotonic()
+        if now - last_update >= settings.progress_interval_seconds or idx == len(files) - 1:
+            last_update = now
+            processed = idx + 1
+            eta = (now - started) / processed * (len(files) - processed)
+            reporter.progress(files_processed=processed, current_file=relative_path, eta_seconds=eta)
+
+
+def run_index(source: Union[Path, Codebase], collection_name: str, embeddings: "Embeddings",
+              settings: IndexSettings, reporter: Optional[IndexReporter] = None, client=None,
+              embedding_spec: Optional[EmbeddingSpec] = None) -> Dict:
+    """Incrementally index a directory or Codebase into a Chroma collection and return run statistics
+
+    embedding_spec names the model behind embeddings; a collection holding
+    another model's vectors is rebuilt rather than mixed.
+    """
+    reporter = reporter or IndexReporter()
+    codebase = source if isinstance(source, Codebase) else directory_codebase(source)
+    source_path = codebase.root
+    if not codebase.allow_processes:
+        # Archive readers hold an open file and cannot be shipped to worker processes
+        settings = settings._replace(loader_use_processes=False)
+
+    # Collect files and check directory size in one walk
+    reporter.progress(stage='scanning')
+    with tracer.span('index.scan') as span:
+        scan = collect_code_files(codebase, settings, reporter)
+        span.update(files=len(scan.files), bytes=scan.total_size_bytes)
+
+    dir_size = bytes_to_mb(scan.total_size_bytes)
+    if scan.over_budget:
+        raise IndexingError(f"Codebase too large: over {dir_size:.2f}MB (max: {settings.max_codebase_size_mb}MB)")
+
+    reporter.message('info', f"Codebase size: {dir_size:.2f}MB")
+    files = scan.files
+
+    if not files:
+        raise IndexingError("No supported code files found!")
+
+    reporter.message('success', f"Found {len(files)} code files")
+    reporter.progress(stage='diffing', files_scanned=len(files))
+
+    # Open Chroma vector store with persistence
+    model_changed = False
+    try:
+        vector_store = open_vector_store(collection_name, embeddings, settings.persist_directory, client,
+                                         embedding_spec)
+    except EmbeddingModelMismatch as e:
+        reporter.message('warning', f"{str(e)}; re-embedding every file")
+        vector_store = open_vector_store(collection_name, embeddings, settings.persist_directory, client)
+        model_changed = True
+
+    # Diff against the manifest from the last index of this collection
+    manifest_dir = str(Path(settings.persist_directory) / "manifests")
+    previous_manifest = load_manifest(collection_name, manifest_dir)
+    lexical_path = lexical_index_path(collection_name, settings.persist_directory)
+    lexical_index = LexicalIndex.load(lexical_path)
+    symbol_path = symbol_index_path(collection_name, settings.persist_directory)
+    symbol_index = SymbolIndex.load(symbol_path)
+    if (model_changed or previous_manifest is None or lexical_index is None or symbol_index is None
+            or len(vector_store) == 0):
+        # Without a manifest and side indexes matching the stored vectors, rebuild from scratch.
+        # The manifest goes first: if the rebuild is interrupted, the next run must not trust it
+        # against a half-filled collection.
+        delete_manifest(collection_name, manifest_dir)
+        # Nor should questions be answered from BM25 entries or symbols for vectors that are gone
+        lexical_path.unlink(missing_ok=True)
+        symbol_path.unlink(missing_ok=True)
+        previous_manifest = None
+        lexical_index = LexicalIndex()
+        symbol_index = SymbolIndex()
+        vector_store.delete_collection()
+        vector_store = open_vector_store(collection_name, embeddings, settings.persist_directory, client,
+                                         embedding_spec)
+
+    current_manifest = scan_files(files, source_path, previous_manifest, scan.stats, codebase.content_hash)
+    for entry in current_manifest.values():
+        # Files chunked by an older chunker are re-split even if unchanged
+        entry['chunker'] = CHUNKER_VERSION
+    diff = diff_manifest(previous_manifest or {}, current_manifest)
+
+    reporter.message('info', f"{len(diff['added'])} added, {len(diff['changed'])} changed, "
+                             f"{len(diff['removed'])} removed, {len(diff['unchanged'])} unchanged files")
+
+    # Load and split only new or modified files
+    to_index = set(diff['added']) | set(diff['changed'])
+    files_to_index = [f for f in files if str(f.relative_to(source_path)) in to_index]
+
+    # Drop vectors and symbols for files that were removed or modified
+    symbol_index.remove_files(diff['removed'] + diff['changed'])
+    stale_ids = []
+    for relative_path in diff['removed'] + diff['changed']:
+        stale_ids.extend(previous_manifest[relative_path].get('chunk_ids', []))
+    if stale_ids:
+        vector_store.delete(ids=stale_ids)
+        lexical_index.remove(stale_ids)
+
+    def document_id(doc: Document) -> str:
+        """Stable vector id for a chunk"""
+        return chunk_id(doc.metadata['source'], doc.metadata['chunk_index'])
+
+    def track_chunk_ids(documents: Iterator[Document]) -> Iterator[Document]:
+        """Record chunk ids per file and index their tokens as documents stream past"""
+        for doc in documents:
+            doc_id = document_id(doc)
+            current_manifest[doc.metadata['source']]['chunk_ids'].append(doc_id)
+            lexical_index.add(doc_id, doc.page_content)
+            yield doc
+
+    def record_symbols(loaded: LoadedFile) -> None:
+        """Keep the symbol table in step with the files being indexed"""
+        symbol_index.set_file(str(loaded.file_path.relative_to(source_path)), loaded.symbols)
+
+    hits_before = getattr(embeddings, 'hits', 0)
+
+    # Stream files through split -> embed -> upsert; no stage holds the whole codebase
+    reporter.progress(stage='embedding', files_total=len(files_to_index), files_processed=0, chunks_embedded=0)
+    with PeakRssMonitor() as rss:
+        started = time.perf_counter()
+        embed_stats = embed_and_upsert(
+            vector_store._collection,
+            track_chunk_ids(load_and_split_documents(files_to_index, source_path, settings, reporter,
+                                                     on_file=record_symbols, reader=codebase.read_text)),
+            document_id,
+            embeddings,
+            batch_size=settings.embedding_batch_size,
+            max_concurrency=settings.embedding_max_concurrency,
+            max_retries=settings.embedding_max_retries,
+            progress_callback=lambda done: reporter.progress(chunks_embedded=done)
+        )
+        elapsed = time.perf_counter() - started
+
+    if embed_stats['rate_limits']:
+        reporter.message('warning', f"Hit {embed_stats['rate_limits']} rate limits; "
+                                    f"finished at concurrency {embed_stats['final_concurrency']}")
+
+    for relative_path in diff['unchanged']:
+        current_manifest[relative_path]['chunk_ids'] = previous_manifest[relative_path].get('chunk_ids', [])
+    # Files without chunks (e.g. an empty __init__.py) are recorded with no chunk ids, so they are not
+    # retried every run; only a codebase with no chunks at all is an error
+    if not any(entry['chunk_ids'] for entry in current_manifest.values()):
+        raise IndexingError("No documents created!")
+    lexical_index.save(lexical_path)
+    symbol_index.save(symbol_path)
+    save_manifest(collection_name, current_manifest, manifest_dir)
+    index_version = manifest_version(current_manifest)
+    if settings.compact_store_dtype:
+        export_compact_snapshot(vector_store, collection_name, settings, index_version, embedding_spec)
+
+    chunks = embed_stats['chunks']
+    reused = getattr(embeddings, 'hits', 0) - hits_before
+    reporter.message('info', f"Reused {reused} cached embeddings, embedded {chunks - reused} new chunks")
+    reporter.progress(stage='done', eta_seconds=0)
+
+    return {
+        'collection_name': collection_name,
+        'index_version': index_version,
+        'files': len(files_to_index),
+        'total_files': len(files),
+        'chunks': chunks,
+        'symbols': len(symbol_index),
+        'reused_embeddings': reused,
+        'seconds': elapsed,
+        'chunks_per_sec': chunks / elapsed if elapsed > 0 else 0.0,
+        'peak_rss_mb': rss.peak_mb
+    }
+
+
+def export_compact_snapshot(vector_store: "Chroma", collection_name: str, settings: IndexSettings,
+                            index_version: str, embedding_spec: Optional[EmbeddingSpec]) -> None:
+    """Re-export the compact snapshot unless it already matches this index version, dtype and model"""
+    header = read_compact_header(compact_store_path(collection_name, settings.persist_directory))
+    if (header is not None and header.get('index_version') == index_version
+            and header.get('dtype') == settings.compact_store_dtype
+            and spec_from_metadata(header) == embedding_spec):
+        return
+    with tracer.span('index.compact', dtype=settings.compact_store_dtype) as span:
+        header = export_collection_snapshot(vector_store._collection, collection_name, settings.persist_directory,
+                                            settings.compact_store_dtype, index_version, embedding_spec)
+        span['rows'] = header['count']
+
+
+def format_index_stats(stats: Dict) -> str:
+    """One-line summary of an indexing run"""
+    if stats.get('reused_revision'):
+        return f"Revision {stats['revision'][:12]} was already indexed; reused the existing collection"
+    line = (f"Indexed {stats['chunks']} chunks from {stats['files']} files in {stats['seconds']:.1f}s "
+            f"({stats['chunks_per_sec']:.0f} chunks/s)")
+    if stats.get('peak_rss_mb') is not None:
+        line += f", peak RSS {stats['peak_rss_mb']:.0f}MB"
+    return line
@@ -0,0 +1,183 @@
+"""
+Indexing Jobs
+Background job queue with a persisted SQLite job table
+"""
+
+import json
+import sqlite3
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from indexer import IndexReporter
+
+JOB_STATUSES = ('queued', 'running', 'done', 'failed')
+
+
+class JobStore:
+    """SQLite table of indexing jobs, their progress, messages and results"""
+
+    def __init__(self, path: str):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, kind TEXT NOT NULL, source TEXT NOT NULL, "
+            "collection_name TEXT NOT NULL, status TEXT NOT NULL, created_at REAL NOT NULL, "
+            "started_at REAL, finished_at REAL, progress TEXT NOT NULL DEFAULT '{}', "
+            "messages TEXT NOT NULL DEFAULT '[]', result TEXT, error TEXT)"
+        )
+        self._conn.commit()
+
+    def create(self, kind: str, source: str, collection_name: str) -> int:
+        """Insert a queued job and return its id"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO jobs (kind, source, collection_name, status, created_at) VALUES (?, ?, ?, 'queued', ?)",
+                (kind, source, collection_name, time.time())
+            )
+            self._conn.commit()
+            return cursor.lastrowid
+
+    def update(self, job_id: int, **fields) -> None:
+        """Set columns on a job; progress and result are stored as JSON"""
+        for column in ('progress', 'result'):
+            if column in fields and not isinstance(fields[column], str):
+                fields[column] = json.dumps(fields[column])
+        assignments = ", ".join(f"{column} = ?" for column in fields)
+        with self._lock:
+            self._conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+            self._conn.commit()
+
+    def merge_progress(self, job_id: int, fields: Dict) -> None:
+        """Merge counters into a job's progress"""
+        with self._lock:
+            row = self._conn.execute("SELECT progress FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            progress = json.loads(row['progress']) if row else {}
+            progress.update(fields)
+            self._conn.execute("UPDATE jobs SET progress = ? WHERE id = ?", (json.dumps(progress), job_id))
+            self._conn.commit()
+
+    def append_message(self, job_id: int, level: str, text: str) -> None:
+        """Add a log line to a job"""
+        with self._lock:
+            row = self._conn.execute("SELECT messages FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            messages = json.loads(row['messages']) if row else []
+            messages.append({'level': level, 'text': text, 'at': time.time()})
+            self._conn.execute("UPDATE jobs SET messages = ? WHERE id = ?", (json.dumps(messages), job_id))
+            self._conn.commit()
+
+    def get(self, job_id: int) -> Optional[Dict]:
+        """Fetch one job"""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def recent(self, limit: int = 10) -> List[Dict]:
+        """Most recent jobs, newest first"""
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM jobs ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def mark_interrupted(self) -> int:
+        """Fail jobs left queued/running by a previous process"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = 'failed', error = 'Interrupted by restart', finished_at = ? "
+                "WHERE status IN ('queued', 'running')",
+                (time.time(),)
+            )
+            self._conn.commit()
+            return cursor.rowcount
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict:
+        """Decode a row, parsing JSON columns"""
+        job = dict(row)
+        job['progress'] = json.loads(job['progress'] or '{}')
+        job['messages'] = json.loads(job['messages'] or '[]')
+        job['result'] = json.loads(job['result']) if job['result'] else None
+        return job
+
+
+class JobReporter(IndexReporter):
+    """Writes indexing messages and (throttled) progress to the job table"""
+
+    def __init__(self, store: JobStore, job_id: int, min_interval_seconds: float = 0.5):
+        self.store = store
+        self.job_id = job_id
+        self.min_interval_seconds = min_interval_seconds
+        self._pending: Dict = {}
+        self._last_flush = 0.0
+
+    def message(self, level: str, text: str) -> None:
+        self.store.append_message(self.job_id, level, text)
+
+    def progress(self, **fields) -> None:
+        self._pending.update(fields)
+        now = time.monotonic()
+        # Stage changes are always written; counters at most every min_interval_seconds
+        if 'stage' in fields or now - self._last_flush >= self.min_interval_seconds:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write buffered progress"""
+        if self._pending:
+            self.store.merge_progress(self.job_id, self._pending)
+            self._pending = {}
+        self._last_flush = time.monotonic()
+
+
+class JobQueue:
+    """Runs indexing jobs on a bounded worker pool, one at a time per collection"""
+
+    def __init__(self, store: JobStore, max_workers: int = 2):
+        self.store = store
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="index-job")
+        self._collection_locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        self.store.mark_interrupted()
+
+    def submit(self, kind: str, source: str, collection_name: str,
+               runner: Callable[[JobReporter], Dict],
+               on_done: Optional[Callable[[Dict], None]] = None) -> int:
+        """Queue a job; runner does the work and returns a JSON-serializable result"""
+        job_id = self.store.create(kind, source, collection_name)
+        self._executor.submit(self._run, job_id, collection_name, runner, on_done)
+        return job_id
+
+    def _collection_lock(self, collection_name: str) -> threading.Lock:
+        """Lock serializing writes to one collection"""
+        with self._locks_guard:
+            return self._collection_locks.setdefault(collection_name, threading.Lock())
+
+    def _run(self, job_id: int, collection_name: str, runner: Callable[[JobReporter], Dict],
+             on_done: Optional[Callable[[Dict], None]]) -> None:
+        """Worker body: run the job and record the outcome"""
+        reporter = JobReporter(self.store, job_id)
+        with self._collection_lock(collection_name):
+            self.store.update(job_id, status='running', started_at=time.time())
+            try:
+                result = runner(reporter)
+                reporter.flush()
+            except Exception as e:
+                reporter.flush()
+                print(f"Indexing job {job_id} failed: {traceback.format_exc()}")
+                self.store.update(job_id, status='failed', finished_at=time.time(), error=str(e))
+                return
+
+            # Callbacks run before the job shows as done, so pollers never see a finished job with no catalog
+            # entry; the index itself succeeded, so a callback failure is only a warning
+            if on_done:
+                try:
+                    on_done(result)
+                except Exception as e:
+                    print(f"Indexing job {job_id} callback failed: {traceback.format_exc()}")
+                    self.store.append_message(job_id, 'warning', f"Indexed, but recording the result failed: {e}")
+            self.store.update(job_id, status='done', finished_at=time.time(), result=result)
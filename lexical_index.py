@@ -0,0 +1,142 @@
+"""
+Lexical Index
+BM25 over code-aware tokens, kept alongside each Chroma collection
+"""
+
+import gzip
+import json
+import math
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+WORD_PATTERN = re.compile(r'[A-Za-z0-9_]+')
+CAMEL_PATTERN = re.compile(r'[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|[0-9]+')
+
+
+def split_identifier(identifier: str) -> List[str]:
+    """Split snake_case and camelCase/PascalCase identifiers into lowercase parts"""
+    parts = []
+    for piece in identifier.split('_'):
+        parts.extend(match.lower() for match in CAMEL_PATTERN.findall(piece))
+    return parts
+
+
+def code_tokenize(text: str) -> List[str]:
+    """Tokens for BM25: whole identifiers plus their sub-words"""
+    tokens = []
+    for word in WORD_PATTERN.findall(text):
+        whole = word.lower().strip('_')
+        if len(whole) > 1:
+            tokens.append(whole)
+        parts = split_identifier(word)
+        if len(parts) > 1:
+            tokens.extend(part for part in parts if len(part) > 1)
+    return tokens
+
+
+def lexical_index_path(collection_name: str, persist_directory: str) -> Path:
+    """Location of a collection's lexical index"""
+    return Path(persist_directory) / "lexical" / f"{collection_name}.json.gz"
+
+
+class LexicalIndex:
+    """Incrementally maintained BM25 index keyed by chunk id"""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.doc_terms: Dict[str, Dict[str, int]] = {}
+        self.doc_lengths: Dict[str, int] = {}
+        self.postings: Dict[str, Dict[str, int]] = {}
+        self.total_length = 0
+
+    def __len__(self) -> int:
+        return len(self.doc_terms)
+
+    def add(self, doc_id: str, text: str) -> None:
+        """Index (or re-index) one chunk"""
+        if doc_id in self.doc_terms:
+            self.remove([doc_id])
+
+        terms = dict(Counter(code_tokenize(text)))
+        self.doc_terms[doc_id] = terms
+        length = sum(terms.values())
+        self.doc_lengths[doc_id] = length
+        self.total_length += length
+        for term, count in terms.items():
+            self.postings.setdefault(term, {})[doc_id] = count
+
+    def remove(self, doc_ids: Iterable[str]) -> None:
+        """Drop chunks from the index; unknown ids are ignored"""
+        for doc_id in doc_ids:
+            terms = self.doc_terms.pop(doc_id, None)
+            if terms is None:
+                continue
+            self.total_length -= self.doc_lengths.pop(doc_id)
+            for term in terms:
+                posting = self.postings.get(term)
+                if posting is not None:
+                    posting.pop(doc_id, None)
+                    if not posting:
+                        del self.postings[term]
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[str, float]]:
+        """Top-k chunk ids by BM25 score"""
+        if not self.doc_terms:
+            return []
+
+        doc_count = len(self.doc_terms)
+        avg_length = self.total_length / doc_count or 1.0
+        scores: Dict[str, float] = {}
+
+        for term in set(code_tokenize(query)):
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            idf = math.log(1 + (doc_count - len(posting) + 0.5) / (len(posting) + 0.5))
+            for doc_id, tf in posting.items():
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+
+    def save(self, path: Path) -> None:
+        """Write the index atomically as gzipped JSON"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix('.tmp')
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+            json.dump({'version': 1, 'k1': self.k1, 'b': self.b, 'docs': self.doc_terms}, f)
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["LexicalIndex"]:
+        """Read an index written by save, or None if missing/unreadable"""
+        if not path.exists():
+            return None
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable lexical index {path}: {str(e)}")
+            return None
+
+        index = cls(k1=data.get('k1', 1.5), b=data.get('b', 0.75))
+        for doc_id, terms in data['docs'].items():
+            index.doc_terms[doc_id] = terms
+            length = sum(terms.values())
+            index.doc_lengths[doc_id] = length
+            index.total_length += length
+            for term, count in terms.items():
+                index.postings.setdefault(term, {})[doc_id] = count
+        return index
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """Fuse ranked id lists: score(id) = sum over lists of 1 / (k + rank)"""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
@@ -0,0 +1,293 @@
+"""
+LLM Dispatcher
+Process-wide queue for LLM completions: coalesces identical in-flight prompts and enforces a shared budget
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
+
+from context_builder import estimate_tokens
+from embedding_pipeline import is_rate_limit_error
+from tracing import percentile, tracer
+
+WAIT_HISTORY = 200  # Recent queue waits kept for percentiles
+SESSION_HISTORY = 1000  # Sessions remembered for turn order once their queues drain
+
+
+class _Flight:
+    """One completion, shared by every caller that asked for the same prompt while it was pending"""
+
+    def __init__(self, key: Tuple[int, str], llm, prompt: str, session: str, cost: int):
+        self.key = key
+        self.llm = llm
+        self.prompt = prompt
+        self.session = session
+        self.cost = cost
+        self.subscribers = 1
+        self.enqueued_at = time.monotonic()
+        self.admitted_at: Optional[float] = None
+        self.chunks: List = []
+        self.done = False
+        self.error: Optional[Exception] = None
+        self.cond = threading.Condition()
+
+    def push(self, chunk) -> None:
+        """Hand a streamed chunk to every subscriber"""
+        with self.cond:
+            self.chunks.append(chunk)
+            self.cond.notify_all()
+
+    def finish(self, error: Optional[Exception] = None) -> None:
+        """Mark the completion finished, successfully or not"""
+        with self.cond:
+            self.done = True
+            self.error = error
+            self.cond.notify_all()
+
+
+class LLMDispatcher:
+    """Runs every session's LLM calls through one fair queue; safe to share between threads
+
+    A prompt that is already queued or streaming for the same model is not
+    sent again: the caller joins that flight and replays its chunks. Each
+    session has its own FIFO queue, and the session served least recently
+    goes next, so one user's burst cannot starve the others. At most max_concurrency completions
+    run at once. With tokens_per_minute, a completion starts only when the
+    token bucket covers its prompt plus completion_tokens; reported usage
+    settles the difference afterwards. A 429 before the first chunk pauses
+    every queued completion, then the call is retried with backoff.
+    """
+
+    def __init__(self, max_concurrency: int = 4, tokens_per_minute: Optional[float] = None,
+                 completion_tokens: int = 512, max_retries: int = 3, retry_delay: float = 1.0,
+                 max_retry_delay: float = 60.0):
+        self.max_concurrency = max(1, max_concurrency)
+        self.tokens_per_minute = tokens_per_minute
+        self.completion_tokens = completion_tokens
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.requests = 0
+        self.coalesced = 0
+        self.completions = 0
+        self.cancelled = 0
+        self.rate_limits = 0
+        self._flights: Dict[Tuple[int, str], _Flight] = {}
+        self._queues: Dict[str, Deque[_Flight]] = {}
+        self._last_served: Dict[str, float] = {}
+        self._running = 0
+        self._tokens = float(tokens_per_minute or 0)
+        self._refilled_at = time.monotonic()
+        self._paused_until = 0.0
+        self._waits: Deque[float] = deque(maxlen=WAIT_HISTORY)
+        self._workers: List[threading.Thread] = []
+        self._cond = threading.Condition()
+
+    def stream(self, llm, prompt: str, session: str = "", metrics: Optional[Dict] = None) -> Iterator:
+        """Chunks of llm.stream(prompt), shared with an identical prompt already in flight
+
+        llm is a pooled client, so its identity stands for the model and
+        its settings. metrics receives queue_ms (time until the completion
+        started; 0 when joining one already streaming) and coalesced.
+        """
+        flight, coalesced = self._join(llm, prompt, session)
+        joined_at = time.monotonic()
+        if metrics is not None:
+            metrics['coalesced'] = coalesced
+        position = 0
+        try:
+            while True:
+                with flight.cond:
+                    while position >= len(flight.chunks) and not flight.done:
+                        flight.cond.wait()
+                    chunks = flight.chunks[position:]
+                    done, error = flight.done, flight.error
+                if metrics is not None and 'queue_ms' not in metrics:
+                    started = flight.admitted_at or joined_at
+                    metrics['queue_ms'] = max(0.0, started - joined_at) * 1000
+                position += len(chunks)
+                yield from chunks
+                if done:
+                    if error is not None:
+                        raise error
+                    return
+        finally:
+            self._leave(flight)
+
+    def invoke(self, llm, prompt: str, session: str = "", metrics: Optional[Dict] = None) -> str:
+        """Whole completion text, through the same queue as stream()"""
+        return "".join(chunk.content for chunk in self.stream(llm, prompt, session, metrics))
+
+    def stats(self) -> Dict:
+        """Queue depth, waits and counters for display"""
+        now = time.monotonic()
+        with self._cond:
+            heads = [queue[0].enqueued_at for queue in self._queues.values()]
+            waits = list(self._waits)
+            if self.tokens_per_minute:
+                self._refill(now)
+            return {
+                'running': self._running,
+                'max_concurrency': self.max_concurrency,
+                'queued': sum(len(queue) for queue in self._queues.values()),
+                'queued_sessions': len(self._queues),
+                'oldest_wait_ms': (now - min(heads)) * 1000 if heads else 0.0,
+                'wait_p50_ms': percentile(waits, 0.5) if waits else 0.0,
+                'wait_p95_ms': percentile(waits, 0.95) if waits else 0.0,
+                'requests': self.requests,
+                'coalesced': self.coalesced,
+                'completions': self.completions,
+                'cancelled': self.cancelled,
+                'rate_limits': self.rate_limits,
+                'paused_ms': max(0.0, self._paused_until - now) * 1000,
+                'tokens_available': max(0.0, self._tokens) if self.tokens_per_minute else None
+            }
+
+    def _join(self, llm, prompt: str, session: str) -> Tuple[_Flight, bool]:
+        """Subscribe to the flight for this prompt, queueing a new one if there is none"""
+        key = (id(llm), prompt)
+        with self._cond:
+            self.requests += 1
+            flight = self._flights.get(key)
+            # A finished flight is replayed until it is removed, unless it failed
+            if flight is not None and flight.error is None:
+                flight.subscribers += 1
+                self.coalesced += 1
+                return flight, True
+            flight = _Flight(key, llm, prompt, session, estimate_tokens(prompt) + self.completion_tokens)
+            self._flights[key] = flight
+            self._queues.setdefault(session, deque()).append(flight)
+            self._start_workers()
+            self._cond.notify()
+            return flight, False
+
+    def _leave(self, flight: _Flight) -> None:
+        """Unsubscribe; a queued flight nobody is waiting for is dropped before it costs anything"""
+        with self._cond:
+            flight.subscribers -= 1
+            if flight.subscribers > 0 or flight.admitted_at is not None or flight.done:
+                return
+            queue = self._queues[flight.session]
+            queue.remove(flight)
+            if not queue:
+                del self._queues[flight.session]
+            del self._flights[flight.key]
+            self.cancelled += 1
+            flight.finish()
+
+    def _start_workers(self) -> None:
+        """Start the worker threads on first use; called with the lock held"""
+        while len(self._workers) < self.max_concurrency:
+            worker = threading.Thread(target=self._work, name=f"llm-dispatch-{len(self._workers)}", daemon=True)
+            self._workers.append(worker)
+            worker.start()
+
+    def _work(self) -> None:
+        """Worker loop: admit the next flight, run it, repeat"""
+        while True:
+            self._run(self._admit())
+
+    def _admit(self) -> _Flight:
+        """Wait for the next session's turn and for the budget to cover its flight"""
+        with self._cond:
+            while True:
+                if not self._queues:
+                    self._cond.wait()
+                    continue
+                session = min(self._queues, key=lambda name: self._last_served.get(name, 0.0))
+                queue = self._queues[session]
+                flight = queue[0]
+                delay = self._budget_delay(flight.cost)
+                if delay > 0:
+                    self._cond.wait(timeout=delay)
+                    continue
+
+                queue.popleft()
+                if not queue:
+                    del self._queues[session]
+                self._last_served[session] = time.monotonic()
+                if len(self._last_served) > SESSION_HISTORY:
+                    self._last_served = {name: served for name, served in self._last_served.items()
+                                         if name in self._queues or name == session}
+                if self.tokens_per_minute:
+                    self._tokens -= flight.cost
+                flight.admitted_at = time.monotonic()
+                self._running += 1
+                wait_seconds = flight.admitted_at - flight.enqueued_at
+                self._waits.append(wait_seconds * 1000)
+                break
+        tracer.record('llm.queue_wait', wait_seconds, cost=flight.cost)
+        return flight
+
+    def _refill(self, now: float) -> None:
+        """Top up the token bucket for the time since the last refill"""
+        self._tokens = min(self.tokens_per_minute,
+                           self._tokens + (now - self._refilled_at) * self.tokens_per_minute / 60)
+        self._refilled_at = now
+
+    def _budget_delay(self, cost: int) -> float:
+        """Seconds until a flight of this cost may start; 0 if it may start now"""
+        now = time.monotonic()
+        if self._paused_until > now:
+            return self._paused_until - now
+        if not self.tokens_per_minute:
+            return 0.0
+        self._refill(now)
+        # A prompt larger than the whole budget waits for a full bucket rather than forever
+        needed = min(cost, self.tokens_per_minute)
+        if self._tokens >= needed:
+            return 0.0
+        return (needed - self._tokens) * 60 / self.tokens_per_minute
+
+    def _on_rate_limit(self, attempt: int) -> float:
+        """Pause admissions after a 429 and return the pause in seconds"""
+        delay = min(self.retry_delay * (2 ** (attempt - 1)), self.max_retry_delay)
+        with self._cond:
+            self.rate_limits += 1
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+            if self.tokens_per_minute:
+                # The provider's window is spent, whatever our estimate says
+                self._tokens = min(self._tokens, 0.0)
+        return delay
+
+    def _abandon(self, flight: _Flight) -> bool:
+        """Unlist a running flight nobody is subscribed to, so no one joins a truncated answer"""
+        with self._cond:
+            if flight.subscribers > 0:
+                return False
+            if self._flights.get(flight.key) is flight:
+                del self._flights[flight.key]
+            self.cancelled += 1
+            return True
+
+    def _run(self, flight: _Flight) -> None:
+        """Stream a completion into its flight, retrying 429s that arrive before any output"""
+        attempt = 0
+        usage = None
+        try:
+            while True:
+                try:
+                    for chunk in flight.llm.stream(flight.prompt):
+                        usage = getattr(chunk, 'usage_metadata', None) or usage
+                        flight.push(chunk)
+                        if flight.subscribers == 0 and self._abandon(flight):
+                            break  # Everyone left; stop paying for tokens nobody will read
+                    flight.finish()
+                    return
+                except Exception as e:
+                    attempt += 1
+                    if flight.chunks or attempt > self.max_retries or not is_rate_limit_error(e):
+                        flight.finish(e)
+                        return
+                    time.sleep(self._on_rate_limit(attempt))
+        finally:
+            with self._cond:
+                self._running -= 1
+                self.completions += 1
+                if self.tokens_per_minute and usage and usage.get('total_tokens'):
+                    self._tokens += flight.cost - usage['total_tokens']
+                if self._flights.get(flight.key) is flight:
+                    del self._flights[flight.key]
+                self._cond.notify_all()
@@ -0,0 +1,111 @@
+"""
+Parallel Loader
+Reads and splits code files on a worker pool, yielding results in input order
+"""
+
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Iterator, List, NamedTuple, Optional
+
+from langchain_core.documents import Document
+
+from chunker import MAX_CHUNK_CHARS, MIN_CHUNK_CHARS, chunk_code
+from symbols import Symbol, extract_symbols
+
+
+class LoadedFile(NamedTuple):
+    """Result of reading and splitting one file"""
+    file_path: Path
+    documents: List[Document]
+    error: Optional[str]
+    symbols: List[Symbol]
+    read_seconds: float = 0.0
+    split_seconds: float = 0.0
+
+
+def read_text_file(file_path: Path) -> str:
+    """Read a file from disk, ignoring undecodable bytes"""
+    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+        return f.read()
+
+
+def read_and_split(file_path: Path, base_path: Path, max_chunk_chars: int = MAX_CHUNK_CHARS,
+                   min_chunk_chars: int = MIN_CHUNK_CHARS,
+                   reader: Callable[[Path], str] = read_text_file) -> LoadedFile:
+    """Read one file, split it into chunk documents and extract its symbols"""
+    started = time.perf_counter()
+    read_seconds = 0.0
+    try:
+        # Read file content
+        content = reader(file_path)
+        read_seconds = time.perf_counter() - started
+
+        # Create relative path for metadata
+        relative_path = file_path.relative_to(base_path)
+
+        # Split content on definition boundaries
+        chunks = chunk_code(content, file_path.suffix, max_chunk_chars, min_chunk_chars)
+
+        documents = [
+            Document(
+                page_content=chunk.text,
+                metadata={
+                    'source': str(relative_path),
+                    'file_type': file_path.suffix,
+                    'chunk_index': chunk_idx,
+                    'start_line': chunk.start_line,
+                    'end_line': chunk.end_line
+                }
+            )
+            for chunk_idx, chunk in enumerate(chunks)
+        ]
+        symbols = extract_symbols(content, str(relative_path), file_path.suffix)
+        split_seconds = time.perf_counter() - started - read_seconds
+        return LoadedFile(file_path, documents, None, symbols, read_seconds, split_seconds)
+
+    except Exception as e:
+        return LoadedFile(file_path, [], str(e), [], read_seconds)
+
+
+def _make_executor(max_workers: int, use_processes: bool) -> Executor:
+    """Thread pool for I/O-heavy trees, process pool to parallelize splitting"""
+    if use_processes:
+        return ProcessPoolExecutor(max_workers=max_workers)
+    return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="loader")
+
+
+def iter_loaded_files(files: List[Path], base_path: Path, max_workers: int = 4,
+                      use_processes: bool = False, max_chunk_chars: int = MAX_CHUNK_CHARS,
+                      min_chunk_chars: int = MIN_CHUNK_CHARS,
+                      reader: Callable[[Path], str] = read_text_file) -> Iterator[LoadedFile]:
+    """Yield LoadedFile results in the same order as files
+
+    At most a few tasks per worker are in flight, so memory stays bounded
+    even for very large file lists. A custom reader must be picklable
+    when use_processes is set.
+    """
+    if max_workers <= 1:
+        for file_path in files:
+            yield read_and_split(file_path, base_path, max_chunk_chars, min_chunk_chars, reader)
+        return
+
+    window = max_workers * 4
+    with _make_executor(max_workers, use_processes) as executor:
+        pending = deque()
+        file_iter = iter(files)
+
+        for file_path in file_iter:
+            pending.append(executor.submit(read_and_split, file_path, base_path, max_chunk_chars, min_chunk_chars,
+                                           reader))
+            if len(pending) >= window:
+                break
+
+        while pending:
+            result = pending.popleft().result()
+            next_path = next(file_iter, None)
+            if next_path is not None:
+                pending.append(executor.submit(read_and_split, next_path, base_path, max_chunk_chars,
+                                               min_chunk_chars, reader))
+            yield result
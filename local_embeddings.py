@@ -0,0 +1,115 @@
+"""
+Local Embeddings
+Sentence embeddings computed on the CPU with ONNX Runtime, as an alternative to the Gemini API
+"""
+
+import os
+import threading
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+LOCAL_MODEL_FILES = ('onnx/model.onnx', 'tokenizer.json')
+LOCAL_MAX_TOKENS = 256  # MiniLM was trained on up to 256 word pieces
+
+
+def download_local_model(model: str, cache_dir: Optional[str] = None) -> Tuple[Path, Path]:
+    """Fetch a sentence-transformers model's ONNX export and tokenizer from the Hugging Face Hub"""
+    from huggingface_hub import hf_hub_download
+    model_path, tokenizer_path = (Path(hf_hub_download(model, filename, cache_dir=cache_dir))
+                                  for filename in LOCAL_MODEL_FILES)
+    return model_path, tokenizer_path
+
+
+def resolve_local_model(model: str, cache_dir: Optional[str] = None) -> Tuple[Path, Path]:
+    """model.onnx and tokenizer.json for a model: a local directory, or a Hub id downloaded once"""
+    directory = Path(model)
+    if directory.is_dir():
+        for model_path in (directory / 'model.onnx', directory / 'onnx' / 'model.onnx'):
+            if model_path.exists():
+                return model_path, directory / 'tokenizer.json'
+        raise FileNotFoundError(f"No model.onnx in {directory}")
+    return download_local_model(model, cache_dir)
+
+
+class LocalOnnxEmbeddings(Embeddings):
+    """Sentence embeddings computed on the CPU with ONNX Runtime: mean-pooled, L2-normalized
+
+    The model loads on first use. Texts are sorted by length so each batch
+    pads to similar lengths, and ONNX Runtime spreads each batch over
+    threads cores. Sessions are thread-safe, so one instance is shared.
+    """
+
+    def __init__(self, model: str, batch_size: int = 32, threads: Optional[int] = None,
+                 max_tokens: int = LOCAL_MAX_TOKENS, cache_dir: Optional[str] = None):
+        self.model = model
+        self.batch_size = batch_size
+        self.threads = threads or os.cpu_count() or 1
+        self.max_tokens = max_tokens
+        self.cache_dir = cache_dir
+        self._session = None
+        self._tokenizer = None
+        self._input_names: List[str] = []
+        self._lock = threading.Lock()
+
+    def _load(self) -> None:
+        """Open the ONNX session and tokenizer once"""
+        with self._lock:
+            if self._session is not None:
+                return
+            try:
+                # Optional and imported on first use: only the local provider needs them
+                import onnxruntime
+                from tokenizers import Tokenizer
+            except ImportError:
+                raise ImportError("The local embedding provider needs onnxruntime and tokenizers installed")
+            model_path, tokenizer_path = resolve_local_model(self.model, self.cache_dir)
+            tokenizer = Tokenizer.from_file(str(tokenizer_path))
+            tokenizer.enable_truncation(max_length=self.max_tokens)
+            pad_id = tokenizer.token_to_id('[PAD]')
+            tokenizer.enable_padding(pad_id=pad_id or 0, pad_token='[PAD]')
+
+            options = onnxruntime.SessionOptions()
+            options.intra_op_num_threads = self.threads
+            options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+            session = onnxruntime.InferenceSession(str(model_path), sess_options=options,
+                                                   providers=['CPUExecutionProvider'])
+            self._input_names = [model_input.name for model_input in session.get_inputs()]
+            self._tokenizer = tokenizer
+            self._session = session
+
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        """One forward pass over a padded batch"""
+        encodings = self._tokenizer.encode_batch(texts)
+        input_ids = np.array([encoding.ids for encoding in encodings], dtype=np.int64)
+        attention_mask = np.array([encoding.attention_mask for encoding in encodings], dtype=np.int64)
+        feeds = {'input_ids': input_ids, 'attention_mask': attention_mask}
+        if 'token_type_ids' in self._input_names:
+            feeds['token_type_ids'] = np.zeros_like(input_ids)
+        output = self._session.run(None, {name: feeds[name] for name in self._input_names})[0]
+
+        if output.ndim == 3:
+            # Token embeddings: average over the real (unpadded) tokens
+            mask = attention_mask[:, :, None].astype(output.dtype)
+            output = (output * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        norms = np.linalg.norm(output, axis=1, keepdims=True)
+        return output / np.clip(norms, 1e-12, None)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts in length-sorted batches, returned in input order"""
+        if not texts:
+            return []
+        self._load()
+        order = sorted(range(len(texts)), key=lambda idx: len(texts[idx]))
+        vectors: List[Optional[List[float]]] = [None] * len(texts)
+        for start in range(0, len(order), self.batch_size):
+            batch = order[start:start + self.batch_size]
+            for idx, vector in zip(batch, self._embed_batch([texts[idx] for idx in batch])):
+                vectors[idx] = vector.tolist()
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        """Queries and documents share one encoder"""
+        return self.embed_documents([text])[0]
@@ -0,0 +1,109 @@
+"""
+Index Manifests
+Per-collection record of indexed files, used for incremental re-indexing
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+MANIFEST_DIR = "./chroma_db/manifests"
+
+
+def file_content_hash(file_path: Path) -> str:
+    """SHA-256 of a file's bytes"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def chunk_id(relative_path: str, chunk_index: int) -> str:
+    """Stable vector id for a chunk of a file"""
+    return f"{relative_path}#{chunk_index}"
+
+
+def manifest_version(files: Dict[str, Dict]) -> str:
+    """Short fingerprint of indexed contents; changes whenever any file does"""
+    digest = hashlib.sha256()
+    for relative_path in sorted(files):
+        digest.update(f"{relative_path}\0{files[relative_path]['hash']}\n".encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+def manifest_path(collection_name: str, manifest_dir: str = MANIFEST_DIR) -> Path:
+    """Location of the manifest for a collection"""
+    return Path(manifest_dir) / f"{collection_name}.json"
+
+
+def load_manifest(collection_name: str, manifest_dir: str = MANIFEST_DIR) -> Optional[Dict[str, Dict]]:
+    """Load the manifest for a collection, or None if it was never indexed"""
+    path = manifest_path(collection_name, manifest_dir)
+    if not path.exists():
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f).get('files', {})
+    except (OSError, ValueError) as e:
+        print(f"Ignoring unreadable manifest {path}: {str(e)}")
+        return None
+
+
+def save_manifest(collection_name: str, files: Dict[str, Dict], manifest_dir: str = MANIFEST_DIR) -> None:
+    """Atomically write the manifest for a collection"""
+    path = manifest_path(collection_name, manifest_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix('.json.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': 1, 'files': files}, f, indent=1, sort_keys=True)
+    tmp_path.replace(path)
+
+
+def delete_manifest(collection_name: str, manifest_dir: str = MANIFEST_DIR) -> None:
+    """Forget a collection's manifest, so its next index starts from scratch"""
+    manifest_path(collection_name, manifest_dir).unlink(missing_ok=True)
+
+
+def scan_files(files: List[Path], base_path: Path, previous: Optional[Dict[str, Dict]] = None,
+               stats: Optional[Dict[Path, os.stat_result]] = None,
+               content_hash_fn: Callable[[Path], str] = file_content_hash) -> Dict[str, Dict]:
+    """Build manifest entries (hash, mtime, size) for the collected files"""
+    previous = previous or {}
+    stats = stats or {}
+    entries = {}
+    for file_path in files:
+        relative_path = str(file_path.relative_to(base_path))
+        stat = stats.get(file_path) or file_path.stat()
+        old = previous.get(relative_path)
+
+        # Same size and mtime as last time: trust the recorded hash
+        if old and old.get('size') == stat.st_size and old.get('mtime') == stat.st_mtime:
+            content_hash = old['hash']
+        else:
+            content_hash = content_hash_fn(file_path)
+
+        entries[relative_path] = {
+            'hash': content_hash,
+            'mtime': stat.st_mtime,
+            'size': stat.st_size,
+            'chunk_ids': []
+        }
+    return entries
+
+
+def diff_manifest(previous: Dict[str, Dict], current: Dict[str, Dict]) -> Dict[str, List[str]]:
+    """Classify files as added, changed, removed or unchanged; a new chunker version counts as a change"""
+    diff = {'added': [], 'changed': [], 'removed': [], 'unchanged': []}
+    for relative_path, entry in current.items():
+        old = previous.get(relative_path)
+        if old is None:
+            diff['added'].append(relative_path)
+        elif old['hash'] != entry['hash'] or old.get('chunker') != entry.get('chunker'):
+            diff['changed'].append(relative_path)
+        else:
+            diff['unchanged'].append(relative_path)
+    diff['removed'] = [path for path in previous if path not in current]
+    return diff
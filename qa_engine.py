@@ -0,0 +1,270 @@
+"""
+Q&A Engine
+UI-independent RAG pipeline: symbol lookups, hybrid retrieval, context packing and batched answering
+"""
+
+import contextvars
+import inspect
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import TYPE_CHECKING, Dict, Iterator, List, NamedTuple, Optional, Set, Tuple, Union
+
+from langchain_core.documents import Document
+
+from context_builder import ContextBlock, block_sources, pack_context, render_prompt
+from embedding_pipeline import is_rate_limit_error
+from embedding_providers import EmbeddingModelMismatch, EmbeddingSpec
+from compact_store import CompactVectorStore
+from indexer import open_search_store
+from lexical_index import LexicalIndex, lexical_index_path
+from llm_dispatcher import LLMDispatcher
+from retrieval import hybrid_search
+from symbols import SymbolIndex, answer_lookup, symbol_index_path
+from tracing import tracer
+
+if TYPE_CHECKING:
+    from langchain_community.vectorstores import Chroma
+    from langchain_core.embeddings import Embeddings
+
+DEFAULT_TOP_K = 8
+DEFAULT_CANDIDATES = 20
+DEFAULT_TOKEN_BUDGET = 2500
+NO_RESULTS_ANSWER = "No relevant code found for your question."
+
+
+class QAEngineError(Exception):
+    """Raised when a collection cannot be opened for answering"""
+
+
+class Answer(NamedTuple):
+    """One answered question; path is 'symbol', 'rag' or 'empty', timings are in milliseconds"""
+    index: int
+    question: str
+    answer: Optional[str]
+    sources: List[Dict]
+    path: str
+    timings: Dict[str, float]
+    error: Optional[str] = None
+
+
+class _Prepared(NamedTuple):
+    """A question with its prompt built, waiting for an LLM slot"""
+    index: int
+    question: str
+    prompt: str
+    sources: List[Dict]
+    timings: Dict[str, float]
+    queued_at: float
+
+
+def embed_questions(embeddings: "Embeddings", questions: List[str]) -> List[List[float]]:
+    """Embed many questions in one batched call, as queries where the provider distinguishes them"""
+    # Queries skip the embedding cache wrapper, as embed_query does
+    underlying = getattr(embeddings, 'underlying', embeddings)
+    if 'task_type' in inspect.signature(underlying.embed_documents).parameters:
+        return underlying.embed_documents(questions, task_type='RETRIEVAL_QUERY')
+    return underlying.embed_documents(questions)
+
+
+def _elapsed_ms(started: float) -> float:
+    """Milliseconds since a perf_counter reading"""
+    return (time.perf_counter() - started) * 1000
+
+
+class QAEngine:
+    """Answers questions about one indexed collection; safe to share between threads"""
+
+    def __init__(self, vector_store: Union["Chroma", CompactVectorStore], lexical_index: Optional[LexicalIndex],
+                 symbol_index: Optional[SymbolIndex], llm=None, top_k: int = DEFAULT_TOP_K,
+                 candidates: int = DEFAULT_CANDIDATES, token_budget: int = DEFAULT_TOKEN_BUDGET,
+                 llm_max_retries: int = 3, llm_retry_delay: float = 1.0,
+                 dispatcher: Optional[LLMDispatcher] = None):
+        self.vector_store = vector_store
+        self.lexical_index = lexical_index
+        self.symbol_index = symbol_index
+        self.llm = llm
+        self.top_k = top_k
+        self.candidates = candidates
+        self.token_budget = token_budget
+        self.llm_max_retries = llm_max_retries
+        self.llm_retry_delay = llm_retry_delay
+        self.dispatcher = dispatcher
+
+    @classmethod
+    def open(cls, collection_name: str, embeddings: "Embeddings", persist_directory: str, llm=None,
+             client=None, embedding_spec: Optional[EmbeddingSpec] = None, compact: bool = False,
+             index_version: Optional[str] = None, **options) -> "QAEngine":
+        """Engine over a persisted collection and its side indexes; embedding_spec must match the collection's
+
+        With compact, search uses the collection's compact snapshot when it
+        is at index_version (or any version if None), falling back to Chroma.
+        """
+        try:
+            vector_store = open_search_store(collection_name, embeddings, persist_directory, client, embedding_spec,
+                                             compact, index_version)
+        except EmbeddingModelMismatch as e:
+            raise QAEngineError(str(e))
+        if len(vector_store) == 0:
+            raise QAEngineError(f"Collection {collection_name} is empty or has not been indexed")
+        return cls(
+            vector_store,
+            LexicalIndex.load(lexical_index_path(collection_name, persist_directory)),
+            SymbolIndex.load(symbol_index_path(collection_name, persist_directory)),
+            llm=llm,
+            **options
+        )
+
+    def lookup(self, question: str) -> Optional[Tuple[str, List[Dict]]]:
+        """Answer "where is X defined" / "what calls X" straight from the symbol table"""
+        if self.symbol_index is None:
+            return None
+        with tracer.span('qa.symbol_lookup') as span:
+            answer = answer_lookup(self.symbol_index, question)
+            span['hit'] = answer is not None
+        return answer
+
+    def retrieve(self, question: str, question_embedding: Optional[List[float]] = None) -> List[Document]:
+        """Fuse vector and BM25 results, reusing the question embedding if there is one"""
+        with tracer.span('qa.search', k=self.top_k) as span:
+            docs = hybrid_search(self.vector_store, self.lexical_index, question, question_embedding,
+                                 k=self.top_k, candidates=self.candidates)
+            span['results'] = len(docs)
+        return docs
+
+    def build_prompt(self, question: str, docs: List[Document]) -> Tuple[str, List[Dict], List[ContextBlock]]:
+        """Pack retrieved chunks into the prompt; also returns the sources and blocks used"""
+        with tracer.span('qa.prompt') as span:
+            # Merge adjacent chunks, drop duplicates and pack the best blocks into the budget
+            blocks = pack_context(docs, self.token_budget)
+            span['blocks'] = len(blocks)
+            return render_prompt(question, blocks), block_sources(blocks), blocks
+
+    def generate(self, prompt: str, session: str = "") -> str:
+        """Complete a prompt, retrying when the provider rate-limits
+
+        With a dispatcher, the call waits in session's queue and the
+        dispatcher handles rate limits for every caller at once.
+        """
+        if self.dispatcher is not None:
+            with tracer.span('qa.llm_completion', dispatched=True):
+                return self.dispatcher.invoke(self.llm, prompt, session)
+        attempt = 0
+        while True:
+            try:
+                with tracer.span('qa.llm_completion', attempt=attempt + 1):
+                    return self.llm.invoke(prompt).content
+            except Exception as e:
+                attempt += 1
+                if attempt > self.llm_max_retries or not is_rate_limit_error(e):
+                    raise
+                time.sleep(self.llm_retry_delay * (2 ** (attempt - 1)))
+
+    def answer(self, question: str, question_embedding: Optional[List[float]] = None, index: int = 0,
+               session: str = "") -> Answer:
+        """Answer one question end to end"""
+        started = time.perf_counter()
+        with tracer.span('qa.answer') as span:
+            lookup = self.lookup(question)
+            if lookup:
+                span['path'] = 'symbol'
+                return Answer(index, question, lookup[0], lookup[1], 'symbol', {'total_ms': _elapsed_ms(started)})
+            try:
+                prepared = self._prepare(index, question, question_embedding, started)
+                if isinstance(prepared, Answer):
+                    span['path'] = prepared.path
+                    return prepared
+                span['path'] = 'rag'
+                return self._generate(prepared, started, session)
+            except Exception as e:
+                return Answer(index, question, None, [], 'rag', {'total_ms': _elapsed_ms(started)}, str(e))
+
+    def answer_batch(self, questions: List[str], retrieval_workers: int = 8,
+                     llm_workers: int = 4, session: str = "") -> Iterator[Answer]:
+        """Answer many questions, yielding each as soon as it is done (not in input order)
+
+        Symbol lookups are answered first. Remaining questions are embedded
+        in one batched call, retrieved concurrently, and sent to the LLM
+        through a pool of at most llm_workers, so provider concurrency stays
+        bounded however large the batch is. With a dispatcher, the batch also
+        queues as session behind the process-wide LLM budget.
+        """
+        started = time.perf_counter()
+        pending_questions = []
+        for index, question in enumerate(questions):
+            lookup = self.lookup(question)
+            if lookup:
+                yield Answer(index, question, lookup[0], lookup[1], 'symbol', {'total_ms': _elapsed_ms(started)})
+            else:
+                pending_questions.append((index, question))
+        if not pending_questions:
+            return
+
+        embed_started = time.perf_counter()
+        try:
+            with tracer.span('qa.embed_batch', questions=len(pending_questions)):
+                question_embeddings = embed_questions(self.vector_store.embeddings,
+                                                      [question for _, question in pending_questions])
+        except Exception as e:
+            # Without embeddings, each retrieval embeds its own question
+            print(f"Batched question embedding failed, embedding one at a time: {str(e)}")
+            question_embeddings = [None] * len(pending_questions)
+        embed_ms = _elapsed_ms(embed_started)
+
+        with ThreadPoolExecutor(max_workers=retrieval_workers, thread_name_prefix="qa-retrieve") as retrieval_pool, \
+                ThreadPoolExecutor(max_workers=llm_workers, thread_name_prefix="qa-llm") as llm_pool:
+            futures: Set[Future] = set()
+            for (index, question), question_embedding in zip(pending_questions, question_embeddings):
+                future = retrieval_pool.submit(contextvars.copy_context().run, self._prepare_safely, index,
+                                               question, question_embedding, started)
+                futures.add(future)
+
+            while futures:
+                done, futures = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result = future.result()
+                    if isinstance(result, _Prepared):
+                        result.timings['embed_ms'] = embed_ms
+                        futures.add(llm_pool.submit(contextvars.copy_context().run, self._generate,
+                                                    result, started, session))
+                    else:
+                        if result.path != 'symbol':
+                            result.timings.setdefault('embed_ms', embed_ms)
+                        yield result
+
+    def _prepare(self, index: int, question: str, question_embedding: Optional[List[float]],
+                 started: float) -> Union[Answer, _Prepared]:
+        """Retrieve and build the prompt, or finish early when nothing relevant is found"""
+        timings: Dict[str, float] = {}
+        step = time.perf_counter()
+        docs = self.retrieve(question, question_embedding)
+        timings['search_ms'] = _elapsed_ms(step)
+        if not docs:
+            timings['total_ms'] = _elapsed_ms(started)
+            return Answer(index, question, NO_RESULTS_ANSWER, [], 'empty', timings)
+
+        step = time.perf_counter()
+        prompt, sources, _ = self.build_prompt(question, docs)
+        timings['prompt_ms'] = _elapsed_ms(step)
+        return _Prepared(index, question, prompt, sources, timings, time.perf_counter())
+
+    def _generate(self, prepared: _Prepared, started: float, session: str = "") -> Answer:
+        """Run the LLM for a prepared question"""
+        timings = prepared.timings
+        timings['queue_ms'] = _elapsed_ms(prepared.queued_at)
+        step = time.perf_counter()
+        try:
+            text = self.generate(prepared.prompt, session)
+            error = None
+        except Exception as e:
+            text, error = None, str(e)
+        timings['llm_ms'] = _elapsed_ms(step)
+        timings['total_ms'] = _elapsed_ms(started)
+        return Answer(prepared.index, prepared.question, text, prepared.sources, 'rag', timings, error)
+
+    def _prepare_safely(self, index: int, question: str, question_embedding: Optional[List[float]],
+                        started: float) -> Union[Answer, _Prepared]:
+        """_prepare for pool workers: failures become error answers"""
+        try:
+            return self._prepare(index, question, question_embedding, started)
+        except Exception as e:
+            return Answer(index, question, None, [], 'rag', {'total_ms': _elapsed_ms(started)}, str(e))
@@ -0,0 +1,58 @@
+"""
+Retrieval
+Hybrid vector + BM25 search fused with reciprocal-rank fusion
+"""
+
+from typing import TYPE_CHECKING, Dict, List, Optional, Union
+
+from langchain_core.documents import Document
+
+from compact_store import CompactVectorStore
+from lexical_index import LexicalIndex, reciprocal_rank_fusion
+from manifest import chunk_id
+
+if TYPE_CHECKING:
+    from langchain_community.vectorstores import Chroma
+
+
+def document_chunk_id(doc: Document) -> str:
+    """Vector id of a retrieved chunk, derived from its metadata"""
+    return chunk_id(doc.metadata.get('source', ''), doc.metadata.get('chunk_index', 0))
+
+
+def fetch_documents(vector_store: Union["Chroma", CompactVectorStore], ids: List[str]) -> Dict[str, Document]:
+    """Load chunks by id from the collection"""
+    if not ids:
+        return {}
+    result = vector_store.get(ids=ids, include=['documents', 'metadatas'])
+    return {
+        doc_id: Document(page_content=content, metadata=metadata or {})
+        for doc_id, content, metadata in zip(result['ids'], result['documents'], result['metadatas'])
+    }
+
+
+def hybrid_search(vector_store: Union["Chroma", CompactVectorStore], lexical_index: Optional[LexicalIndex], question: str,
+                  question_embedding: Optional[List[float]] = None, k: int = 5,
+                  candidates: int = 20, rrf_k: int = 60) -> List[Document]:
+    """Top-k chunks by fusing vector similarity and BM25 rankings
+
+    Falls back to plain vector search when the collection has no lexical index.
+    """
+    vector_k = candidates if lexical_index else k
+    if question_embedding is not None:
+        vector_docs = vector_store.similarity_search_by_vector(question_embedding, k=vector_k)
+    else:
+        vector_docs = vector_store.similarity_search(question, k=vector_k)
+
+    if not lexical_index:
+        return vector_docs
+
+    docs_by_id = {document_chunk_id(doc): doc for doc in vector_docs}
+    lexical_ids = [doc_id for doc_id, _ in lexical_index.search(question, k=candidates)]
+
+    fused = reciprocal_rank_fusion([list(docs_by_id), lexical_ids], k=rrf_k)[:k]
+    top_ids = [doc_id for doc_id, _ in fused]
+
+    # Chunks found only lexically still need their text from the store
+    docs_by_id.update(fetch_documents(vector_store, [doc_id for doc_id in top_ids if doc_id not in docs_by_id]))
+    return [docs_by_id[doc_id] for doc_id in top_ids if doc_id in docs_by_id]
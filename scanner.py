@@ -0,0 +1,282 @@
+"""
+Directory Scanner
+Single-pass os.scandir walker that prunes ignored directories before descending
+"""
+
+import os
+import re
+import time
+import zipfile
+from pathlib import Path, PurePosixPath
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+
+class GitIgnoreRule(NamedTuple):
+    """One compiled .gitignore pattern, relative to the directory it came from"""
+    base: str
+    regex: "re.Pattern"
+    negate: bool
+    dir_only: bool
+
+
+class MemberStat(NamedTuple):
+    """The parts of os.stat_result the indexer uses, taken from a ZIP central directory"""
+    st_size: int
+    st_mtime: float
+
+
+class ScanResult(NamedTuple):
+    """Everything index_codebase needs from one walk of the tree"""
+    files: List[Path]
+    stats: Dict[Path, os.stat_result]  # MemberStat for archive members
+    total_size_bytes: int
+    skipped_large: List[Path]
+    truncated: bool
+    over_budget: bool
+
+
+def _translate_glob(pattern: str) -> str:
+    """Translate a gitignore glob to a regex over '/'-separated paths"""
+    regex = ''
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if pattern.startswith('**/', i):
+            regex += '(?:.*/)?'
+            i += 3
+        elif pattern.startswith('/**', i) and i + 3 == len(pattern):
+            regex += '/.*'
+            i += 3
+        elif pattern.startswith('**', i):
+            regex += '.*'
+            i += 2
+        elif char == '*':
+            regex += '[^/]*'
+            i += 1
+        elif char == '?':
+            regex += '[^/]'
+            i += 1
+        elif char == '[':
+            end = pattern.find(']', i + 1)
+            if end == -1:
+                regex += re.escape(char)
+                i += 1
+            else:
+                body = pattern[i + 1:end]
+                if body.startswith('!'):
+                    body = '^' + body[1:]
+                regex += f'[{body}]'
+                i = end + 1
+        elif char == '\\' and i + 1 < len(pattern):
+            regex += re.escape(pattern[i + 1])
+            i += 2
+        else:
+            regex += re.escape(char)
+            i += 1
+    return regex
+
+
+def parse_gitignore(text: str, base: str = '') -> List[GitIgnoreRule]:
+    """Compile the rules of a .gitignore file located at base (relative, '' for root)"""
+    rules = []
+    for line in text.splitlines():
+        line = line.rstrip()
+        if not line or line.startswith('#'):
+            continue
+
+        negate = line.startswith('!')
+        if negate:
+            line = line[1:]
+        dir_only = line.endswith('/')
+        line = line.rstrip('/')
+        if not line:
+            continue
+
+        # A slash anywhere but the end anchors the pattern to its directory
+        anchored = '/' in line
+        line = line.lstrip('/')
+        prefix = '' if anchored else '(?:.*/)?'
+        rules.append(GitIgnoreRule(base, re.compile(prefix + _translate_glob(line) + r'\Z'), negate, dir_only))
+    return rules
+
+
+def is_ignored(relative_path: str, is_dir: bool, rules: List[GitIgnoreRule]) -> bool:
+    """Apply rules in order; the last matching rule wins"""
+    ignored = False
+    for rule in rules:
+        if rule.dir_only and not is_dir:
+            continue
+        if rule.base:
+            if not relative_path.startswith(rule.base + '/'):
+                continue
+            candidate = relative_path[len(rule.base) + 1:]
+        else:
+            candidate = relative_path
+        if rule.regex.match(candidate):
+            ignored = not rule.negate
+    return ignored
+
+
+def _load_gitignore(directory: str, base: str) -> List[GitIgnoreRule]:
+    """Rules from directory/.gitignore, if present"""
+    try:
+        with open(os.path.join(directory, '.gitignore'), 'r', encoding='utf-8', errors='ignore') as f:
+            return parse_gitignore(f.read(), base)
+    except OSError:
+        return []
+
+
+def scan_codebase(root: Path, extensions: Set[str], ignore_dirs: Set[str],
+                  max_file_size_bytes: Optional[int] = None, max_files: Optional[int] = None,
+                  max_total_bytes: Optional[int] = None, respect_gitignore: bool = True) -> ScanResult:
+    """Walk root once, collecting candidate files and the total size of non-ignored files
+
+    Ignored directories are never entered, each entry is stat'ed at most
+    once, and the walk stops early once max_total_bytes is exceeded.
+    Entries are visited in sorted order so truncation is deterministic.
+    """
+    files: List[Path] = []
+    stats: Dict[Path, os.stat_result] = {}
+    skipped_large: List[Path] = []
+    total_size = 0
+    truncated = False
+
+    root_rules = _load_gitignore(str(root), '') if respect_gitignore else []
+    stack: List[Tuple[str, str, List[GitIgnoreRule]]] = [(str(root), '', root_rules)]
+
+    while stack:
+        directory, relative_dir, rules = stack.pop()
+        try:
+            with os.scandir(directory) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+        except OSError as e:
+            print(f"Skipping unreadable directory {directory}: {str(e)}")
+            continue
+
+        subdirs = []
+        for entry in entries:
+            relative_path = f"{relative_dir}/{entry.name}" if relative_dir else entry.name
+
+            if entry.is_dir(follow_symlinks=False):
+                if entry.name in ignore_dirs or (rules and is_ignored(relative_path, True, rules)):
+                    continue
+                subdirs.append((entry.path, relative_path))
+                continue
+
+            if not entry.is_file() or (rules and is_ignored(relative_path, False, rules)):
+                continue
+
+            stat = entry.stat()
+            total_size += stat.st_size
+            if max_total_bytes is not None and total_size > max_total_bytes:
+                return ScanResult(files, stats, total_size, skipped_large, truncated, True)
+
+            if truncated or os.path.splitext(entry.name)[1] not in extensions:
+                continue
+
+            file_path = Path(entry.path)
+            if max_file_size_bytes is not None and stat.st_size > max_file_size_bytes:
+                skipped_large.append(file_path)
+                continue
+
+            files.append(file_path)
+            stats[file_path] = stat
+            if max_files is not None and len(files) >= max_files:
+                truncated = True
+
+        # Push in reverse so directories are visited in sorted order
+        for subdir, relative_path in reversed(subdirs):
+            child_rules = rules + _load_gitignore(subdir, relative_path) if respect_gitignore else rules
+            stack.append((subdir, relative_path, child_rules))
+
+    return ScanResult(files, stats, total_size, skipped_large, truncated, False)
+
+
+def zip_member_root(names: List[str]) -> str:
+    """Prefix of a single top-level folder shared by every member ('' if there is none)"""
+    tops = {name.split('/', 1)[0] for name in names}
+    if len(tops) == 1 and all('/' in name for name in names):
+        return tops.pop() + '/'
+    return ''
+
+
+def _dfs_key(relative_path: str) -> List[Tuple[int, str]]:
+    """Sort key reproducing scan_codebase's order: a directory's files, then its subdirectories"""
+    parts = relative_path.split('/')
+    return [(1, part) for part in parts[:-1]] + [(0, parts[-1])]
+
+
+def scan_zip(archive: zipfile.ZipFile, root: Path, prefix: str, extensions: Set[str], ignore_dirs: Set[str],
+             max_file_size_bytes: Optional[int] = None, max_files: Optional[int] = None,
+             max_total_bytes: Optional[int] = None, respect_gitignore: bool = True) -> ScanResult:
+    """scan_codebase over an archive's central directory; no member is decompressed except .gitignore files
+
+    Files are reported as paths under root (which need not exist) so the
+    rest of the pipeline can treat them like files on disk.
+    """
+    members: Dict[str, zipfile.ZipInfo] = {}
+    for info in archive.infolist():
+        if info.is_dir() or not info.filename.startswith(prefix):
+            continue
+        relative_path = info.filename[len(prefix):]
+        parts = relative_path.split('/')
+        if not relative_path or relative_path.startswith('/') or '..' in parts or '' in parts:
+            continue
+        members[relative_path] = info
+
+    gitignores: Dict[str, List[GitIgnoreRule]] = {}
+    if respect_gitignore:
+        for relative_path, info in members.items():
+            if PurePosixPath(relative_path).name == '.gitignore' and info.file_size <= 1024 * 1024:
+                base = str(PurePosixPath(relative_path).parent)
+                base = '' if base == '.' else base
+                text = archive.read(info).decode('utf-8', errors='ignore')
+                gitignores[base] = parse_gitignore(text, base)
+
+    # Directory verdicts and inherited rules, computed once per directory
+    directory_rules: Dict[str, Optional[List[GitIgnoreRule]]] = {'': gitignores.get('', [])}
+
+    def rules_for(directory: str) -> Optional[List[GitIgnoreRule]]:
+        """Rules in effect inside directory, or None if it is pruned"""
+        if directory in directory_rules:
+            return directory_rules[directory]
+        parent, _, name = directory.rpartition('/')
+        parent_rules = rules_for(parent)
+        if parent_rules is None or name in ignore_dirs or (parent_rules and is_ignored(directory, True, parent_rules)):
+            rules = None
+        else:
+            rules = parent_rules + gitignores.get(directory, [])
+        directory_rules[directory] = rules
+        return rules
+
+    files: List[Path] = []
+    stats: Dict[Path, os.stat_result] = {}
+    skipped_large: List[Path] = []
+    total_size = 0
+    truncated = False
+
+    for relative_path in sorted(members, key=_dfs_key):
+        info = members[relative_path]
+        directory = relative_path.rpartition('/')[0]
+        rules = rules_for(directory)
+        if rules is None or (rules and is_ignored(relative_path, False, rules)):
+            continue
+
+        total_size += info.file_size
+        if max_total_bytes is not None and total_size > max_total_bytes:
+            return ScanResult(files, stats, total_size, skipped_large, truncated, True)
+
+        if truncated or os.path.splitext(relative_path)[1] not in extensions:
+            continue
+
+        file_path = root / relative_path
+        if max_file_size_bytes is not None and info.file_size > max_file_size_bytes:
+            skipped_large.append(file_path)
+            continue
+
+        files.append(file_path)
+        stats[file_path] = MemberStat(info.file_size, time.mktime(info.date_time + (0, 0, -1)))
+        if max_files is not None and len(files) >= max_files:
+            truncated = True
+
+    return ScanResult(files, stats, total_size, skipped_large, truncated, False)
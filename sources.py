@@ -0,0 +1,193 @@
+"""
+Codebase Sources
+Reads uploaded ZIPs in place and materializes GitHub repositories on disk for indexing
+"""
+
+import hashlib
+import subprocess
+import tarfile
+import threading
+import zipfile
+from pathlib import Path
+from typing import List
+
+from collections_registry import normalize_repo_url
+from indexer import Codebase
+from scanner import scan_zip, zip_member_root
+
+GIT_CLONE_TIMEOUT_SECONDS = 300
+GIT_LS_REMOTE_TIMEOUT_SECONDS = 30
+REPO_MIRROR_DIR = "./repo_cache"
+
+# Zip-bomb limits, checked against the central directory before anything is decompressed
+ZIP_MAX_MEMBERS = 100000
+ZIP_MAX_UNCOMPRESSED_MB = 1024
+ZIP_MAX_COMPRESSION_RATIO = 100
+ZIP_RATIO_CHECK_MIN_BYTES = 1024 * 1024
+
+
+class SourceError(Exception):
+    """Raised when a codebase cannot be extracted or cloned"""
+
+
+def check_zip_bomb(archive: zipfile.ZipFile) -> None:
+    """Reject archives whose declared sizes are implausible, before reading any member"""
+    members = archive.infolist()
+    if len(members) > ZIP_MAX_MEMBERS:
+        raise SourceError(f"Archive has too many entries ({len(members)}, max: {ZIP_MAX_MEMBERS})")
+
+    total_size = sum(info.file_size for info in members)
+    if total_size > ZIP_MAX_UNCOMPRESSED_MB * 1024 * 1024:
+        raise SourceError(f"Archive expands to {total_size / (1024 * 1024):.0f}MB "
+                          f"(max: {ZIP_MAX_UNCOMPRESSED_MB}MB)")
+
+    for info in members:
+        if info.file_size >= ZIP_RATIO_CHECK_MIN_BYTES and \
+                info.file_size > max(info.compress_size, 1) * ZIP_MAX_COMPRESSION_RATIO:
+            raise SourceError(f"Archive entry {info.filename} has a suspicious compression ratio")
+
+
+def zip_codebase_name(zip_path: Path, file_name: str) -> str:
+    """An archive's single top-level folder, or the uploaded file's name if it has none (or is unreadable)"""
+    try:
+        with zipfile.ZipFile(zip_path, 'r') as archive:
+            prefix = zip_member_root(archive.namelist())
+    except (OSError, zipfile.BadZipFile):
+        prefix = ''
+    return prefix.rstrip('/') or Path(file_name).stem
+
+
+def open_zip_codebase(zip_path: Path, delete_on_close: bool = False) -> Codebase:
+    """Index an archive without extracting it: members are scanned from the central directory and read on demand"""
+    try:
+        archive = zipfile.ZipFile(zip_path, 'r')
+    except Exception as e:
+        if delete_on_close:
+            zip_path.unlink(missing_ok=True)
+        raise SourceError(f"Error opening zip: {str(e)}") from e
+
+    def close() -> None:
+        """Release the archive and, for uploads, the file behind it"""
+        archive.close()
+        if delete_on_close:
+            zip_path.unlink(missing_ok=True)
+
+    try:
+        check_zip_bomb(archive)
+    except SourceError:
+        close()
+        raise
+
+    # Paths under root mirror what extracting the archive's single top-level folder would give
+    prefix = zip_member_root([info.filename for info in archive.infolist()])
+    root = zip_path.parent / (prefix.rstrip('/') or zip_path.stem)
+    members = {info.filename: info for info in archive.infolist()}
+    lock = threading.Lock()
+
+    def member(file_path: Path) -> zipfile.ZipInfo:
+        """Central directory entry for a path under root"""
+        return members[prefix + file_path.relative_to(root).as_posix()]
+
+    def content_hash(file_path: Path) -> str:
+        """CRC and size from the central directory stand in for a content hash"""
+        info = member(file_path)
+        return f"crc32:{info.CRC:08x}:{info.file_size}"
+
+    def read_text(file_path: Path) -> str:
+        """Decompress one member, refusing to inflate past its declared size"""
+        info = member(file_path)
+        with lock:
+            # ZipFile.open is not safe to call from several threads at once
+            handle = archive.open(info)
+        with handle:
+            data = handle.read(info.file_size)
+        return data.decode('utf-8', errors='ignore')
+
+    return Codebase(
+        root=root,
+        scan=lambda **options: scan_zip(archive, root, prefix, **options),
+        content_hash=content_hash,
+        read_text=read_text,
+        allow_processes=False,
+        close=close
+    )
+
+
+def _run_git(args: List[str], timeout: int, action: str) -> str:
+    """Run a git command and return stdout, raising SourceError on failure"""
+    try:
+        result = subprocess.run(['git', *args], capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired as e:
+        raise SourceError(f"Git {action} timeout ({timeout // 60} minutes). Repository too large.") from e
+    except Exception as e:
+        raise SourceError(f"Error during git {action}: {str(e)}") from e
+
+    if result.returncode != 0:
+        raise SourceError(f"Git {action} failed: {result.stderr.strip()}")
+    return result.stdout
+
+
+def resolve_remote_head(url: str, timeout: int = GIT_LS_REMOTE_TIMEOUT_SECONDS) -> str:
+    """Commit sha the remote's HEAD points at, without fetching anything"""
+    output = _run_git(['ls-remote', url, 'HEAD'], timeout, 'ls-remote')
+    for line in output.splitlines():
+        sha, _, ref = line.partition('\t')
+        if ref == 'HEAD':
+            return sha
+    raise SourceError(f"Could not resolve HEAD of {url}")
+
+
+def mirror_path(url: str, mirror_dir: str = REPO_MIRROR_DIR) -> Path:
+    """Bare repository caching a remote's objects between index runs"""
+    digest = hashlib.sha256(normalize_repo_url(url).encode('utf-8')).hexdigest()[:16]
+    return Path(mirror_dir) / f"{digest}.git"
+
+
+def update_mirror(url: str, commit: str, mirror_dir: str = REPO_MIRROR_DIR,
+                  timeout: int = GIT_CLONE_TIMEOUT_SECONDS) -> Path:
+    """Fetch the remote's HEAD into the local mirror, creating it on first use"""
+    mirror = mirror_path(url, mirror_dir)
+    if not (mirror / 'HEAD').exists():
+        mirror.mkdir(parents=True, exist_ok=True)
+        _run_git(['init', '--bare', '--quiet', str(mirror)], timeout, 'init')
+        _run_git(['-C', str(mirror), 'remote', 'add', 'origin', url], timeout, 'remote add')
+    else:
+        _run_git(['-C', str(mirror), 'remote', 'set-url', 'origin', url], timeout, 'remote set-url')
+
+    if not _has_commit(mirror, commit):
+        _run_git(['-C', str(mirror), 'fetch', '--quiet', '--depth', '1', 'origin', 'HEAD'], timeout, 'fetch')
+    if not _has_commit(mirror, commit):
+        # HEAD moved after it was resolved; ask for the exact commit
+        _run_git(['-C', str(mirror), 'fetch', '--quiet', '--depth', '1', 'origin', commit], timeout, 'fetch')
+    return mirror
+
+
+def _has_commit(mirror: Path, commit: str) -> bool:
+    """Whether the mirror already holds a commit"""
+    result = subprocess.run(['git', '-C', str(mirror), 'cat-file', '-e', f"{commit}^{{commit}}"],
+                            capture_output=True)
+    return result.returncode == 0
+
+
+def export_commit(mirror: Path, commit: str, dest: Path, timeout: int = GIT_CLONE_TIMEOUT_SECONDS) -> None:
+    """Write the tree of a commit into dest (no .git directory)"""
+    dest.mkdir(parents=True, exist_ok=True)
+    process = subprocess.Popen(['git', '-C', str(mirror), 'archive', '--format=tar', commit],
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        with tarfile.open(fileobj=process.stdout, mode='r|') as archive:
+            if hasattr(tarfile, 'data_filter'):
+                archive.extractall(dest, filter='data')
+            else:
+                archive.extractall(dest)
+        process.wait(timeout=timeout)
+        error = process.stderr.read().decode('utf-8', 'ignore').strip()
+    except Exception as e:
+        process.kill()
+        raise SourceError(f"Error exporting commit {commit[:12]}: {str(e)}") from e
+    finally:
+        process.stdout.close()
+        process.stderr.close()
+
+    if process.returncode != 0:
+        raise SourceError(f"Git archive failed: {error}")
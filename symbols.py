@@ -0,0 +1,341 @@
+"""
+Symbol Index
+Definitions, imports and call sites per file, for answering lookup questions without the LLM
+"""
+
+import ast
+import gzip
+import json
+import re
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+DEFINITION_KINDS = ('class', 'function', 'method', 'type')
+MAX_SNIPPET_LENGTH = 200
+MAX_LOOKUP_RESULTS = 20
+
+
+class Symbol(NamedTuple):
+    """One definition, import or call site; context is the enclosing scope or imported module"""
+    name: str
+    kind: str
+    path: str
+    line: int
+    context: str
+    snippet: str
+
+
+def _snippet(lines: List[str], line: int) -> str:
+    """Source line for a 1-based line number, trimmed"""
+    if 0 < line <= len(lines):
+        return lines[line - 1].strip()[:MAX_SNIPPET_LENGTH]
+    return ""
+
+
+class _PythonSymbolVisitor(ast.NodeVisitor):
+    """Collects symbols from a Python module, tracking the enclosing scope"""
+
+    def __init__(self, path: str, lines: List[str]):
+        self.path = path
+        self.lines = lines
+        self.scope: List[Tuple[str, str]] = []
+        self.symbols: List[Symbol] = []
+
+    def _add(self, name: str, kind: str, line: int, context: Optional[str] = None) -> None:
+        if context is None:
+            context = ".".join(name for name, _ in self.scope)
+        self.symbols.append(Symbol(name, kind, self.path, line, context, _snippet(self.lines, line)))
+
+    def _visit_function(self, node) -> None:
+        kind = 'method' if self.scope and self.scope[-1][1] == 'class' else 'function'
+        self._add(node.name, kind, node.lineno)
+        self.scope.append((node.name, 'function'))
+        self.generic_visit(node)
+        self.scope.pop()
+
+    visit_FunctionDef = _visit_function
+    visit_AsyncFunctionDef = _visit_function
+
+    def visit_ClassDef(self, node: ast.ClassDef) -> None:
+        self._add(node.name, 'class', node.lineno)
+        self.scope.append((node.name, 'class'))
+        self.generic_visit(node)
+        self.scope.pop()
+
+    def visit_Import(self, node: ast.Import) -> None:
+        for alias in node.names:
+            self._add(alias.name.split('.')[-1], 'import', node.lineno, context=alias.name)
+
+    def visit_ImportFrom(self, node: ast.ImportFrom) -> None:
+        module = "." * node.level + (node.module or "")
+        for alias in node.names:
+            self._add(alias.name, 'import', node.lineno, context=module)
+
+    def visit_Call(self, node: ast.Call) -> None:
+        if isinstance(node.func, ast.Name):
+            self._add(node.func.id, 'call', node.lineno)
+        elif isinstance(node.func, ast.Attribute):
+            self._add(node.func.attr, 'call', node.lineno)
+        self.generic_visit(node)
+
+
+def extract_python_symbols(content: str, path: str) -> List[Symbol]:
+    """Symbols of a Python file via ast; empty if it does not parse"""
+    try:
+        tree = ast.parse(content)
+    except (SyntaxError, ValueError):
+        return []
+    visitor = _PythonSymbolVisitor(path, content.splitlines())
+    visitor.visit(tree)
+    return visitor.symbols
+
+
+# Line-based heuristics for languages without a parser at hand
+JS_DEFINITION_PATTERNS = [
+    ('class', re.compile(r'^\s*(?:export\s+)?(?:default\s+)?(?:abstract\s+)?class\s+([A-Za-z_$][\w$]*)')),
+    ('type', re.compile(r'^\s*(?:export\s+)?(?:interface|type|enum)\s+([A-Za-z_$][\w$]*)')),
+    ('function', re.compile(r'^\s*(?:export\s+)?(?:default\s+)?(?:async\s+)?function\s*\*?\s*([A-Za-z_$][\w$]*)')),
+    ('function', re.compile(r'^\s*(?:export\s+)?(?:const|let|var)\s+([A-Za-z_$][\w$]*)\s*(?::[^=]+)?=\s*'
+                            r'(?:async\s+)?(?:function\b|\([^)]*\)\s*(?::[^=]+)?=>|[A-Za-z_$][\w$]*\s*=>)')),
+    ('method', re.compile(r'^\s+(?:(?:public|private|protected|static|async|readonly|override)\s+)*'
+                          r'([A-Za-z_$][\w$]*)\s*\([^)]*\)\s*(?::\s*[^{]+)?\{\s*$')),
+]
+JS_IMPORT_PATTERNS = [
+    re.compile(r'^\s*import\s+(?P<names>.+?)\s+from\s+[\'"](?P<module>[^\'"]+)[\'"]'),
+    re.compile(r'(?:const|let|var)\s+(?P<names>.+?)\s*=\s*require\(\s*[\'"](?P<module>[^\'"]+)[\'"]\s*\)'),
+]
+GO_DEFINITION_PATTERNS = [
+    ('method', re.compile(r'^func\s+\(\s*\w*\s*\*?(?P<owner>[A-Za-z_]\w*)[^)]*\)\s*([A-Za-z_]\w*)\s*[\[(]')),
+    ('function', re.compile(r'^func\s+([A-Za-z_]\w*)\s*[\[(]')),
+    ('type', re.compile(r'^type\s+([A-Za-z_]\w*)\s')),
+]
+GO_IMPORT_PATTERN = re.compile(r'^\s*(?:import\s+)?(?:([A-Za-z_.]\w*)\s+)?"([^"]+)"\s*$')
+CALL_PATTERN = re.compile(r'([A-Za-z_$][\w$]*)\s*\(')
+CALL_KEYWORDS = frozenset({
+    'if', 'for', 'while', 'switch', 'catch', 'return', 'function', 'typeof', 'new', 'await',
+    'func', 'go', 'defer', 'range', 'make', 'len', 'cap', 'append', 'super', 'import', 'require',
+    'constructor', 'else', 'case', 'delete', 'void', 'yield', 'sizeof', 'select', 'async'
+})
+LINE_COMMENT_PATTERN = re.compile(r'^\s*(?://|\*|/\*)')
+
+
+def _import_names(names: str) -> List[str]:
+    """Local names bound by a JS import/require clause"""
+    bound = []
+    for part in re.split(r'[{},]', names):
+        part = part.strip()
+        if not part or part == '*':
+            continue
+        bound.append(part.split(' as ')[-1].strip().lstrip('* ').strip())
+    return [name for name in bound if re.fullmatch(r'[A-Za-z_$][\w$]*', name)]
+
+
+def extract_heuristic_symbols(content: str, path: str, language: str) -> List[Symbol]:
+    """Line-based symbols for JS/TS ('js') or Go ('go')"""
+    lines = content.splitlines()
+    definition_patterns = GO_DEFINITION_PATTERNS if language == 'go' else JS_DEFINITION_PATTERNS
+    symbols = []
+    in_go_import_block = False
+    current_class = ""
+    current_definition = ""
+
+    for line_no, line in enumerate(lines, start=1):
+        if LINE_COMMENT_PATTERN.match(line):
+            continue
+        snippet = line.strip()[:MAX_SNIPPET_LENGTH]
+
+        if language == 'go':
+            stripped = line.strip()
+            if stripped.startswith('import ('):
+                in_go_import_block = True
+                continue
+            if in_go_import_block and stripped == ')':
+                in_go_import_block = False
+                continue
+            if in_go_import_block or stripped.startswith('import '):
+                match = GO_IMPORT_PATTERN.match(line)
+                if match:
+                    module = match.group(2)
+                    name = match.group(1) or module.rsplit('/', 1)[-1]
+                    symbols.append(Symbol(name, 'import', path, line_no, module, snippet))
+                continue
+        else:
+            matched_import = False
+            for pattern in JS_IMPORT_PATTERNS:
+                match = pattern.search(line)
+                if match:
+                    matched_import = True
+                    for name in _import_names(match.group('names')):
+                        symbols.append(Symbol(name, 'import', path, line_no, match.group('module'), snippet))
+            if matched_import:
+                continue
+
+        defined = None
+        for kind, pattern in definition_patterns:
+            match = pattern.match(line)
+            if not match or match.group(match.lastindex) in CALL_KEYWORDS:
+                continue
+            defined = match.group(match.lastindex)
+            if kind == 'class':
+                current_class = defined
+            if kind == 'method':
+                owner = match.groupdict().get('owner') or current_class
+            else:
+                owner = ""
+            symbols.append(Symbol(defined, kind, path, line_no, owner, snippet))
+            if kind in ('function', 'method'):
+                current_definition = f"{owner}.{defined}" if owner else defined
+            break
+
+        for match in CALL_PATTERN.finditer(line):
+            name = match.group(1)
+            if name == defined or name in CALL_KEYWORDS:
+                continue
+            symbols.append(Symbol(name, 'call', path, line_no, current_definition, snippet))
+
+    return symbols
+
+
+def extract_symbols(content: str, path: str, suffix: str) -> List[Symbol]:
+    """Symbols for a file, dispatched on its extension; other languages yield none"""
+    if suffix == '.py':
+        return extract_python_symbols(content, path)
+    if suffix in ('.js', '.jsx', '.ts', '.tsx'):
+        return extract_heuristic_symbols(content, path, 'js')
+    if suffix == '.go':
+        return extract_heuristic_symbols(content, path, 'go')
+    return []
+
+
+def symbol_index_path(collection_name: str, persist_directory: str) -> Path:
+    """Location of a collection's symbol index"""
+    return Path(persist_directory) / "symbols" / f"{collection_name}.json.gz"
+
+
+class SymbolIndex:
+    """Symbols grouped by file (for incremental updates) and by name (for lookups)"""
+
+    def __init__(self):
+        self.files: Dict[str, List[Symbol]] = {}
+        self._by_name: Optional[Dict[str, List[Symbol]]] = None
+
+    def __len__(self) -> int:
+        return sum(len(symbols) for symbols in self.files.values())
+
+    def set_file(self, path: str, symbols: List[Symbol]) -> None:
+        """Replace the symbols recorded for a file"""
+        self.files[path] = list(symbols)
+        self._by_name = None
+
+    def remove_files(self, paths: List[str]) -> None:
+        """Forget files that were removed or are about to be re-indexed"""
+        for path in paths:
+            self.files.pop(path, None)
+        self._by_name = None
+
+    def lookup(self, name: str, kinds: Tuple[str, ...]) -> List[Symbol]:
+        """Symbols of the given kinds; 'Owner.name' narrows to that enclosing scope"""
+        if self._by_name is None:
+            self._by_name = {}
+            for symbols in self.files.values():
+                for symbol in symbols:
+                    self._by_name.setdefault(symbol.name, []).append(symbol)
+
+        owner, _, short_name = name.rpartition('.')
+        matches = [s for s in self._by_name.get(short_name, []) if s.kind in kinds]
+        if owner:
+            scoped = [s for s in matches if s.context.split('.')[-1] == owner.split('.')[-1]]
+            matches = scoped or matches
+        return sorted(matches, key=lambda s: (s.path, s.line))
+
+    def save(self, path: Path) -> None:
+        """Write the index atomically as gzipped JSON"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix('.tmp')
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+            json.dump({'version': 1, 'files': {p: [list(s) for s in symbols] for p, symbols in self.files.items()}}, f)
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["SymbolIndex"]:
+        """Read an index written by save, or None if missing/unreadable"""
+        if not path.exists():
+            return None
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable symbol index {path}: {str(e)}")
+            return None
+
+        index = cls()
+        for file_path, symbols in data['files'].items():
+            index.files[file_path] = [Symbol(*symbol) for symbol in symbols]
+        return index
+
+
+NAME_PATTERN = r'`?(?P<name>[A-Za-z_$][\w$]*(?:\.[A-Za-z_$][\w$]*)*)`?(?:\(\))?'
+KIND_WORDS = r'(?:the\s+)?(?:(?:class|function|method|func|type|interface|def)\s+)?'
+LOOKUP_PATTERNS = [
+    ('definition', re.compile(rf'where\s*(?:is|are|\'s)\s+{KIND_WORDS}{NAME_PATTERN}\s+'
+                              rf'(?:defined|declared|implemented|located)', re.I)),
+    ('definition', re.compile(rf'(?:find|show|show\s+me|go\s+to)\s+(?:the\s+)?(?:definition|declaration)s?\s+'
+                              rf'(?:of|for)\s+{KIND_WORDS}{NAME_PATTERN}', re.I)),
+    ('definition', re.compile(rf'where\s+(?:do\s+we|does\s+\w+)\s+define\s+{KIND_WORDS}{NAME_PATTERN}', re.I)),
+    ('call', re.compile(rf'(?:what|who|which\s+\w+)\s+(?:calls|call|invokes|uses)\s+{KIND_WORDS}{NAME_PATTERN}', re.I)),
+    ('call', re.compile(rf'where\s*(?:is|are|\'s)\s+{KIND_WORDS}{NAME_PATTERN}\s+(?:called|invoked|used)', re.I)),
+    ('call', re.compile(rf'(?:find|show|show\s+me|list)\s+(?:all\s+)?(?:the\s+)?(?:callers|call\s+sites|usages|uses)\s+'
+                        rf'(?:of|for)\s+{KIND_WORDS}{NAME_PATTERN}', re.I)),
+    ('import', re.compile(rf'(?:what|who|which\s+\w+)\s+imports?\s+{KIND_WORDS}{NAME_PATTERN}', re.I)),
+    ('import', re.compile(rf'where\s*(?:is|are|\'s)\s+{KIND_WORDS}{NAME_PATTERN}\s+imported', re.I)),
+]
+LOOKUP_KINDS = {'definition': DEFINITION_KINDS, 'call': ('call',), 'import': ('import',)}
+
+
+def parse_lookup_question(question: str) -> Optional[Tuple[str, str]]:
+    """(intent, symbol name) if the whole question is a pure lookup, else None"""
+    text = question.strip().rstrip('?.! ')
+    for intent, pattern in LOOKUP_PATTERNS:
+        match = pattern.fullmatch(text)
+        if match:
+            return intent, match.group('name')
+    return None
+
+
+def answer_lookup(index: SymbolIndex, question: str) -> Optional[Tuple[str, List[Dict]]]:
+    """Answer a lookup question from the symbol index, or None to fall back to RAG"""
+    parsed = parse_lookup_question(question)
+    if parsed is None:
+        return None
+
+    intent, name = parsed
+    matches = index.lookup(name, LOOKUP_KINDS[intent])
+    if not matches:
+        return None
+
+    if intent == 'definition':
+        header = f"`{name}` is defined in {len(matches)} place(s):"
+    elif intent == 'call':
+        header = f"`{name}` is called from {len(matches)} place(s):"
+    else:
+        header = f"`{name}` is imported in {len(matches)} place(s):"
+
+    shown = matches[:MAX_LOOKUP_RESULTS]
+    lines = [header, ""]
+    for symbol in shown:
+        where = f"`{symbol.path}` line {symbol.line}"
+        if intent == 'definition':
+            detail = f" ({symbol.kind} in `{symbol.context}`)" if symbol.context else f" ({symbol.kind})"
+        elif intent == 'call':
+            detail = f" in `{symbol.context}`" if symbol.context else " at module level"
+        else:
+            detail = f" from `{symbol.context}`" if symbol.context else ""
+        lines.append(f"- {where}{detail}")
+    if len(matches) > len(shown):
+        lines.append(f"- … and {len(matches) - len(shown)} more")
+
+    sources = [
+        {'file_path': symbol.path, 'line': symbol.line, 'chunk_index': None, 'content': symbol.snippet}
+        for symbol in shown
+    ]
+    return "\n".join(lines), sources
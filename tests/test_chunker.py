@@ -0,0 +1,80 @@
+"""
+Chunker Tests
+Chunks cover every non-blank line, and their line ranges match their text
+"""
+
+import pytest
+
+from chunker import chunk_code
+
+PYTHON_SOURCE = '''"""Module docstring"""
+
+import os
+
+CONSTANT = 1
+
+
+def small():
+    return CONSTANT
+
+
+class Widget:
+    """A class with a few methods"""
+
+    def __init__(self, name):
+        self.name = name
+
+''' + "".join(f'''    def method_{idx}(self):
+        value = "{'x' * 60}"
+        return self.name + value
+
+''' for idx in range(30)) + '''
+
+if __name__ == "__main__":
+    print(small())
+'''
+
+JS_SOURCE = "\n".join(
+    [f"function f{idx}(a, b) {{\n  // brace in comment {{\n  const s = \"}}\";\n  return a + b + {idx};\n}}\n"
+     for idx in range(40)])
+
+TEXT_SOURCE = "\n\n".join(f"Paragraph {idx}\n" + "words " * 40 for idx in range(20))
+
+
+def covered_lines(chunks) -> set:
+    """1-based line numbers inside any chunk's range"""
+    return {line for chunk in chunks for line in range(chunk.start_line, chunk.end_line + 1)}
+
+
+@pytest.mark.parametrize('content, file_type', [(PYTHON_SOURCE, '.py'), (JS_SOURCE, '.js'),
+                                                (TEXT_SOURCE, '.md'), ("def broken(:\n    pass\n" * 50, '.py')])
+def test_chunks_cover_every_non_blank_line(content, file_type):
+    lines = content.splitlines()
+    chunks = chunk_code(content, file_type, max_chars=500, min_chars=100)
+
+    non_blank = {idx + 1 for idx, line in enumerate(lines) if line.strip()}
+    assert non_blank <= covered_lines(chunks)
+    for chunk in chunks:
+        assert 1 <= chunk.start_line <= chunk.end_line <= len(lines)
+        assert chunk.text == "\n".join(lines[chunk.start_line - 1:chunk.end_line])
+        assert len(chunk.text) <= 500
+
+
+def test_chunks_are_in_order_and_do_not_overlap():
+    chunks = chunk_code(PYTHON_SOURCE, '.py', max_chars=500, min_chars=100)
+
+    for before, after in zip(chunks, chunks[1:]):
+        assert before.end_line < after.start_line
+
+
+def test_long_line_is_hard_split_with_its_line_range():
+    content = "short\n" + "x" * 1200 + "\nshort again"
+    chunks = chunk_code(content, '.txt', max_chars=500, min_chars=100)
+
+    long_parts = [chunk for chunk in chunks if chunk.start_line <= 2 <= chunk.end_line]
+    assert "".join(chunk.text for chunk in long_parts).count("x") == 1200
+    assert all(len(chunk.text) <= 500 for chunk in chunks)
+
+
+def test_empty_file_has_no_chunks():
+    assert chunk_code("", '.py') == []
@@ -0,0 +1,40 @@
+"""
+Context Builder Tests
+Merging consecutive chunks into blocks without losing text
+"""
+
+from langchain_core.documents import Document
+
+from chunker import chunk_code
+from context_builder import estimate_tokens, merge_adjacent
+
+
+def as_documents(chunks, source: str = "app.py"):
+    """Retrieved documents for chunks, in chunk order"""
+    return [Document(page_content=chunk.text, metadata={'source': source, 'chunk_index': idx,
+                                                        'start_line': chunk.start_line,
+                                                        'end_line': chunk.end_line})
+            for idx, chunk in enumerate(chunks)]
+
+
+def test_consecutive_chunks_rebuild_the_file():
+    content = "\n".join(f"def f{idx}():\n    return {idx}\n" for idx in range(40))
+    chunks = chunk_code(content, '.py', max_chars=200, min_chars=50)
+    assert len(chunks) > 1
+
+    [block] = merge_adjacent(as_documents(chunks))
+
+    assert block.text == content.strip()
+    assert (block.start_line, block.end_line) == (1, len(content.strip().splitlines()))
+
+
+def test_hard_split_pieces_are_all_kept():
+    content = "header = 1\n" + "x = '" + "y" * 1200 + "'\nfooter = 2"
+    chunks = chunk_code(content, '.txt', max_chars=500, min_chars=10)
+    assert len([chunk for chunk in chunks if chunk.start_line == chunk.end_line == 2]) > 1
+
+    [block] = merge_adjacent(as_documents(chunks))
+
+    assert block.text == content
+    assert block.tokens == estimate_tokens(content)
+    assert (block.start_line, block.end_line) == (1, 3)
@@ -0,0 +1,129 @@
+"""
+Indexer Tests
+Full rebuilds that fail partway must not leave a manifest the next run trusts
+"""
+
+import chromadb
+import pytest
+
+from benchmarks.fakes import FakeEmbeddings
+from embedding_pipeline import EmbeddingPipelineError
+from embedding_providers import PROVIDER_GEMINI, PROVIDER_LOCAL, embedding_spec
+from indexer import IndexingError, IndexSettings, run_index
+from lexical_index import LexicalIndex, lexical_index_path
+from manifest import load_manifest
+from symbols import SymbolIndex, symbol_index_path
+
+COLLECTION_NAME = "codebase_test"
+GEMINI_SPEC = embedding_spec(PROVIDER_GEMINI, "models/fake-embedding")
+LOCAL_SPEC = embedding_spec(PROVIDER_LOCAL, "fake/local-model")
+
+
+class FailingEmbeddings(FakeEmbeddings):
+    """Embeds the first batches, then fails every call, like a provider that runs out of retries"""
+
+    def __init__(self, succeed_batches: int, **kwargs):
+        super().__init__(**kwargs)
+        self.succeed_batches = succeed_batches
+
+    def embed_documents(self, texts):
+        if self.succeed_batches <= 0:
+            raise RuntimeError("embedding service unavailable")
+        self.succeed_batches -= 1
+        return super().embed_documents(texts)
+
+
+@pytest.fixture
+def repo(tmp_path):
+    """Six small Python files, one chunk each"""
+    source = tmp_path / "repo"
+    source.mkdir()
+    for idx in range(6):
+        (source / f"module_{idx}.py").write_text(f"def function_{idx}():\n    return {idx}\n")
+    return source
+
+
+@pytest.fixture
+def settings(tmp_path):
+    """One batch of two chunks at a time, and no retries"""
+    return IndexSettings(extensions=frozenset({'.py'}), ignore_dirs=frozenset(),
+                         persist_directory=str(tmp_path / "chroma_db"), max_codebase_size_mb=None,
+                         max_files=None, max_file_size_mb=None, embedding_batch_size=2,
+                         embedding_max_concurrency=1, embedding_max_retries=0)
+
+
+def manifest_dir(settings: IndexSettings) -> str:
+    """Where run_index keeps manifests for these settings"""
+    return settings.persist_directory + "/manifests"
+
+
+def test_interrupted_model_change_leaves_no_manifest(repo, settings):
+    run_index(repo, COLLECTION_NAME, FakeEmbeddings(dimensions=16), settings, embedding_spec=GEMINI_SPEC)
+    assert load_manifest(COLLECTION_NAME, manifest_dir(settings))
+
+    with pytest.raises(EmbeddingPipelineError):
+        run_index(repo, COLLECTION_NAME, FailingEmbeddings(1, dimensions=8), settings, embedding_spec=LOCAL_SPEC)
+
+    assert load_manifest(COLLECTION_NAME, manifest_dir(settings)) is None
+
+
+def test_interrupted_rebuild_after_corrupt_lexical_index_restarts(repo, settings):
+    run_index(repo, COLLECTION_NAME, FakeEmbeddings(), settings)
+    lexical_path = lexical_index_path(COLLECTION_NAME, settings.persist_directory)
+    lexical_path.write_bytes(b"not gzip")
+
+    with pytest.raises(EmbeddingPipelineError):
+        run_index(repo, COLLECTION_NAME, FailingEmbeddings(1), settings)
+    assert not lexical_path.exists()
+
+    stats = run_index(repo, COLLECTION_NAME, FakeEmbeddings(), settings)
+    assert stats['files'] == stats['chunks'] == 6
+    assert len(LexicalIndex.load(lexical_path)) == 6
+
+
+def test_interrupted_rebuild_after_missing_symbol_index_restarts(repo, settings):
+    run_index(repo, COLLECTION_NAME, FakeEmbeddings(), settings)
+    symbol_path = symbol_index_path(COLLECTION_NAME, settings.persist_directory)
+    symbol_path.unlink()
+
+    with pytest.raises(EmbeddingPipelineError):
+        run_index(repo, COLLECTION_NAME, FailingEmbeddings(1), settings)
+    assert load_manifest(COLLECTION_NAME, manifest_dir(settings)) is None
+
+    stats = run_index(repo, COLLECTION_NAME, FakeEmbeddings(), settings)
+    assert stats['files'] == stats['chunks'] == 6
+    assert len(SymbolIndex.load(symbol_path).files) == 6
+
+
+def test_interrupted_model_change_reindexes_every_file(repo, settings):
+    run_index(repo, COLLECTION_NAME, FakeEmbeddings(dimensions=16), settings, embedding_spec=GEMINI_SPEC)
+    with pytest.raises(EmbeddingPipelineError):
+        run_index(repo, COLLECTION_NAME, FailingEmbeddings(1, dimensions=8), settings, embedding_spec=LOCAL_SPEC)
+
+    stats = run_index(repo, COLLECTION_NAME, FakeEmbeddings(dimensions=8), settings, embedding_spec=LOCAL_SPEC)
+
+    assert stats['files'] == stats['chunks'] == 6
+    collection = chromadb.PersistentClient(path=settings.persist_directory).get_collection(COLLECTION_NAME)
+    sources = {metadata['source'] for metadata in collection.get(include=['metadatas'])['metadatas']}
+    assert sources == {f"module_{idx}.py" for idx in range(6)}
+
+
+def test_reindex_with_only_an_empty_new_file(repo, settings):
+    run_index(repo, COLLECTION_NAME, FakeEmbeddings(), settings)
+    (repo / "__init__.py").write_text("")
+
+    stats = run_index(repo, COLLECTION_NAME, FakeEmbeddings(), settings)
+    assert stats['files'] == 1 and stats['chunks'] == 0
+    assert load_manifest(COLLECTION_NAME, manifest_dir(settings))['__init__.py']['chunk_ids'] == []
+
+    stats = run_index(repo, COLLECTION_NAME, FakeEmbeddings(), settings)
+    assert stats['files'] == 0
+
+
+def test_codebase_without_chunks_is_an_error(tmp_path, settings):
+    source = tmp_path / "empty"
+    source.mkdir()
+    (source / "__init__.py").write_text("")
+
+    with pytest.raises(IndexingError, match="No documents created"):
+        run_index(source, COLLECTION_NAME, FakeEmbeddings(), settings)
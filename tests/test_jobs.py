@@ -0,0 +1,51 @@
+"""
+Job Queue Tests
+A job is marked done only after its callback has recorded the result
+"""
+
+from jobs import JobQueue, JobStore
+
+
+def run_job(store: JobStore, runner, on_done) -> dict:
+    """Run one job to completion and return its row"""
+    queue = JobQueue(store, max_workers=1)
+    job_id = queue.submit('zip', 'repo.zip', 'codebase_test', runner, on_done)
+    queue._executor.shutdown(wait=True)
+    return store.get(job_id)
+
+
+def test_callback_runs_before_job_is_done(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite"))
+    seen = []
+
+    def on_done(result):
+        seen.append((result, store.recent(limit=1)[0]['status']))
+
+    job = run_job(store, lambda reporter: {'chunks': 3}, on_done)
+
+    assert seen == [({'chunks': 3}, 'running')]
+    assert job['status'] == 'done'
+
+
+def test_callback_failure_does_not_fail_the_index(tmp_path):
+    def on_done(result):
+        raise RuntimeError("registry is read-only")
+
+    job = run_job(JobStore(str(tmp_path / "jobs.sqlite")), lambda reporter: {'chunks': 3}, on_done)
+
+    assert job['status'] == 'done'
+    assert job['result'] == {'chunks': 3}
+    assert any(message['level'] == 'warning' and "registry is read-only" in message['text']
+               for message in job['messages'])
+
+
+def test_runner_failure_marks_job_failed(tmp_path):
+    called = []
+
+    def runner(reporter):
+        raise ValueError("no files")
+
+    job = run_job(JobStore(str(tmp_path / "jobs.sqlite")), runner, called.append)
+
+    assert (job['status'], job['error']) == ('failed', "no files")
+    assert called == []
@@ -0,0 +1,35 @@
+"""
+Lexical Index Tests
+Reciprocal rank fusion of vector and BM25 rankings
+"""
+
+import pytest
+
+from lexical_index import reciprocal_rank_fusion
+
+
+def test_rrf_scores_sum_reciprocal_ranks():
+    fused = dict(reciprocal_rank_fusion([['a', 'b'], ['b', 'c']], k=60))
+
+    assert fused['a'] == pytest.approx(1 / 61)
+    assert fused['b'] == pytest.approx(1 / 62 + 1 / 61)
+    assert fused['c'] == pytest.approx(1 / 62)
+
+
+def test_rrf_prefers_ids_found_by_both_rankings():
+    fused = reciprocal_rank_fusion([['vector-only', 'both'], ['lexical-only', 'both']])
+
+    assert [doc_id for doc_id, _ in fused][0] == 'both'
+
+
+def test_rrf_sorted_by_descending_score():
+    fused = reciprocal_rank_fusion([['a', 'b', 'c'], ['c', 'd'], ['c']])
+
+    scores = [score for _, score in fused]
+    assert scores == sorted(scores, reverse=True)
+    assert fused[0][0] == 'c'
+
+
+def test_rrf_of_no_rankings_is_empty():
+    assert reciprocal_rank_fusion([]) == []
+    assert reciprocal_rank_fusion([[], []]) == []
@@ -0,0 +1,99 @@
+"""
+LLM Dispatcher Tests
+Coalescing identical prompts and cancelling completions nobody is waiting for
+"""
+
+import threading
+import time
+
+from benchmarks.fakes import FakeChatModel
+from llm_dispatcher import LLMDispatcher
+
+
+def wait_until(condition, timeout: float = 5.0) -> None:
+    """Poll until condition() holds, failing the test on timeout"""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_identical_prompts_share_one_completion():
+    llm = FakeChatModel(first_token_ms=300, answer_tokens=8)
+    dispatcher = LLMDispatcher(max_concurrency=2)
+    answers = []
+    metrics = [{} for _ in range(4)]
+    barrier = threading.Barrier(len(metrics))
+
+    def ask(session: int) -> None:
+        barrier.wait()
+        answers.append(dispatcher.invoke(llm, "What does main do?", f"session-{session}", metrics[session]))
+
+    threads = [threading.Thread(target=ask, args=(session,)) for session in range(len(metrics))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert llm.faults.calls == 1
+    assert len(set(answers)) == 1 and answers[0]
+    assert sorted(metric['coalesced'] for metric in metrics) == [False, True, True, True]
+    stats = dispatcher.stats()
+    assert (stats['requests'], stats['coalesced'], stats['completions']) == (4, 3, 1)
+
+
+def test_different_models_are_not_coalesced():
+    first, second = FakeChatModel(answer_tokens=4), FakeChatModel(answer_tokens=4)
+    dispatcher = LLMDispatcher()
+
+    dispatcher.invoke(first, "same prompt")
+    dispatcher.invoke(second, "same prompt")
+
+    assert first.faults.calls == second.faults.calls == 1
+    assert dispatcher.stats()['coalesced'] == 0
+
+
+def test_finished_prompt_is_asked_again():
+    llm = FakeChatModel(answer_tokens=4)
+    dispatcher = LLMDispatcher()
+
+    dispatcher.invoke(llm, "prompt")
+    # A finished flight is still replayed until its worker unlists it
+    wait_until(lambda: dispatcher.stats()['running'] == 0)
+    dispatcher.invoke(llm, "prompt")
+
+    assert llm.faults.calls == 2
+
+
+def test_queued_completion_is_dropped_when_its_caller_leaves():
+    llm = FakeChatModel(first_token_ms=300, answer_tokens=4)
+    dispatcher = LLMDispatcher(max_concurrency=1)
+    busy = threading.Thread(target=dispatcher.invoke, args=(llm, "occupies the only worker", "a"))
+    busy.start()
+    wait_until(lambda: dispatcher.stats()['running'] == 1)
+
+    # Closing a stream that has not produced anything yet unsubscribes from its queued flight
+    flight, _ = dispatcher._join(llm, "never needed", "b")
+    assert dispatcher.stats()['queued'] == 1
+    dispatcher._leave(flight)
+    busy.join()
+
+    stats = dispatcher.stats()
+    assert (stats['queued'], stats['cancelled'], stats['completions']) == (0, 1, 1)
+    assert llm.faults.calls == 1
+
+
+def test_running_completion_stops_when_its_caller_leaves():
+    llm = FakeChatModel(answer_tokens=200, token_ms=5)
+    dispatcher = LLMDispatcher(max_concurrency=1)
+
+    stream = dispatcher.stream(llm, "long answer", "a")
+    next(stream)
+    stream.close()
+
+    wait_until(lambda: dispatcher.stats()['running'] == 0)
+    assert dispatcher.stats()['cancelled'] == 1
+    assert llm.active == 0
+    # The truncated flight is unlisted, so the same prompt gets a full answer
+    assert len(dispatcher.invoke(llm, "long answer", "b").split()) == 200
+    assert llm.faults.calls == 2
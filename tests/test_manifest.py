@@ -0,0 +1,35 @@
+"""
+Manifest Tests
+Classifying files between two indexing runs
+"""
+
+from manifest import diff_manifest
+
+
+def entry(content_hash: str, chunker: int = 1) -> dict:
+    """A manifest entry with only the fields diff_manifest reads"""
+    return {'hash': content_hash, 'chunker': chunker, 'chunk_ids': []}
+
+
+def test_diff_manifest_classifies_every_file():
+    previous = {'same.py': entry('a'), 'edited.py': entry('b'), 'deleted.py': entry('c')}
+    current = {'same.py': entry('a'), 'edited.py': entry('B'), 'new.py': entry('d')}
+
+    diff = diff_manifest(previous, current)
+
+    assert diff == {'added': ['new.py'], 'changed': ['edited.py'], 'removed': ['deleted.py'],
+                    'unchanged': ['same.py']}
+
+
+def test_diff_manifest_treats_new_chunker_version_as_changed():
+    diff = diff_manifest({'a.py': entry('x', chunker=1)}, {'a.py': entry('x', chunker=2)})
+
+    assert diff['changed'] == ['a.py']
+    assert diff['unchanged'] == []
+
+
+def test_diff_manifest_from_empty_adds_everything():
+    diff = diff_manifest({}, {'a.py': entry('x'), 'b.py': entry('y')})
+
+    assert sorted(diff['added']) == ['a.py', 'b.py']
+    assert diff['changed'] == diff['removed'] == diff['unchanged'] == []
@@ -0,0 +1,81 @@
+"""
+Source Tests
+Zip-bomb checks against the central directory, and naming collections for uploaded archives
+"""
+
+import zipfile
+
+import pytest
+
+import sources
+from collections_registry import zip_collection_name
+from sources import SourceError, check_zip_bomb, zip_codebase_name
+
+
+def write_zip(path, members: dict) -> None:
+    """Write a deflated archive of name -> bytes"""
+    with zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+
+
+def test_check_zip_bomb_accepts_ordinary_archive(tmp_path):
+    path = tmp_path / "repo.zip"
+    write_zip(path, {'repo/main.py': b"print('hello')\n" * 100, 'repo/README.md': b"# Repo\n"})
+
+    with zipfile.ZipFile(path) as archive:
+        check_zip_bomb(archive)
+
+
+def test_check_zip_bomb_rejects_high_compression_ratio(tmp_path):
+    path = tmp_path / "bomb.zip"
+    write_zip(path, {'zeros.bin': b"\0" * (4 * 1024 * 1024)})
+
+    with zipfile.ZipFile(path) as archive:
+        with pytest.raises(SourceError, match="compression ratio"):
+            check_zip_bomb(archive)
+
+
+def test_check_zip_bomb_rejects_too_many_members(tmp_path, monkeypatch):
+    monkeypatch.setattr(sources, 'ZIP_MAX_MEMBERS', 2)
+    path = tmp_path / "many.zip"
+    write_zip(path, {f"file{idx}.txt": b"x" for idx in range(3)})
+
+    with zipfile.ZipFile(path) as archive:
+        with pytest.raises(SourceError, match="too many entries"):
+            check_zip_bomb(archive)
+
+
+def test_check_zip_bomb_rejects_large_total_size(tmp_path, monkeypatch):
+    monkeypatch.setattr(sources, 'ZIP_MAX_UNCOMPRESSED_MB', 1)
+    path = tmp_path / "large.zip"
+    write_zip(path, {f"file{idx}.txt": bytes(range(256)) * 2048 for idx in range(3)})
+
+    with zipfile.ZipFile(path) as archive:
+        with pytest.raises(SourceError, match="expands to"):
+            check_zip_bomb(archive)
+
+
+def test_zip_codebase_name_prefers_the_root_folder(tmp_path):
+    path = tmp_path / "upload.zip"
+    write_zip(path, {'my-project/main.py': b"print(1)\n", 'my-project/lib/util.py': b"x = 1\n"})
+
+    assert zip_codebase_name(path, "my-project (2).zip") == "my-project"
+
+
+def test_zip_codebase_name_falls_back_to_the_file_name(tmp_path):
+    path = tmp_path / "upload.zip"
+    write_zip(path, {'main.py': b"print(1)\n", 'lib/util.py': b"x = 1\n"})
+    (tmp_path / "broken.zip").write_bytes(b"not a zip")
+
+    assert zip_codebase_name(path, "project.zip") == "project"
+    assert zip_codebase_name(tmp_path / "broken.zip", "broken.zip") == "broken"
+
+
+def test_edited_archive_keeps_its_collection(tmp_path):
+    first, second = tmp_path / "first.zip", tmp_path / "second.zip"
+    write_zip(first, {'repo/main.py': b"print(1)\n"})
+    write_zip(second, {'repo/main.py': b"print(2)\n", 'repo/new.py': b"y = 2\n"})
+
+    assert (zip_collection_name(zip_codebase_name(first, "repo.zip"))
+            == zip_collection_name(zip_codebase_name(second, "repo-edited.zip")))
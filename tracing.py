@@ -0,0 +1,153 @@
+"""
+Tracing
+Stage timing spans exported as JSON log lines (and optionally OpenTelemetry) with rolling percentiles
+"""
+
+import json
+import logging
+import math
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from logging.handlers import RotatingFileHandler
+from typing import Deque, Dict, Iterator, List, Optional
+
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:  # Optional: spans are still logged and summarized without it
+    otel_trace = None
+
+SPAN_HISTORY = 500  # Durations kept per stage for percentiles
+TRACE_LOG_MAX_BYTES = 10 * 1024 * 1024
+TRACE_LOG_BACKUPS = 3
+
+logger = logging.getLogger('codebase_qa.trace')
+
+_current_trace: ContextVar[Optional[str]] = ContextVar('current_trace', default=None)
+_current_span: ContextVar[Optional[str]] = ContextVar('current_span', default=None)
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile"""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+class Tracer:
+    """Times named stages, keeps recent durations per stage and exports each finished span"""
+
+    def __init__(self, history: int = SPAN_HISTORY):
+        self.history = history
+        self._durations: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+        self._otel = None
+
+    def configure(self, log_path: Optional[str] = None, opentelemetry: bool = False) -> None:
+        """Write spans as JSON lines to log_path ('-' for stderr) and mirror them to OpenTelemetry if installed"""
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+            handler.close()
+        if log_path:
+            if log_path == '-':
+                handler = logging.StreamHandler()
+            else:
+                handler = RotatingFileHandler(log_path, maxBytes=TRACE_LOG_MAX_BYTES, backupCount=TRACE_LOG_BACKUPS,
+                                              encoding='utf-8')
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            logger.addHandler(handler)
+            logger.setLevel(logging.INFO)
+        logger.propagate = False
+
+        self._otel = otel_trace.get_tracer('codebase_qa') if opentelemetry and otel_trace else None
+
+    @contextmanager
+    def span(self, name: str, **attributes) -> Iterator[Dict]:
+        """Time a block; yields its attributes dict so the block can add to it"""
+        trace_id = _current_trace.get() or uuid.uuid4().hex[:16]
+        span_id = uuid.uuid4().hex[:8]
+        parent_id = _current_span.get()
+        trace_token = _current_trace.set(trace_id)
+        span_token = _current_span.set(span_id)
+        started_at = time.time()
+        started = time.perf_counter()
+        error = None
+        try:
+            with (self._otel.start_as_current_span(name) if self._otel else nullcontext()) as otel_span:
+                try:
+                    yield attributes
+                finally:
+                    if otel_span is not None:
+                        otel_span.set_attributes(_otel_attributes(attributes))
+        except BaseException as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _current_span.reset(span_token)
+            _current_trace.reset(trace_token)
+            self._finish(name, started_at, time.perf_counter() - started, trace_id, span_id, parent_id,
+                         attributes, error)
+
+    def record(self, name: str, seconds: float, **attributes) -> None:
+        """Add a span measured elsewhere (e.g. in a worker process), ending now"""
+        started_at = time.time() - seconds
+        if self._otel:
+            end_ns = time.time_ns()
+            otel_span = self._otel.start_span(name, start_time=end_ns - int(seconds * 1e9),
+                                              attributes=_otel_attributes(attributes))
+            otel_span.end(end_time=end_ns)
+        self._finish(name, started_at, seconds, _current_trace.get() or uuid.uuid4().hex[:16],
+                     uuid.uuid4().hex[:8], _current_span.get(), attributes, None)
+
+    def _finish(self, name: str, started_at: float, seconds: float, trace_id: str, span_id: str,
+                parent_id: Optional[str], attributes: Dict, error: Optional[str]) -> None:
+        """Keep the duration for percentiles and log the span"""
+        with self._lock:
+            durations = self._durations.get(name)
+            if durations is None:
+                durations = self._durations[name] = deque(maxlen=self.history)
+            durations.append(seconds)
+
+        if logger.isEnabledFor(logging.INFO):
+            entry = {
+                'span': name,
+                'trace_id': trace_id,
+                'span_id': span_id,
+                'parent_id': parent_id,
+                'start': round(started_at, 6),
+                'ms': round(seconds * 1000, 3),
+                **{key: value for key, value in attributes.items() if value is not None}
+            }
+            if error:
+                entry['error'] = error
+            logger.info(json.dumps(entry, default=str))
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """count, p50_ms and p95_ms of the recent durations of each stage"""
+        with self._lock:
+            snapshot = {name: list(durations) for name, durations in self._durations.items()}
+        return {
+            name: {
+                'count': len(values),
+                'p50_ms': percentile(values, 0.5) * 1000,
+                'p95_ms': percentile(values, 0.95) * 1000
+            }
+            for name, values in snapshot.items() if values
+        }
+
+    def reset(self) -> None:
+        """Forget recorded durations"""
+        with self._lock:
+            self._durations.clear()
+
+
+def _otel_attributes(attributes: Dict) -> Dict:
+    """OpenTelemetry accepts only primitive attribute values"""
+    return {key: value if isinstance(value, (str, bool, int, float)) else str(value)
+            for key, value in attributes.items() if value is not None}
+
+
+# Process-wide tracer shared by the app, indexing jobs and the pipeline modules
+tracer = Tracer()